@@ -0,0 +1 @@
+"""CPU hot-path benchmarks on synthetic scenes; run with `python -m benchmarks`."""
@@ -0,0 +1,60 @@
+"""Benchmark CLI.
+
+Examples:
+    python -m benchmarks run --scale small --out benchmarks/results/current.json
+    python -m benchmarks run --scale medium --only ply_read,export --repeat 5
+    python -m benchmarks compare benchmarks/results/baseline.json benchmarks/results/current.json
+"""
+import argparse
+import os
+import sys
+
+# Ensure project root is on sys.path so `src` imports work from any working directory.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import suite  # noqa: E402
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run benchmarks and write JSON results")
+    run.add_argument("--scale", default="small", choices=sorted(suite.SCALES), help="Synthetic workload size")
+    run.add_argument("--only", default="", help="Comma-separated benchmark names (default: all)")
+    run.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (the median is compared)")
+    run.add_argument("--out", default=os.path.join("benchmarks", "results", "latest.json"), help="Results JSON path")
+    run.add_argument("--work-dir", dest="work_dir", help="Keep synthetic inputs here instead of a temporary folder")
+    run.add_argument("--baseline", help="Compare against this results file after running")
+    run.add_argument("--threshold", type=float, default=suite.THRESHOLD, help="Relative slowdown flagged as a regression")
+
+    cmp = sub.add_parser("compare", help="Compare results against a baseline; exits 1 on regressions")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=suite.THRESHOLD, help="Relative slowdown flagged as a regression")
+
+    sub.add_parser("list", help="List benchmarks and scales")
+    args = p.parse_args(argv)
+
+    if args.command == "list":
+        for case in suite.CASES:
+            print(f"{case.name:<22} {case.description}")
+        print("scales:", ", ".join(suite.SCALES))
+        return 0
+    if args.command == "run":
+        names = [n for n in args.only.split(",") if n]
+        current = suite.run_suite(args.scale, names=names or None, repeat=args.repeat, work_dir=args.work_dir, out_path=args.out)
+        if not args.baseline:
+            return 0
+        baseline = suite.load_results(args.baseline)
+    else:
+        baseline, current = suite.load_results(args.baseline), suite.load_results(args.current)
+    report = suite.compare(baseline, current, threshold=args.threshold)
+    print(suite.format_comparison(report))
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
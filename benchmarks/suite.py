@@ -0,0 +1,348 @@
+"""CPU hot-path benchmarks on synthetic scenes, with JSON results and baseline comparison.
+
+Each `Case` has a setup (synthetic inputs, not timed) and a run that is timed `repeat` times, every
+time into a fresh output folder so skip-if-unchanged logic never turns a repeat into a no-op. Results
+carry the machine metadata of `src.core.env` so numbers from different hosts are not compared blindly.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from benchmarks import synthetic
+
+RESULTS_VERSION = 1
+THRESHOLD = 0.15  # relative slowdown of the median flagged as a regression
+NOISE_FLOOR_S = 0.005  # ignore differences below this many seconds
+
+# Workload sizes; "medium" and "large" reach the million-Gaussian range of real trained scenes.
+SCALES: Dict[str, Dict[str, Any]] = {
+    "tiny": {"images": 4, "image_size": (320, 240), "model_images": 20, "points": 2000, "gaussians": 20000, "log_images": 50, "iterations": 3000},
+    "small": {"images": 24, "image_size": (1280, 720), "model_images": 200, "points": 50000, "gaussians": 250000, "log_images": 500, "iterations": 30000},
+    "medium": {"images": 64, "image_size": (1920, 1080), "model_images": 1000, "points": 300000, "gaussians": 1000000, "log_images": 2000, "iterations": 30000},
+    "large": {"images": 160, "image_size": (3840, 2160), "model_images": 3000, "points": 1500000, "gaussians": 5000000, "log_images": 5000, "iterations": 30000},
+}
+
+
+@dataclass
+class Case:
+    """One benchmark: setup(work_dir, scale) -> state (untimed); run(state, out_dir) -> metrics (timed)."""
+
+    name: str
+    setup: Callable[[str, Dict[str, Any]], Dict[str, Any]]
+    run: Callable[[Dict[str, Any], str], Dict[str, Any]]
+    description: str = ""
+
+
+@contextlib.contextmanager
+def _chdir(path: str) -> Iterator[None]:
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Cases
+
+
+def _setup_jpegs(work: str, scale: Dict[str, Any]) -> Dict[str, Any]:
+    src = os.path.join(work, "jpegs")
+    paths = synthetic.make_jpeg_set(src, scale["images"], scale["image_size"])
+    # Ingest at half size so every image is decoded, resized and re-encoded rather than copied.
+    return {"src": src, "count": len(paths), "bytes": sum(os.path.getsize(p) for p in paths), "max_size": max(scale["image_size"]) // 2}
+
+
+def _run_prepare(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src import orchestrator
+
+    with _chdir(out), _quiet():
+        orchestrator.prepare_scene_from_dir(state["src"], "bench")
+    return {"items": state["count"], "bytes": state["bytes"]}
+
+
+def _run_prepare_copy(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src import orchestrator
+
+    with _chdir(out), _quiet():
+        orchestrator.prepare_scene_from_dir(state["src"], "bench", link_mode="copy")
+    return {"items": state["count"], "bytes": state["bytes"]}
+
+
+def _run_ingest(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src import ingest
+
+    report = ingest.ingest_images(state["src"], os.path.join(out, "images"), max_size=state["max_size"], verbose=False)
+    return {"items": report["total"], "bytes": state["bytes"], "counts": report["counts"]}
+
+
+def _run_pyramid(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src.convert import pyramid
+
+    report = pyramid.build_pyramid(out, source_dir=state["src"], verbose=False)
+    return {"items": report["total"], "bytes": state["bytes"], "counts": report["counts"]}
+
+
+def _setup_log(work: str, scale: Dict[str, Any]) -> Dict[str, Any]:
+    data = synthetic.make_tool_log(scale["log_images"], scale["iterations"])
+    return {"data": data}
+
+
+def _run_log(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src.core import logstream
+
+    data = state["data"]
+    events = []
+    processor = logstream.LogProcessor(
+        patterns=["could not create OpenGL context"],
+        parsers=[logstream.colmap_progress_parser, logstream.training_progress_parser],
+        on_event=events.append,
+    )
+    for s in range(0, len(data), 65536):
+        processor.feed(data[s : s + 65536])
+    processor.close()
+    return {"items": len(events), "bytes": len(data)}
+
+
+def _setup_model(work: str, scale: Dict[str, Any]) -> Dict[str, Any]:
+    from src.convert import colmap_model
+
+    model = synthetic.make_colmap_model(scale["model_images"], scale["points"])
+    src = os.path.join(work, "sparse")
+    colmap_model.write_model(model, src)
+    size = sum(os.path.getsize(os.path.join(src, f)) for f in os.listdir(src))
+    return {"model": model, "src": src, "bytes": size}
+
+
+def _run_model_read(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src.convert import colmap_model
+
+    model = colmap_model.read_model(state["src"])
+    return {"items": len(model.points3D), "bytes": state["bytes"]}
+
+
+def _run_model_write(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src.convert import colmap_model
+
+    colmap_model.write_model(state["model"], out)
+    return {"items": len(state["model"].points3D), "bytes": state["bytes"]}
+
+
+def _setup_ply(work: str, scale: Dict[str, Any]) -> Dict[str, Any]:
+    path = synthetic.make_gaussian_ply(os.path.join(work, "point_cloud.ply"), scale["gaussians"])
+    return {"ply": path, "count": scale["gaussians"], "bytes": os.path.getsize(path)}
+
+
+def _run_ply_read(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    import numpy as np
+
+    from src.convert import gaussian_ply
+
+    total = 0.0
+    for chunk in gaussian_ply.iter_gaussians(state["ply"]):
+        total += float(np.abs(gaussian_ply.field_block(chunk, "positions")).sum())
+    return {"items": state["count"], "bytes": state["bytes"]}
+
+
+def _run_ply_write(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src.convert import gaussian_ply
+
+    gaussian_ply.write_gaussians(os.path.join(out, "copy.ply"), gaussian_ply.read_gaussians(state["ply"]))
+    return {"items": state["count"], "bytes": state["bytes"]}
+
+
+def _run_export(state: Dict[str, Any], out: str) -> Dict[str, Any]:
+    from src.convert import splat_export
+
+    with _quiet():
+        report = splat_export.export_splats(state["ply"], out, formats=("splat", "compressed_ply"))
+    return {"items": state["count"], "bytes": state["bytes"], "kept": report.get("kept")}
+
+
+CASES: List[Case] = [
+    Case("prepare_scene", _setup_jpegs, _run_prepare, "orchestrator.prepare_scene_from_dir, auto link mode"),
+    Case("prepare_scene_copy", _setup_jpegs, _run_prepare_copy, "orchestrator.prepare_scene_from_dir, threaded copy"),
+    Case("ingest", _setup_jpegs, _run_ingest, "src.ingest.ingest_images with resize, process pool"),
+    Case("pyramid", _setup_jpegs, _run_pyramid, "src.convert.pyramid images_2/4/8, process pool"),
+    Case("log_processing", _setup_log, _run_log, "LogProcessor over COLMAP + train.py output"),
+    Case("model_read", _setup_model, _run_model_read, "colmap_model.read_model (binary)"),
+    Case("model_write", _setup_model, _run_model_write, "colmap_model.write_model (binary)"),
+    Case("ply_read", _setup_ply, _run_ply_read, "gaussian_ply.iter_gaussians over a memmapped PLY"),
+    Case("ply_write", _setup_ply, _run_ply_write, "gaussian_ply.write_gaussians of a memmapped PLY"),
+    Case("export", _setup_ply, _run_export, "splat_export.export_splats to .splat + compressed PLY"),
+]
+
+
+# ---------------------------------------------------------------------------
+# Running
+
+
+def machine_info() -> Dict[str, Any]:
+    """Environment report (cached torch probe, see `src.core.env`) plus CPU count and git revision."""
+    from src.core import env
+
+    report = env.cached_env_report()
+    info = {key: report[key] for key in ("python", "system", "torch")}
+    info["cpu_count"] = os.cpu_count()
+    info["machine"] = platform.machine()
+    try:
+        info["git_commit"] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        info["git_commit"] = None
+    return info
+
+
+def run_suite(
+    scale: str = "small",
+    names: Optional[Sequence[str]] = None,
+    repeat: int = 3,
+    work_dir: Optional[str] = None,
+    out_path: Optional[str] = None,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """Run the selected cases (default: all) at a scale from SCALES and return the results document.
+
+    Setups sharing a function reuse one set of synthetic inputs. work_dir defaults to a temporary
+    folder that is removed afterwards; out_path saves the results as JSON.
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale {scale!r}; expected one of {', '.join(SCALES)}")
+    selected = [c for c in CASES if not names or c.name in names]
+    unknown = set(names or ()) - {c.name for c in CASES}
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s) {sorted(unknown)}; expected some of {', '.join(c.name for c in CASES)}")
+    params = SCALES[scale]
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="gs-bench-")
+    results: Dict[str, Any] = {}
+    states: Dict[Callable, Dict[str, Any]] = {}
+    try:
+        for case in selected:
+            if case.setup not in states:
+                setup_dir = os.path.join(work_dir, "inputs", case.setup.__name__.strip("_"))
+                os.makedirs(setup_dir, exist_ok=True)
+                t0 = time.perf_counter()
+                states[case.setup] = case.setup(setup_dir, params)
+                if verbose:
+                    print(f"[bench] setup {case.setup.__name__.strip('_')}: {time.perf_counter() - t0:.1f}s")
+            seconds: List[float] = []
+            metrics: Dict[str, Any] = {}
+            for i in range(repeat):
+                out = os.path.join(work_dir, "runs", case.name, str(i))
+                os.makedirs(out, exist_ok=True)
+                t0 = time.perf_counter()
+                metrics = case.run(states[case.setup], out)
+                seconds.append(time.perf_counter() - t0)
+                shutil.rmtree(out, ignore_errors=True)
+            median = statistics.median(seconds)
+            entry = {"description": case.description, "seconds": seconds, "median_s": median, "min_s": min(seconds), "metrics": metrics}
+            if metrics.get("items"):
+                entry["items_per_s"] = metrics["items"] / median if median > 0 else None
+            if metrics.get("bytes"):
+                entry["mb_per_s"] = metrics["bytes"] / 1e6 / median if median > 0 else None
+            results[case.name] = entry
+            if verbose:
+                rate = f", {entry['mb_per_s']:.1f} MB/s" if entry.get("mb_per_s") else ""
+                print(f"[bench] {case.name}: median {median:.3f}s (min {min(seconds):.3f}s{rate})")
+    finally:
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    document = {"version": RESULTS_VERSION, "created_at": time.time(), "scale": scale, "repeat": repeat, "machine": machine_info(), "results": results}
+    if out_path:
+        save_results(document, out_path)
+        if verbose:
+            print("Benchmark results:", out_path)
+    return document
+
+
+def save_results(document: Dict[str, Any], path: str) -> str:
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------------------------------------------------------------------
+# Comparison
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = THRESHOLD, noise_floor_s: float = NOISE_FLOOR_S) -> Dict[str, Any]:
+    """Compare median times case by case.
+
+    A case regresses when its median grew by more than threshold (relative) and by more than
+    noise_floor_s; it improved under the mirror condition. Returns {"rows", "regressions",
+    "improvements", "warnings"}; warnings note mismatched scales or machines.
+    """
+    warnings = []
+    if baseline.get("scale") != current.get("scale"):
+        warnings.append(f"scale differs: baseline {baseline.get('scale')!r}, current {current.get('scale')!r}")
+    base_machine, cur_machine = baseline.get("machine", {}), current.get("machine", {})
+    for key in ("cpu_count", "machine"):
+        if base_machine.get(key) != cur_machine.get(key):
+            warnings.append(f"{key} differs: baseline {base_machine.get(key)!r}, current {cur_machine.get(key)!r}")
+    if base_machine.get("system", {}).get("processor") != cur_machine.get("system", {}).get("processor"):
+        warnings.append("processor differs between baseline and current run")
+
+    rows = []
+    for name in sorted(set(baseline.get("results", {})) | set(current.get("results", {}))):
+        base = baseline.get("results", {}).get(name)
+        cur = current.get("results", {}).get(name)
+        if base is None or cur is None:
+            rows.append({"name": name, "status": "new" if base is None else "missing"})
+            continue
+        b, c = base["median_s"], cur["median_s"]
+        ratio = c / b if b > 0 else float("inf")
+        status = "ok"
+        if ratio > 1 + threshold and c - b > noise_floor_s:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold) and b - c > noise_floor_s:
+            status = "improvement"
+        rows.append({"name": name, "baseline_s": b, "current_s": c, "ratio": ratio, "status": status})
+    return {
+        "rows": rows,
+        "regressions": [r["name"] for r in rows if r["status"] == "regression"],
+        "improvements": [r["name"] for r in rows if r["status"] == "improvement"],
+        "warnings": warnings,
+        "threshold": threshold,
+    }
+
+
+def format_comparison(report: Dict[str, Any]) -> str:
+    lines = [f"{'benchmark':<22} {'baseline':>10} {'current':>10} {'ratio':>7}  status"]
+    for row in report["rows"]:
+        if "ratio" in row:
+            lines.append(f"{row['name']:<22} {row['baseline_s']:>9.3f}s {row['current_s']:>9.3f}s {row['ratio']:>6.2f}x  {row['status']}")
+        else:
+            lines.append(f"{row['name']:<22} {'':>10} {'':>10} {'':>7}  {row['status']}")
+    lines += [f"warning: {w}" for w in report["warnings"]]
+    if report["regressions"]:
+        lines.append(f"{len(report['regressions'])} regression(s) above {report['threshold']:.0%}: {', '.join(report['regressions'])}")
+    else:
+        lines.append("No regressions.")
+    return "\n".join(lines)
@@ -0,0 +1,114 @@
+"""Synthetic inputs for the benchmarks: JPEG sets, COLMAP models, Gaussian PLYs and tool logs.
+
+Everything is generated from a seed, so two runs at the same scale time identical work.
+"""
+from __future__ import annotations
+
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from src.convert import colmap_model, gaussian_ply
+
+
+def make_jpeg_set(out_dir: str, count: int, size: Tuple[int, int], seed: int = 0, quality: int = 90) -> List[str]:
+    """Write count JPEGs of size (w, h) with smooth gradients plus noise, so they compress like photos."""
+    from PIL import Image
+
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    w, h = size
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    paths = []
+    for i in range(count):
+        phase = rng.uniform(0, 2 * np.pi, 3)
+        base = np.stack([127 + 100 * np.sin(xx / (40 + 10 * c) + yy / 70 + phase[c]) for c in range(3)], axis=-1)
+        noise = rng.normal(0, 12, (h, w, 3)).astype(np.float32)
+        pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+        path = os.path.join(out_dir, f"frame_{i:05d}.jpg")
+        Image.fromarray(pixels).save(path, quality=quality)
+        paths.append(path)
+    return paths
+
+
+def make_colmap_model(num_images: int, num_points: int, track_length: int = 4, seed: int = 0) -> colmap_model.SparseModel:
+    """A consistent sparse model: cameras on a circle, every point observed by track_length images."""
+    rng = np.random.default_rng(seed)
+    cameras = np.zeros(1, dtype=colmap_model.CAMERA_DTYPE)
+    params = np.zeros(colmap_model.MAX_PARAMS)
+    params[:8] = (1200.0, 1200.0, 960.0, 540.0, 0.01, -0.002, 0.0, 0.0)
+    cameras[0] = (1, colmap_model.CAMERA_MODEL_IDS["OPENCV"], 1920, 1080, 8, params)
+
+    track_length = min(track_length, num_images)
+    observers = np.stack([rng.choice(num_images, track_length, replace=False) for _ in range(num_points)]) if num_points else np.zeros((0, track_length), dtype=np.int64)
+    flat_images = observers.reshape(-1)
+    # 2D index of each observation within its image: running count per image.
+    order = np.argsort(flat_images, kind="stable")
+    per_image = np.bincount(flat_images, minlength=num_images)
+    starts = np.concatenate([[0], np.cumsum(per_image)[:-1]])
+    idx_in_image = np.empty(len(flat_images), dtype=np.int64)
+    idx_in_image[order] = np.arange(len(flat_images)) - np.repeat(starts, per_image)
+
+    tracks = np.zeros(len(flat_images), dtype=colmap_model.TRACK_DTYPE)
+    tracks["image_id"] = flat_images + 1
+    tracks["point2D_idx"] = idx_in_image
+    track_offsets = colmap_model._offsets(np.full(num_points, track_length))
+
+    points2D = np.zeros(len(flat_images), dtype=colmap_model.POINT2D_DTYPE)
+    points2D["xy"] = rng.uniform(0, 1000, (len(flat_images), 2))
+    points2D["point3D_id"] = np.repeat(np.arange(num_points), track_length)[order] + 1  # grouped by image
+
+    angles = np.linspace(0, 2 * np.pi, num_images, endpoint=False)
+    images = np.zeros(num_images, dtype=colmap_model.IMAGE_DTYPE)
+    images["image_id"] = np.arange(1, num_images + 1)
+    images["qvec"] = np.c_[np.cos(angles / 2), np.zeros(num_images), np.sin(angles / 2), np.zeros(num_images)]
+    images["tvec"] = np.c_[np.zeros(num_images), np.zeros(num_images), np.full(num_images, 5.0)]
+    images["camera_id"] = 1
+
+    points3D = np.zeros(num_points, dtype=colmap_model.POINT3D_DTYPE)
+    points3D["point3D_id"] = np.arange(1, num_points + 1)
+    points3D["xyz"] = rng.normal(0, 2, (num_points, 3))
+    points3D["rgb"] = rng.integers(0, 256, (num_points, 3))
+    points3D["error"] = rng.uniform(0.2, 1.5, num_points)
+    return colmap_model.SparseModel(
+        cameras, images, [f"frame_{i:05d}.jpg" for i in range(num_images)], points2D,
+        colmap_model._offsets(per_image), points3D, tracks, track_offsets,
+    )
+
+
+def make_gaussian_ply(path: str, count: int, sh_degree: int = 3, seed: int = 0, chunk_size: int = gaussian_ply.CHUNK_SIZE) -> str:
+    """Write a trained-looking point cloud of count Gaussians straight into a memmap, chunk by chunk."""
+    dtype = gaussian_ply.gaussian_dtype(sh_degree)
+    out = gaussian_ply.create_gaussians(path, dtype, count)
+    rng = np.random.default_rng(seed)
+    for s in range(0, count, chunk_size):
+        n = min(chunk_size, count - s)
+        block = np.zeros(n, dtype=dtype)
+        for name in dtype.names:
+            block[name] = rng.normal(0, 0.3, n)
+        for axis in "xyz":
+            block[axis] = rng.normal(0, 3, n)
+        block["opacity"] = rng.normal(0, 3, n)
+        for i in range(3):
+            block[f"scale_{i}"] = rng.normal(-4.5, 1.0, n)
+        block["rot_0"] += 1.0
+        out[s : s + n] = block
+    if count:
+        out.flush()
+    del out
+    return path
+
+
+def make_tool_log(num_images: int, iterations: int) -> bytes:
+    """COLMAP plus train.py output of a run this size, with tqdm's carriage-return updates."""
+    lines = [f"Processed file [{i}/{num_images}]\n  Name: frame_{i:05d}.jpg\n  Features: 8192\n" for i in range(1, num_images + 1)]
+    lines += [f"Matching image [{i}/{num_images}] in 0.120s\n" for i in range(1, num_images + 1)]
+    lines += [f"Registering image #{i} ({i})\n  => Image sees 812 / 4711 points\n" for i in range(1, num_images + 1)]
+    lines += [f"Undistorting image [{i}/{num_images}]\n" for i in range(1, num_images + 1)]
+    step = 10
+    for it in range(step, iterations + 1, step):
+        lines.append(f"Training progress: {it * 100 // iterations}%|#| {it}/{iterations} [00:{it % 60:02d}<01:00, 95.12it/s, Loss=0.0412345, Depth Loss=0.0000000]\r")
+        if it % 7000 == 0:
+            lines.append(f"\n[ITER {it}] Evaluating test: L1 0.0312 PSNR 27.41 [01/01 12:00:00]\n[ITER {it}] Saving Gaussians\n")
+    return "".join(lines).encode()
@@ -1,18 +1,34 @@
-from PIL import Image
+#!/usr/bin/env python
+"""Downsize scene JPGs into the COLMAP input folder (scenes/<scene>/images -> scenes/<scene>/input).
+
+Thin CLI over src.ingest.ingest_images.
+"""
+import argparse
 import os
+import sys
+
+# Ensure project root is on sys.path
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.ingest import ingest_images
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--scene", default="6th-Forrest", help="Scene name under scenes/<name>")
+    p.add_argument("--src", help="Source folder (default: scenes/<scene>/images)")
+    p.add_argument("--dst", help="Destination folder (default: scenes/<scene>/input)")
+    p.add_argument("--max_size", type=int, default=1600)
+    p.add_argument("--quality", type=int, default=90)
+    p.add_argument("--workers", "-j", type=int, default=None)
+    args = p.parse_args()
+
+    src = args.src or os.path.join("scenes", args.scene, "images")
+    dst = args.dst or os.path.join("scenes", args.scene, "input")
+    ingest_images(src, dst, max_size=args.max_size, quality=args.quality, workers=args.workers)
+
 
-src = 'scenes/6th-Forrest/images'
-dst = 'scenes/6th-Forrest/input'
-os.makedirs(dst, exist_ok=True)
-
-files = sorted([f for f in os.listdir(src) if f.lower().endswith('.jpg')])
-print('Found', len(files), 'jpg files')
-for i,f in enumerate(files,1):
-    p = os.path.join(src,f)
-    img = Image.open(p)
-    img.thumbnail((1600,1600))
-    outp = os.path.join(dst,f)
-    img.save(outp, 'JPEG', quality=90)
-    if i%50==0:
-        print('Processed',i)
-print('Done')
+if __name__ == "__main__":
+    main()
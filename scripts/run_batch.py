@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""Run the pipeline over many scenes with separate CPU (COLMAP) and GPU (training) slots.
+
+Examples:
+    python scripts/run_batch.py --scenes garden kitchen
+    python scripts/run_batch.py --scenes-dir D:\\captures --cpu-slots 2 --gpu-slots 1
+    python scripts/run_batch.py --scenes garden kitchen --sync-dest /content/drive/MyDrive/splats
+"""
+import argparse
+import os
+import sys
+
+# Ensure project root is on sys.path
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from src.batch import DEFAULT_STATE_FILE, BatchRunner, discover_scenes
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--scenes", nargs="*", default=[], help="Existing scene names under scenes/<name>/images")
+    p.add_argument("--scenes-dir", dest="scenes_dir", help="Folder with one sub-folder of images per scene")
+    p.add_argument("--cpu-slots", dest="cpu_slots", type=int, default=1)
+    p.add_argument("--gpu-slots", dest="gpu_slots", type=int, default=1)
+    p.add_argument("--iterations", type=int, default=30000)
+    p.add_argument("--aabb_scale", type=int, default=16)
+    p.add_argument("--no_gpu_colmap", action="store_true", help="Run COLMAP CPU-only so it never competes with training for the GPU")
+    p.add_argument("--state", default=DEFAULT_STATE_FILE, help="Job state file (default: scenes/.batch_state.json)")
+    p.add_argument("--retry-failed", dest="retry_failed", action="store_true")
+    p.add_argument("--sync-dest", dest="sync_dest", help="After training, upload each scene's changed outputs here (directory or backend URL); uploads overlap the next scene's training")
+    args = p.parse_args()
+
+    jobs = [{"scene": s} for s in args.scenes]
+    if args.scenes_dir:
+        jobs += discover_scenes(args.scenes_dir)
+    if not jobs:
+        p.error("no scenes given (use --scenes and/or --scenes-dir)")
+
+    runner = BatchRunner(
+        jobs,
+        state_file=args.state,
+        slots={"cpu": args.cpu_slots, "gpu": args.gpu_slots},
+        params={"iterations": args.iterations, "aabb_scale": args.aabb_scale, "use_gpu": not args.no_gpu_colmap},
+        sync_dest=args.sync_dest,
+    )
+    results = runner.run(retry_failed=args.retry_failed)
+    for scene, status in results.items():
+        print(f"{scene}: {status}")
+    if any(status != "done" for status in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,8 +18,10 @@ if REPO_ROOT not in sys.path:
         sys.path.insert(0, REPO_ROOT)
 
 from src.core import env
-from src import colmap as colmap_mod
-from src import training as training_mod
+from src.core.lazy import lazy_import
+
+colmap_mod = lazy_import("src.colmap")
+training_mod = lazy_import("src.training")
 
 
 def check_python():
@@ -27,8 +29,14 @@ def check_python():
     print(f"Python: {info['executable']} ({info['version'].splitlines()[0]})")
 
 
-def check_torch():
-    info = env.get_torch_info()
+def check_torch(refresh: bool = False, timeout: float = env.PROBE_TIMEOUT):
+    report = env.cached_env_report(refresh=refresh, timeout=timeout)
+    info = report["torch"]
+    if report.get("cached"):
+        print("torch info cached (use --refresh-env to probe again)")
+    if info.get("probe_error"):
+        print("torch check failed:", info["probe_error"])
+        return
     if not info.get("installed"):
         print("torch not installed")
         return
@@ -84,10 +92,43 @@ def main():
     p.add_argument("--check", action="store_true", help="Run environment checks only")
     p.add_argument("--scene", type=str, default="myscene", help="Scene name under scenes/<name>/images")
     p.add_argument("--run", action="store_true", help="Run the standard pipeline (colmap conversion + train) if scripts are present")
+    p.add_argument("--force", action="store_true", help="Rerun every stage even if the stage cache says it is up to date")
+    p.add_argument("--from-stage", dest="from_stage", choices=["colmap", "cleanup", "training"], help="Rerun this stage and everything after it")
+    p.add_argument("--no-sparse-cleanup", dest="no_sparse_cleanup", action="store_true", help="Train from COLMAP's points as they are (no track/error/outlier filtering)")
+    p.add_argument("--sparse-voxel", dest="sparse_voxel", type=float, default=0.0, help="Also keep at most one sparse point per voxel of this size (scene units) before training")
+    p.add_argument("--matcher", default="auto", choices=["auto", "exhaustive", "sequential", "custom", "convert"], help="COLMAP matching strategy (auto picks by image count and EXIF time/GPS)")
+    p.add_argument("--reduce-images", dest="reduce_images", action="store_true", help="Drop blurred and near-duplicate images before COLMAP")
+    p.add_argument("--target-count", dest="target_count", type=int, help="Thin the image set to at most this many images before COLMAP")
+    p.add_argument("--export", type=str, default="", help="After training, write compact copies of the splat, e.g. splat,compressed_ply (also ply, or half_ply: float16, readable by this repo only)")
+    p.add_argument("--tiles", action="store_true", help="After training, build octree LOD tiles (tiles.bin + tiles.json) for streaming viewers")
+    p.add_argument("--pyramid", action="store_true", help="After COLMAP, write images_2/4/8 downscaled copies (decoded once per image, in parallel)")
+    p.add_argument("--shards", default="", choices=["", "encoded", "raw"], help="After COLMAP, pack the training images into a few large shard files (file bytes or decoded arrays), bulk-copy them to local disk and train from there")
+    p.add_argument("--shard-resolution", dest="shard_resolution", type=int, default=1, help="Downscale factor of the packed images (uses images_<N> from --pyramid when present)")
+    p.add_argument("--shards-local", dest="shards_local", help="Local folder the shards are copied to and extracted in for training (default: <tempdir>/gs_shards/<scene>)")
+    p.add_argument("--sync-dest", dest="sync_dest", help="After the run, upload the scene's changed outputs here (directory or backend URL)")
+    p.add_argument("--partition", type=int, default=0, metavar="MAX_IMAGES", help="Large scenes: split into overlapping blocks of at most this many images, run each block and merge")
+    p.add_argument("--partition-source", dest="partition_source", default="auto", choices=["auto", "sparse", "gps"], help="Camera positions for --partition: an existing sparse/0 model or EXIF GPS")
+    p.add_argument("--refresh-env", dest="refresh_env", action="store_true", help="Probe torch/CUDA again instead of using the cached environment report")
+    p.add_argument("--probe-timeout", dest="probe_timeout", type=float, default=env.PROBE_TIMEOUT, help="Seconds allowed for the out-of-process torch/CUDA probe")
     args = p.parse_args()
+    if args.partition:
+        # Blocks run only COLMAP, cleanup and training; reject the options that would otherwise be ignored.
+        ignored = [
+            flag
+            for flag, value in (
+                ("--reduce-images", args.reduce_images),
+                ("--target-count", args.target_count),
+                ("--from-stage", args.from_stage),
+                ("--pyramid", args.pyramid),
+                ("--shards", args.shards),
+            )
+            if value
+        ]
+        if ignored:
+            p.error(f"{', '.join(ignored)} cannot be combined with --partition")
 
     check_python()
-    check_torch()
+    check_torch(refresh=args.refresh_env, timeout=args.probe_timeout)
 
     if args.check:
         print("Checks complete")
@@ -101,9 +142,22 @@ def main():
     if args.run:
         # Use the orchestrator for the full pipeline. This delegates to src.* modules and the thin scripts.
         try:
-            from src.orchestrator import run_full_pipeline
-
-            run_full_pipeline(args.scene)
+            from src.convert import sparse_cleanup
+            from src.orchestrator import export_scene, run_full_pipeline, sync_scene, tile_scene
+
+            cleanup = sparse_cleanup.DISABLED if args.no_sparse_cleanup else {"voxel_size": args.sparse_voxel} if args.sparse_voxel else None
+            if args.partition:
+                from src.partition import run_partitioned
+
+                run_partitioned(args.scene, source=args.partition_source, max_images=args.partition, force=args.force, matcher=args.matcher, cleanup=cleanup)
+                if args.export:
+                    export_scene(args.scene, formats=[f for f in args.export.split(",") if f], force=args.force)
+                if args.tiles:
+                    tile_scene(args.scene, force=args.force)
+                if args.sync_dest:
+                    sync_scene(args.scene, args.sync_dest)
+                return
+            run_full_pipeline(args.scene, force=args.force, from_stage=args.from_stage, reduce_images=args.reduce_images, target_count=args.target_count, matcher=args.matcher, export_formats=[f for f in args.export.split(",") if f] or None, tiles=args.tiles, pyramid_levels=(2, 4, 8) if args.pyramid else None, shard_mode=args.shards or None, shard_resolution=args.shard_resolution, shard_local_dir=args.shards_local, cleanup=cleanup, sync_dest=args.sync_dest)
         except FileNotFoundError as e:
             print("Pipeline precondition failed:", e)
             sys.exit(5)
@@ -0,0 +1,226 @@
+"""Multi-scene batch runner on top of `src.orchestrator`.
+
+Each scene is a job made of ordered stages (optional "prepare", then "colmap", "cleanup" and "training",
+and "sync" when a sync destination is set). Every stage runs on a named resource pool ("cpu", "gpu" or
+"io" by default) with a fixed number of slots, so one scene's COLMAP work and another's upload overlap
+a third scene's training. Job progress is written to a JSON state
+file after every transition; on restart, the finished stages of an unfinished job are not rerun and
+interrupted stages are retried. Finished jobs are not trusted across runs: every `run()` walks their
+stages again and the stage cache skips what is still up to date, so new images or parameters take effect.
+A job whose parameters changed, or that runs with force, starts over from its first stage.
+A failing job is marked failed and the rest of the batch carries on.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src import orchestrator
+from src.core import profiler
+from src.core.hashing import hash_params
+
+DEFAULT_SLOTS = {"cpu": 1, "gpu": 1, "io": 1}
+# COLMAP's SIFT extraction/matching can use the GPU too; pass use_gpu=False to keep it off the training device.
+DEFAULT_STAGE_RESOURCES = {"prepare": "cpu", "colmap": "cpu", "cleanup": "cpu", "training": "gpu", "sync": "io"}
+DEFAULT_STATE_FILE = os.path.join("scenes", ".batch_state.json")
+# Job keys that override the runner's params for that job's stages.
+JOB_PARAMS = ("aabb_scale", "iterations", "use_gpu", "force", "matcher", "cleanup")
+
+StageFunc = Callable[[Dict[str, Any], str], str]
+
+
+def discover_scenes(scenes_dir: str) -> List[Dict[str, Any]]:
+    """One job per sub-folder of scenes_dir that contains files; the sub-folder name is the scene name."""
+    jobs = []
+    for name in sorted(os.listdir(scenes_dir)):
+        path = os.path.join(scenes_dir, name)
+        if os.path.isdir(path) and any(os.path.isfile(os.path.join(path, f)) for f in os.listdir(path)):
+            jobs.append({"scene": name, "src_images_dir": os.path.abspath(path)})
+    return jobs
+
+
+class BatchRunner:
+    """Schedule scene stages across resource pools and persist job state.
+
+    Args:
+        jobs: Dicts with "scene" and optionally "src_images_dir", "stages" (the stages to run, default
+            all) and per-job overrides of the run params; any change to a job's dict restarts that job
+        state_file: JSON file recording job/stage status (survives restarts)
+        slots: Concurrent stages per resource, e.g. {"cpu": 2, "gpu": 1}
+        stage_resources: Resource name for each stage
+        params: Defaults passed to `orchestrator.run_stage` (aabb_scale, iterations, use_gpu, force, matcher)
+        stage_func: Override for running a stage (job, stage) -> "ran" | "skipped"; used by tests
+        sync_dest: Upload each scene's outputs here after training (see `orchestrator.sync_scene`);
+            jobs may override it with their own "sync_dest"
+    """
+
+    def __init__(
+        self,
+        jobs: List[Dict[str, Any]],
+        state_file: str = DEFAULT_STATE_FILE,
+        slots: Optional[Dict[str, int]] = None,
+        stage_resources: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        stage_func: Optional[StageFunc] = None,
+        sync_dest: Optional[str] = None,
+    ):
+        self.slots = dict(DEFAULT_SLOTS, **(slots or {}))
+        self.sync_dest = sync_dest
+        self.stage_resources = dict(DEFAULT_STAGE_RESOURCES, **(stage_resources or {}))
+        self.params = params or {}
+        self.stage_func = stage_func or self._run_stage
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self.state: Dict[str, Dict[str, Any]] = self._load_state()
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        for job in jobs:
+            scene = job["scene"]
+            self.jobs[scene] = job
+            stages = list(
+                job.get("stages")
+                or (["prepare"] if job.get("src_images_dir") else [])
+                + list(orchestrator.STAGES)
+                + (["sync"] if job.get("sync_dest") or sync_dest else [])
+            )
+            rec = self.state.setdefault(scene, {"status": "pending", "stages": {}})
+            rec["order"] = stages
+            params = self.stage_params(job)
+            key = hash_params(dict(job, **params, stages=stages))
+            if params.get("force") or rec.get("params") != key:
+                # Results recorded under other parameters (or a forced rerun) say nothing about this run.
+                rec["stages"], rec["status"] = {}, "pending"
+            rec["params"] = key
+            for stage in stages:
+                rec["stages"].setdefault(stage, {"status": "pending"})
+            if rec["status"] == "running":
+                rec["status"] = "pending"
+        for rec in self.state.values():
+            for stage_rec in rec["stages"].values():
+                if stage_rec["status"] == "running":
+                    # Interrupted by a crash/restart: run it again (the stage cache skips finished work).
+                    stage_rec["status"] = "pending"
+        for resource in set(self.stage_resources.values()):
+            if self.slots.get(resource, 0) < 1:
+                raise ValueError(f"Resource {resource!r} needs at least one slot")
+        self._save()
+
+    # -- state -------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.isfile(self.state_file):
+            return {}
+        with open(self.state_file, "r", encoding="utf-8") as f:
+            return json.load(f).get("jobs", {})
+
+    def _save(self) -> None:
+        with self._lock:
+            folder = os.path.dirname(self.state_file)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "jobs": self.state}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.state_file)
+
+    def stage_params(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Keyword arguments for `orchestrator.run_stage`: the runner's params with the job's overrides."""
+        params = dict(self.params)
+        params.update({k: v for k, v in job.items() if k in JOB_PARAMS})
+        return params
+
+    def _next_stage(self, scene: str) -> Optional[str]:
+        rec = self.state[scene]
+        for stage in rec["order"]:
+            if rec["stages"][stage]["status"] != "done":
+                return stage
+        return None
+
+    # -- execution ---------------------------------------------------------
+
+    def _run_stage(self, job: Dict[str, Any], stage: str) -> str:
+        # One trace per stage. Samples cover the whole process tree, so concurrent stages' RSS/CPU overlap.
+        prof = profiler.Profiler(job["scene"])
+        try:
+            with prof.span(stage):
+                if stage == "prepare":
+                    orchestrator.prepare_scene_from_dir(job["src_images_dir"], job["scene"])
+                    return "ran"
+                if stage == "sync":
+                    report = orchestrator.sync_scene(job["scene"], job.get("sync_dest") or self.sync_dest)
+                    if report["failed"]:
+                        raise RuntimeError(f"{len(report['failed'])} files failed to upload: {', '.join(sorted(report['failed']))}")
+                    return "ran" if report["uploaded"] or report["deleted"] else "skipped"
+                return orchestrator.run_stage(job["scene"], stage, **self.stage_params(job))
+        finally:
+            prof.save_to_scene(os.path.abspath(os.path.join("scenes", job["scene"])), label=stage)
+
+    def run(self, retry_failed: bool = False) -> Dict[str, str]:
+        """Run every job to completion or failure. Returns {scene: "done" | "failed"}."""
+        for scene in self.jobs:
+            rec = self.state[scene]
+            if rec["status"] == "done":
+                # Walk the stages again; run_stage skips those whose stage cache is still fresh.
+                rec["status"] = "pending"
+                for stage_rec in rec["stages"].values():
+                    stage_rec["status"] = "pending"
+            if rec["status"] == "failed" and retry_failed:
+                rec["status"] = "pending"
+                for stage_rec in rec["stages"].values():
+                    if stage_rec["status"] == "failed":
+                        stage_rec["status"] = "pending"
+        self._save()
+
+        busy = {resource: 0 for resource in self.slots}
+        running: Dict[Future, Tuple[str, str, str]] = {}
+        active = set()
+        with ThreadPoolExecutor(max_workers=sum(self.slots.values())) as pool:
+            while True:
+                # Start every ready stage whose resource has a free slot, in job order.
+                for scene in self.jobs:
+                    rec = self.state[scene]
+                    if scene in active or rec["status"] in ("done", "failed"):
+                        continue
+                    stage = self._next_stage(scene)
+                    if stage is None:
+                        rec["status"] = "done"
+                        self._save()
+                        continue
+                    resource = self.stage_resources.get(stage, "cpu")
+                    if busy[resource] >= self.slots[resource]:
+                        continue
+                    busy[resource] += 1
+                    active.add(scene)
+                    rec["status"] = "running"
+                    rec["stages"][stage] = {"status": "running", "started_at": time.time()}
+                    self._save()
+                    print(f"[batch] {scene}: starting {stage} on {resource}")
+                    running[pool.submit(self.stage_func, self.jobs[scene], stage)] = (scene, stage, resource)
+                if not running:
+                    break
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    scene, stage, resource = running.pop(fut)
+                    busy[resource] -= 1
+                    active.discard(scene)
+                    rec = self.state[scene]
+                    stage_rec = rec["stages"][stage]
+                    stage_rec["finished_at"] = time.time()
+                    stage_rec["seconds"] = stage_rec["finished_at"] - stage_rec.get("started_at", stage_rec["finished_at"])
+                    try:
+                        stage_rec["result"] = fut.result()
+                        stage_rec["status"] = "done"
+                        rec["status"] = "pending"
+                        print(f"[batch] {scene}: {stage} {stage_rec['result']} ({stage_rec['seconds']:.1f}s)")
+                    except Exception as e:
+                        stage_rec["status"] = "failed"
+                        stage_rec["error"] = f"{type(e).__name__}: {e}"
+                        stage_rec["traceback"] = traceback.format_exc(limit=5)
+                        rec["status"] = "failed"
+                        print(f"[batch] {scene}: {stage} FAILED: {stage_rec['error']}")
+                    self._save()
+        return {scene: self.state[scene]["status"] for scene in self.jobs}
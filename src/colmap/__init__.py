@@ -2,49 +2,107 @@
 
 These wrappers prefer calling local scripts (e.g., `scripts/run-colmap.py`) if present.
 They keep the pipeline callable from Python so notebook code can be migrated into `src/`.
+
+`run_colmap` builds the COLMAP command sequence itself (feature extraction, matching, mapping,
+undistortion) with the same scene layout as gaussian-splatting's convert.py, choosing the matcher
+per scene via `src.colmap.matching`. Each stage is checkpointed, so a failure or crash late in a long
+reconstruction resumes at the failing stage. matcher="convert" delegates to convert.py as before.
 """
 from __future__ import annotations
 
+import json
 import os
 import shutil
 import subprocess
 import sys
-from typing import Optional
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from src.core import hashing, linking, logstream, paths
+from src.core.lazy import lazy_import
 
-def run_colmap(input_path: str, output_path: str, aabb_scale: int = 16, wrapper_script: Optional[str] = None, use_gpu: bool = True) -> None:
-    """Run COLMAP reconstruction following the gaussian-splatting workflow.
+matching = lazy_import("src.colmap.matching")  # NumPy/Pillow, only needed once COLMAP actually runs
+process = lazy_import("src.core.process")
 
-    Uses the external/gaussian-splatting/convert.py script for proper COLMAP processing.
-    This function raises CalledProcessError if the invoked process fails.
-    
-    Args:
-        input_path: Path to folder containing input images
-        output_path: Scene root path (will contain input/, sparse/, etc.)
-        aabb_scale: Axis-aligned bounding box scale (not used by convert.py)
-        wrapper_script: Deprecated, kept for compatibility
-        use_gpu: Whether to use GPU for COLMAP operations (default: True)
+
+# Output signatures of a missing/broken OpenGL context; seeing one triggers the CPU-only retry.
+OPENGL_ERRORS = ["could not create OpenGL context", "Check failed: context_.create()", "could not connect to display", "QXcbConnection"]
+
+
+def colmap_command() -> List[str]:
+    """Command prefix for the COLMAP CLI: $COLMAP_EXECUTABLE, else `colmap` on PATH.
+
+    A `.py` executable (wrapper or test stub) is launched with the current interpreter.
     """
-    # Use the external gaussian-splatting convert.py script
-    # In Docker, it's at /home/appuser/gaussian-splatting
-    # Locally, it's at project_root/external/gaussian-splatting
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    
-    # Try Docker location first
-    convert_script = "/home/appuser/gaussian-splatting/convert.py"
-    if not os.path.isfile(convert_script):
-        # Fall back to local location
-        convert_script = os.path.join(project_root, "external", "gaussian-splatting", "convert.py")
-    
-    if not os.path.isfile(convert_script):
-        raise FileNotFoundError(f"COLMAP convert script not found. Tried:\n"
-                                f"  - /home/appuser/gaussian-splatting/convert.py (Docker)\n"
-                                f"  - {os.path.join(project_root, 'external', 'gaussian-splatting', 'convert.py')} (local)")
-    
-    # The convert.py script expects images in source_path/input/
-    # We need to prepare the directory structure
+    exe = os.environ.get("COLMAP_EXECUTABLE") or shutil.which("colmap") or "colmap"
+    if exe.endswith(".py"):
+        return [sys.executable, exe]
+    return [exe]
+
+
+def build_commands(
+    scene_path: str,
+    plan: Dict[str, Any],
+    use_gpu: bool = True,
+    camera_model: str = "OPENCV",
+    match_list_path: Optional[str] = None,
+) -> List[Tuple[str, List[str]]]:
+    """Return [(stage, argv), ...] reproducing convert.py's layout with the planned matcher.
+
+    Layout: input/ (images), distorted/database.db, distorted/sparse/0, then undistorted images/ + sparse/.
+    """
+    colmap = colmap_command()
+    gpu = "1" if use_gpu else "0"
+    input_dir = os.path.join(scene_path, "input")
+    distorted = os.path.join(scene_path, "distorted")
+    db = os.path.join(distorted, "database.db")
+
+    cmds: List[Tuple[str, List[str]]] = [
+        ("feature_extractor", colmap + [
+            "feature_extractor", "--database_path", db, "--image_path", input_dir,
+            "--ImageReader.single_camera", "1", "--ImageReader.camera_model", camera_model,
+            "--SiftExtraction.use_gpu", gpu,
+        ]),
+    ]
+    kind = plan["matcher"]
+    if kind == "exhaustive":
+        match = ["exhaustive_matcher", "--database_path", db]
+    elif kind == "sequential":
+        match = ["sequential_matcher", "--database_path", db, "--SequentialMatching.overlap", str(plan.get("overlap", matching.SEQUENTIAL_OVERLAP))]
+    elif kind == "custom":
+        if not match_list_path:
+            raise ValueError("custom matching needs match_list_path")
+        match = ["matches_importer", "--database_path", db, "--match_list_path", match_list_path, "--match_type", "pairs"]
+    else:
+        raise ValueError(f"Unknown matcher {kind!r}")
+    cmds.append(("matcher", colmap + match + ["--SiftMatching.use_gpu", gpu]))
+    cmds.append(("mapper", colmap + [
+        "mapper", "--database_path", db, "--image_path", input_dir,
+        "--output_path", os.path.join(distorted, "sparse"), "--Mapper.ba_global_function_tolerance=0.000001",
+    ]))
+    cmds.append(("image_undistorter", colmap + [
+        "image_undistorter", "--image_path", input_dir, "--input_path", os.path.join(distorted, "sparse", "0"),
+        "--output_path", scene_path, "--output_type", "COLMAP",
+    ]))
+    return cmds
+
+
+def finalize_sparse(scene_path: str) -> None:
+    """Move the undistorter's sparse/*.bin into sparse/0, where training expects the model."""
+    sparse = os.path.join(scene_path, "sparse")
+    target = os.path.join(sparse, "0")
+    os.makedirs(target, exist_ok=True)
+    for fname in os.listdir(sparse):
+        if fname == "0":
+            continue
+        # os.replace so a rerun overwrites the model left by an earlier one
+        os.replace(os.path.join(sparse, fname), os.path.join(target, fname))
+
+
+def _prepare_input(input_path: str, output_path: str) -> str:
+    # COLMAP (and convert.py) expect images in <scene>/input/
     input_dir = os.path.join(output_path, "input")
-    
+
     # If input_path has images but input_dir doesn't, copy or symlink
     if os.path.exists(input_path) and input_path != input_dir:
         if not os.path.exists(input_dir):
@@ -53,64 +111,239 @@ def run_colmap(input_path: str, output_path: str, aabb_scale: int = 16, wrapper_
                 # Try symbolic link first (requires admin on Windows or dev mode)
                 os.symlink(input_path, input_dir, target_is_directory=True)
             except (OSError, NotImplementedError):
-                # Fall back to copying files
-                print(f"Symlink failed, copying images instead...")
-                shutil.copytree(input_path, input_dir)
+                # Fall back to per-file reflink/hardlink/copy
+                report = linking.link_tree(input_path, input_dir, mode="auto")
+                print(f"Symlink failed, placed images via {report['mode']} ({report['bytes_moved'] / 1e6:.1f} MB moved)")
         else:
             # input/ already exists, assume it's set up correctly
             pass
+    return input_dir
+
+
+STAGE_MARKERS = "colmap_stages.json"
+# Stages whose command takes a GPU switch; only these are retried on the CPU after an OpenGL error.
+GPU_FLAGS = ("--SiftExtraction.use_gpu", "--SiftMatching.use_gpu")
+
+
+def load_stage_markers(scene_path: str) -> Dict[str, Dict[str, Any]]:
+    """Per-stage completion records from <scene>/distorted/colmap_stages.json ({} if none)."""
+    path = os.path.join(scene_path, "distorted", STAGE_MARKERS)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("stages", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_stage_markers(scene_path: str, markers: Dict[str, Dict[str, Any]]) -> None:
+    path = os.path.join(scene_path, "distorted", STAGE_MARKERS)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "stages": markers}, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _tree_stat(folder: str) -> List[Tuple[str, int, int]]:
+    out = []
+    for root, _, files in os.walk(folder, followlinks=True):
+        for fname in sorted(files):
+            st = os.stat(os.path.join(root, fname))
+            out.append((os.path.relpath(os.path.join(root, fname), folder), st.st_size, st.st_mtime_ns))
+    return sorted(out)
+
+
+def input_signature(input_dir: str) -> str:
+    """Digest of the input images' names, sizes and mtimes."""
+    return hashing.hash_params({"images": _tree_stat(input_dir)})
+
+
+def recorded_inputs(markers: Dict[str, Dict[str, Any]], current: str) -> Optional[str]:
+    """The input signature feature_extractor ran on, when images/ has since been rewritten by the undistorter.
+
+    input/ is a link to images/, which image_undistorter overwrites, so after it has started (or finished,
+    as long as nothing changed the images since) the current files no longer say what COLMAP was run on.
+    Returns None when the current signature should be used.
+    """
+    extracted = markers.get("feature_extractor", {})
+    undistort = markers.get("image_undistorter")
+    if extracted.get("status") != "done" or not extracted.get("inputs") or not undistort:
+        return None
+    if undistort.get("status") == "done" and undistort.get("images_after") != current:
+        return None
+    return extracted["inputs"]
+
+
+def stage_signatures(commands: List[Tuple[str, List[str]]], inputs: str, match_list_path: Optional[str] = None) -> Dict[str, str]:
+    """Chained digest per stage: its arguments (GPU switches excluded) plus every earlier stage's digest.
+
+    The first stage also covers the input images (`input_signature`), the matcher the pair list, so a
+    change anywhere invalidates that stage and everything after it.
+    """
+    prefix = len(colmap_command())
+    prev = inputs
+    sigs = {}
+    for stage, argv in commands:
+        args = list(argv[prefix:])
+        for flag in GPU_FLAGS:
+            if flag in args:
+                del args[args.index(flag) : args.index(flag) + 2]
+        extra = hashing.hash_file(match_list_path) if stage == "matcher" and match_list_path and os.path.isfile(match_list_path) else ""
+        prev = sigs[stage] = hashing.hash_params({"prev": prev, "args": args, "extra": extra})
+    return sigs
+
+
+def _clean_stage_outputs(scene_path: str, stage: str, resumable: bool) -> None:
+    """Remove a stage's stale outputs before it runs.
+
+    feature_extractor keeps its database when resuming the same stage (COLMAP skips images it already
+    extracted); the mapper always starts from an empty sparse folder so no partial model survives.
+    """
+    distorted = os.path.join(scene_path, "distorted")
+    if stage == "feature_extractor" and not resumable:
+        db = os.path.join(distorted, "database.db")
+        for path in (db, db + "-wal", db + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+    elif stage == "mapper":
+        sparse = os.path.join(distorted, "sparse")
+        shutil.rmtree(sparse, ignore_errors=True)
+        os.makedirs(sparse, exist_ok=True)
+
+
+def run_colmap(
+    input_path: str,
+    output_path: str,
+    aabb_scale: int = 16,
+    wrapper_script: Optional[str] = None,
+    use_gpu: bool = True,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    matcher: str = "auto",
+    camera_model: str = "OPENCV",
+    resume: bool = True,
+    timeout: Optional[float] = None,
+) -> None:
+    """Run COLMAP reconstruction following the gaussian-splatting workflow.
+
+    Runs feature_extractor, the planned matcher, mapper and image_undistorter directly, producing the
+    same layout as external/gaussian-splatting/convert.py (use matcher="convert" to call that script).
+    Each finished stage is recorded in distorted/colmap_stages.json; a rerun with resume=True skips
+    stages whose arguments and upstream inputs are unchanged. A stage that fails with an OpenGL
+    context error is retried once on the CPU, and later stages then stay on the CPU.
+    This function raises CalledProcessError if the invoked process fails.
     
-    # Run the COLMAP convert script with GPU optimization
-    cmd = [sys.executable, convert_script, "--source_path", output_path]
-    if not use_gpu:
-        cmd.append("--no_gpu")
-    
-    gpu_status = "enabled" if use_gpu else "disabled"
-    print(f"Running COLMAP reconstruction (GPU {gpu_status}):", " ".join(cmd))
+    Args:
+        input_path: Path to folder containing input images
+        output_path: Scene root path (will contain input/, sparse/, etc.)
+        aabb_scale: Axis-aligned bounding box scale (not used by convert.py)
+        wrapper_script: Deprecated, kept for compatibility
+        use_gpu: Whether to use GPU for COLMAP operations (default: True)
+        on_event: Optional callback receiving structured progress events parsed from COLMAP output
+        matcher: "auto" (by image count and EXIF time/GPS), "exhaustive", "sequential", "custom" or "convert"
+        camera_model: COLMAP camera model for the shared camera (default: OPENCV, as convert.py)
+        resume: Skip stages completed by an earlier run (default: True); False reruns every stage
+        timeout: Seconds allowed per COLMAP command; the process group is then stopped and
+            subprocess.TimeoutExpired raised (the stage stays unfinished and resumes next time)
+    """
+    input_dir = _prepare_input(input_path, output_path)
 
     # Ensure logs directory exists under the scene output path
     logs_dir = os.path.join(output_path, "logs")
     os.makedirs(logs_dir, exist_ok=True)
     colmap_log = os.path.join(logs_dir, "colmap.log")
 
-    # Helper to run and capture output to a log file. Returns (rc, output_text)
+    # Stream output to the log file; only a bounded tail and the retry signatures are kept in memory.
     def _run_and_log(command, logfile_path):
-        with open(logfile_path, "ab") as lf:
-            lf.write(("\n--- Running: " + " ".join(command) + "\n").encode())
-            proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=os.environ)
-            out_chunks = []
-            for chunk in proc.stdout:
-                lf.write(chunk)
-                out_chunks.append(chunk)
-            proc.wait()
-            return proc.returncode, b"".join(out_chunks).decode(errors='replace')
-
-    # First attempt: as requested (GPU if enabled)
-    rc, out = _run_and_log(cmd, colmap_log)
-
-    # Detect OpenGL context failure patterns and retry with CPU-only mode once
-    opengl_errors = ["could not create OpenGL context", "Check failed: context_.create()", "could not connect to display", "QXcbConnection"]
-    need_retry = False
-    lowered = out.lower()
-    for pat in opengl_errors:
-        if pat.lower() in lowered:
-            need_retry = True
-            break
+        processor = logstream.LogProcessor(patterns=OPENGL_ERRORS, parsers=[logstream.colmap_progress_parser], on_event=on_event)
+        result = process.run(command, logfile_path=logfile_path, processor=processor, timeout=timeout)
+        if result.timed_out:
+            print(f"COLMAP command timed out after {timeout}s (sent {', '.join(result.signals)}). Last output:\n" + processor.tail_text(20))
+            result.check_returncode()
+        return result.returncode, processor
+
+    if matcher == "convert":
+        _run_convert_script(output_path, use_gpu, colmap_log, _run_and_log)
+        return
 
-    if rc != 0 and need_retry and use_gpu:
-        print("Detected OpenGL / GPU context issue in COLMAP. Retrying feature extraction with CPU-only mode (--no_gpu). See logs at:", colmap_log)
-        # append --no_gpu and run again
-        cmd_cpu = [sys.executable, convert_script, "--source_path", output_path, "--no_gpu"]
-        rc2, out2 = _run_and_log(cmd_cpu, colmap_log)
-        if rc2 != 0:
-            print("COLMAP CPU retry also failed. Check log:", colmap_log)
-            raise subprocess.CalledProcessError(rc2, cmd_cpu)
+    os.makedirs(os.path.join(output_path, "distorted", "sparse"), exist_ok=True)
+    markers = load_stage_markers(output_path) if resume else {}
+    current_inputs = input_signature(input_dir)
+    inputs = recorded_inputs(markers, current_inputs)
+    match_list_path = os.path.join(output_path, "distorted", "match_list.txt")
+    recorded = markers.get("feature_extractor", {}).get("plan") if inputs else None
+    if recorded and recorded.get("requested") == matcher and (recorded["matcher"] != "custom" or os.path.isfile(match_list_path)):
+        # The undistorted images lost the EXIF the plan was made from; keep the plan of the run being resumed.
+        plan = {k: v for k, v in recorded.items() if k != "requested"}
+        match_list = match_list_path if plan["matcher"] == "custom" else None
+        print(f"Resuming COLMAP on the images feature_extractor saw; matching plan: {plan['matcher']} ({plan['reason']})")
+    else:
+        inputs = current_inputs
+        plan = matching.plan_matching(input_dir, matcher)
+        match_list = None
+        if plan["matcher"] == "custom":
+            match_list = matching.write_match_list(plan["pairs"], match_list_path)
+            print(f"Matching plan: custom pairs ({len(plan['pairs'])} pairs; {plan['reason']}) -> {match_list}")
         else:
-            print("COLMAP completed with CPU-only mode. Proceeding.")
-            return
+            print(f"Matching plan: {plan['matcher']} ({plan['reason']})")
+
+    commands = build_commands(output_path, plan, camera_model=camera_model, match_list_path=match_list)
+    signatures = stage_signatures(commands, inputs, match_list)
+    gpu = use_gpu
+    for stage, _ in commands:
+        rec = markers.get(stage, {})
+        if rec.get("status") == "done" and rec.get("signature") == signatures[stage]:
+            print(f"COLMAP {stage} already complete; skipping.")
+            continue
+        _clean_stage_outputs(output_path, stage, resumable=rec.get("signature") == signatures[stage])
+        markers[stage] = {"status": "running", "signature": signatures[stage], "started_at": time.time()}
+        _save_stage_markers(output_path, markers)
+
+        attempts = [gpu, False] if gpu else [False]
+        for attempt, attempt_gpu in enumerate(attempts):
+            command = dict(build_commands(output_path, plan, use_gpu=attempt_gpu, camera_model=camera_model, match_list_path=match_list))[stage]
+            print(f"Running COLMAP {stage} (GPU {'enabled' if attempt_gpu else 'disabled'}):", " ".join(command))
+            rc, proc_log = _run_and_log(command, colmap_log)
+            if rc == 0:
+                break
+            # Only an OpenGL context failure in a GPU-capable stage is worth a CPU retry.
+            if attempt == 0 and attempt_gpu and proc_log.matched and any(flag in command for flag in GPU_FLAGS):
+                print(f"Detected OpenGL / GPU context issue in COLMAP {stage}. Retrying this stage with CPU-only mode. See logs at:", colmap_log)
+                gpu = False
+                continue
+            break
+        if rc != 0:
+            markers[stage].update(status="failed", returncode=rc, finished_at=time.time())
+            _save_stage_markers(output_path, markers)
+            print(f"COLMAP {stage} failed. Last output:\n" + proc_log.tail_text(20))
+            print("See log:", colmap_log)
+            raise subprocess.CalledProcessError(rc, command)
+        if stage == "feature_extractor":
+            # Kept so a run interrupted after the undistorter has rewritten images/ can still resume.
+            markers[stage].update(inputs=inputs, plan=dict({k: v for k, v in plan.items() if k != "pairs"}, requested=matcher))
+        if stage == "image_undistorter":
+            finalize_sparse(output_path)
+            markers[stage]["images_after"] = input_signature(input_dir)
+        markers[stage].update(status="done", gpu=attempt_gpu, finished_at=time.time())
+        _save_stage_markers(output_path, markers)
+    print("COLMAP completed successfully. Log:", colmap_log)
+
 
+def _run_convert_script(output_path: str, use_gpu: bool, colmap_log: str, run_and_log: Callable) -> None:
+    """Legacy path: delegate the whole reconstruction to gaussian-splatting's convert.py."""
+    # $GAUSSIAN_SPLATTING_DIR, then /home/appuser/gaussian-splatting in Docker, then external/gaussian-splatting
+    convert_script = paths.find_gs_script("convert.py", "COLMAP convert script")
+    cmd = [sys.executable, convert_script, "--source_path", output_path]
+    if not use_gpu:
+        cmd.append("--no_gpu")
+    print(f"Running COLMAP reconstruction via convert.py (GPU {'enabled' if use_gpu else 'disabled'}):", " ".join(cmd))
+    rc, proc_log = run_and_log(cmd, colmap_log)
+    if rc != 0 and proc_log.matched and use_gpu:
+        print("Detected OpenGL / GPU context issue in COLMAP. Retrying with --no_gpu. See logs at:", colmap_log)
+        cmd = cmd + ["--no_gpu"]
+        rc, proc_log = run_and_log(cmd, colmap_log)
     if rc != 0:
-        print("COLMAP failed. See log:", colmap_log)
+        print("COLMAP failed. Last output:\n" + proc_log.tail_text(20))
+        print("See log:", colmap_log)
         raise subprocess.CalledProcessError(rc, cmd)
-    else:
-        print("COLMAP completed successfully. Log:", colmap_log)
+    print("COLMAP completed successfully. Log:", colmap_log)
@@ -0,0 +1,185 @@
+"""Matcher selection and pair-list generation for COLMAP.
+
+Exhaustive matching costs O(n^2) image pairs: fine for a hundred photos, ruinous for thousands.
+`plan_matching` looks at the image count and at the EXIF capture time / GPS position of each
+image and picks:
+
+* "exhaustive" for small sets (<= exhaustive_max images)
+* "custom" (matches_importer with a generated match_list.txt) when GPS or timestamps are available:
+  each image is paired with its k nearest neighbours in space and/or time
+* "sequential" otherwise, relying on filename order (video frames, numbered burst shots)
+"""
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.ingest import list_images
+
+MATCHERS = ("auto", "exhaustive", "sequential", "custom")
+EXHAUSTIVE_MAX = 200
+SPATIAL_K = 12
+TEMPORAL_K = 8
+SEQUENTIAL_OVERLAP = 10
+# Fraction of images that must carry GPS / timestamps before that signal is trusted.
+METADATA_COVERAGE = 0.9
+
+_EXIF_IFD = 0x8769
+_GPS_IFD = 0x8825
+_DATETIME_ORIGINAL = 36867
+_DATETIME = 306
+_EARTH_RADIUS_M = 6371000.0
+
+
+def _rational(v: Any) -> float:
+    try:
+        return float(v)
+    except TypeError:
+        num, den = v
+        return float(num) / float(den) if den else 0.0
+
+
+def _dms(values: Any, ref: Any) -> Optional[float]:
+    try:
+        deg, minutes, seconds = (_rational(x) for x in values)
+    except (TypeError, ValueError):
+        return None
+    out = deg + minutes / 60.0 + seconds / 3600.0
+    return -out if str(ref).upper() in ("S", "W") else out
+
+
+def read_exif_metadata(path: str) -> Dict[str, Optional[float]]:
+    """Return {"time": unix seconds or None, "lat", "lon", "alt"} from EXIF without decoding pixels."""
+    from PIL import Image
+
+    meta: Dict[str, Optional[float]] = {"time": None, "lat": None, "lon": None, "alt": None}
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+            stamp = exif.get_ifd(_EXIF_IFD).get(_DATETIME_ORIGINAL) or exif.get(_DATETIME)
+            if stamp:
+                try:
+                    meta["time"] = datetime.strptime(str(stamp).strip("\0 "), "%Y:%m:%d %H:%M:%S").timestamp()
+                except ValueError:
+                    pass
+            gps = exif.get_ifd(_GPS_IFD)
+            if gps and 2 in gps and 4 in gps:
+                meta["lat"] = _dms(gps[2], gps.get(1, "N"))
+                meta["lon"] = _dms(gps[4], gps.get(3, "E"))
+                if 6 in gps:
+                    alt = _rational(gps[6])
+                    meta["alt"] = -alt if gps.get(5) in (1, b"\x01") else alt
+    except OSError:
+        pass
+    return meta
+
+
+def collect_metadata(images_dir: str, names: Optional[List[str]] = None, workers: int = 8) -> List[Dict[str, Optional[float]]]:
+    names = names if names is not None else list_images(images_dir)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_exif_metadata, [os.path.join(images_dir, n) for n in names]))
+
+
+def gps_to_local(lat: np.ndarray, lon: np.ndarray, alt: Optional[np.ndarray] = None) -> np.ndarray:
+    """Equirectangular projection to metres around the mean position (fine at capture scales)."""
+    lat0 = math.radians(float(np.mean(lat)))
+    x = np.radians(lon - np.mean(lon)) * math.cos(lat0) * _EARTH_RADIUS_M
+    y = np.radians(lat - np.mean(lat)) * _EARTH_RADIUS_M
+    z = (alt - np.mean(alt)) if alt is not None else np.zeros_like(x)
+    return np.stack([x, y, z], axis=1)
+
+
+def knn_pairs(positions: np.ndarray, k: int, chunk: int = 1024) -> Set[Tuple[int, int]]:
+    """Unordered index pairs (i < j) linking each point to its k nearest neighbours (brute force, chunked)."""
+    n = len(positions)
+    k = min(k, n - 1)
+    pairs: Set[Tuple[int, int]] = set()
+    if k <= 0:
+        return pairs
+    pos = positions.reshape(n, -1).astype(np.float64)
+    sq = (pos ** 2).sum(axis=1)
+    for s in range(0, n, chunk):
+        block = pos[s : s + chunk]
+        d = sq[s : s + chunk, None] + sq[None, :] - 2.0 * block @ pos.T
+        rows = np.arange(len(block))
+        d[rows, rows + s] = np.inf
+        nearest = np.argpartition(d, k - 1, axis=1)[:, :k]
+        for r, js in enumerate(nearest):
+            i = s + r
+            for j in js.tolist():
+                pairs.add((i, j) if i < j else (j, i))
+    return pairs
+
+
+def plan_matching(
+    images_dir: str,
+    matcher: str = "auto",
+    exhaustive_max: int = EXHAUSTIVE_MAX,
+    spatial_k: int = SPATIAL_K,
+    temporal_k: int = TEMPORAL_K,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Choose a matching strategy for images_dir.
+
+    Returns {"matcher": "exhaustive" | "sequential" | "custom", "reason": str, "pairs": [(name_a, name_b), ...]}
+    ("pairs" only for "custom"). matcher forces a strategy instead of "auto".
+    """
+    if matcher not in MATCHERS:
+        raise ValueError(f"Unknown matcher {matcher!r}; expected one of {', '.join(MATCHERS)}")
+    names = names if names is not None else list_images(images_dir)
+    n = len(names)
+    if matcher == "exhaustive" or (matcher == "auto" and n <= exhaustive_max):
+        return {"matcher": "exhaustive", "reason": f"{n} images <= {exhaustive_max}" if matcher == "auto" else "forced", "num_images": n}
+    if matcher == "sequential":
+        return {"matcher": "sequential", "reason": "forced", "num_images": n}
+
+    meta = collect_metadata(images_dir, names)
+    has_gps = [m["lat"] is not None and m["lon"] is not None for m in meta]
+    has_time = [m["time"] is not None for m in meta]
+    use_gps = n > 0 and sum(has_gps) >= METADATA_COVERAGE * n
+    use_time = n > 0 and sum(has_time) >= METADATA_COVERAGE * n
+
+    pairs: Set[Tuple[int, int]] = set()
+    reasons = []
+    if use_gps:
+        idx = np.flatnonzero(has_gps)
+        lat = np.array([meta[i]["lat"] for i in idx], dtype=np.float64)
+        lon = np.array([meta[i]["lon"] for i in idx], dtype=np.float64)
+        alts = [meta[i]["alt"] for i in idx]
+        alt = np.array(alts, dtype=np.float64) if all(a is not None for a in alts) else None
+        for a, b in knn_pairs(gps_to_local(lat, lon, alt), spatial_k):
+            pairs.add((int(idx[a]), int(idx[b])))
+        reasons.append(f"GPS on {sum(has_gps)}/{n} images, k={spatial_k}")
+    if use_time:
+        idx = np.flatnonzero(has_time)
+        times = np.array([meta[i]["time"] for i in idx], dtype=np.float64)
+        for a, b in knn_pairs(times[:, None], temporal_k):
+            pairs.add((int(idx[a]), int(idx[b])))
+        reasons.append(f"timestamps on {sum(has_time)}/{n} images, k={temporal_k}")
+
+    if not pairs:
+        if matcher == "custom":
+            raise ValueError(f"Custom matching needs EXIF GPS or timestamps; none found in {images_dir}")
+        return {"matcher": "sequential", "reason": f"{n} images, no usable GPS/timestamps", "num_images": n}
+    # Keep filename neighbours too so frames missing metadata stay connected.
+    for i in range(n - 1):
+        pairs.add((i, i + 1))
+    return {
+        "matcher": "custom",
+        "reason": "; ".join(reasons),
+        "num_images": n,
+        "pairs": [(names[a], names[b]) for a, b in sorted(pairs)],
+    }
+
+
+def write_match_list(pairs: List[Tuple[str, str]], path: str) -> str:
+    """Write a COLMAP matches_importer pair list ("name_a name_b" per line)."""
+    with open(path, "w", encoding="utf-8") as f:
+        for a, b in pairs:
+            f.write(f"{a} {b}\n")
+    return path
@@ -6,12 +6,15 @@ By default it calls an external conversion script if provided; keep minimal so l
 from __future__ import annotations
 
 import os
-import subprocess
 import sys
 from typing import Optional
 
+from src.core.lazy import lazy_import
 
-def run_convert(scene_path: str, wrapper_script: Optional[str] = None) -> None:
+process = lazy_import("src.core.process")
+
+
+def run_convert(scene_path: str, wrapper_script: Optional[str] = None, timeout: Optional[float] = None) -> None:
     """Run conversion from COLMAP outputs to Gaussian Splatting inputs.
 
     wrapper_script: path to local script (scripts/convert-colmap.py). If absent, raise FileNotFoundError to indicate manual action required.
@@ -19,6 +22,6 @@ def run_convert(scene_path: str, wrapper_script: Optional[str] = None) -> None:
     if wrapper_script and os.path.isfile(wrapper_script):
         cmd = [sys.executable, wrapper_script, "--input_path", scene_path]
         print("Running conversion wrapper:", " ".join(cmd))
-        subprocess.check_call(cmd)
+        process.run(cmd, timeout=timeout, echo=True).check_returncode()
     else:
         raise FileNotFoundError("No convert wrapper script found at {}".format(wrapper_script))
@@ -0,0 +1,429 @@
+"""Read and write COLMAP sparse models (cameras/images/points3D, binary and text) as NumPy arrays.
+
+Variable-length records (2D observations per image, tracks per 3D point) are stored flat with an
+offsets array of length n+1, so `tracks[track_offsets[i]:track_offsets[i + 1]]` is the track of point i.
+`points3D.bin` is memory-mapped; only the record offsets are found with a scalar scan, every field and
+all track entries are then gathered with vectorised indexing in bounded chunks.
+"""
+from __future__ import annotations
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# model_id -> (name, number of params), as in COLMAP's src/colmap/sensor/models.h
+CAMERA_MODELS: Dict[int, Tuple[str, int]] = {
+    0: ("SIMPLE_PINHOLE", 3),
+    1: ("PINHOLE", 4),
+    2: ("SIMPLE_RADIAL", 4),
+    3: ("RADIAL", 5),
+    4: ("OPENCV", 8),
+    5: ("OPENCV_FISHEYE", 8),
+    6: ("FULL_OPENCV", 12),
+    7: ("FOV", 5),
+    8: ("SIMPLE_RADIAL_FISHEYE", 4),
+    9: ("RADIAL_FISHEYE", 5),
+    10: ("THIN_PRISM_FISHEYE", 12),
+}
+CAMERA_MODEL_IDS = {name: mid for mid, (name, _) in CAMERA_MODELS.items()}
+MAX_PARAMS = 12
+
+CAMERA_DTYPE = np.dtype([("camera_id", "<i4"), ("model_id", "<i4"), ("width", "<u8"), ("height", "<u8"), ("num_params", "<i4"), ("params", "<f8", MAX_PARAMS)])
+IMAGE_DTYPE = np.dtype([("image_id", "<u4"), ("qvec", "<f8", 4), ("tvec", "<f8", 3), ("camera_id", "<u4")])
+POINT2D_DTYPE = np.dtype([("xy", "<f8", 2), ("point3D_id", "<i8")])
+POINT3D_DTYPE = np.dtype([("point3D_id", "<u8"), ("xyz", "<f8", 3), ("rgb", "u1", 3), ("error", "<f8")])
+TRACK_DTYPE = np.dtype([("image_id", "<i4"), ("point2D_idx", "<i4")])
+
+# On-disk points3D.bin record header: id, xyz, rgb, error, track_length (51 bytes, unaligned).
+_P3D_HEADER = np.dtype([("point3D_id", "<u8"), ("xyz", "<f8", 3), ("rgb", "u1", 3), ("error", "<f8"), ("track_length", "<u8")])
+_TRACK_LEN_AT = 43
+CHUNK = 1 << 18
+
+
+@dataclass
+class SparseModel:
+    cameras: np.ndarray
+    images: np.ndarray
+    image_names: List[str]
+    points2D: np.ndarray
+    points2D_offsets: np.ndarray
+    points3D: np.ndarray
+    tracks: np.ndarray
+    track_offsets: np.ndarray
+
+    @property
+    def track_lengths(self) -> np.ndarray:
+        return np.diff(self.track_offsets)
+
+    def image_points2D(self, i: int) -> np.ndarray:
+        return self.points2D[self.points2D_offsets[i] : self.points2D_offsets[i + 1]]
+
+    def point_track(self, i: int) -> np.ndarray:
+        return self.tracks[self.track_offsets[i] : self.track_offsets[i + 1]]
+
+
+def _offsets(lengths: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=out[1:])
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Binary
+
+
+def read_cameras_binary(path: str) -> np.ndarray:
+    with open(path, "rb") as f:
+        data = f.read()
+    (n,) = struct.unpack_from("<Q", data, 0)
+    cams = np.zeros(n, dtype=CAMERA_DTYPE)
+    pos = 8
+    for i in range(n):
+        cam_id, model_id, width, height = struct.unpack_from("<iiQQ", data, pos)
+        pos += 24
+        num_params = CAMERA_MODELS[model_id][1]
+        params = struct.unpack_from(f"<{num_params}d", data, pos)
+        pos += 8 * num_params
+        cams[i] = (cam_id, model_id, width, height, num_params, tuple(params) + (0.0,) * (MAX_PARAMS - num_params))
+    return cams
+
+
+def write_cameras_binary(cameras: np.ndarray, path: str) -> None:
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(cameras)))
+        for cam in cameras:
+            n = int(cam["num_params"])
+            f.write(struct.pack("<iiQQ", int(cam["camera_id"]), int(cam["model_id"]), int(cam["width"]), int(cam["height"])))
+            f.write(np.asarray(cam["params"][:n], dtype="<f8").tobytes())
+
+
+def read_images_binary(path: str) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+    with open(path, "rb") as f:
+        data = f.read()
+    (n,) = struct.unpack_from("<Q", data, 0)
+    images = np.zeros(n, dtype=IMAGE_DTYPE)
+    names: List[str] = []
+    blocks: List[np.ndarray] = []
+    pos = 8
+    for i in range(n):
+        rec = struct.unpack_from("<I4d3dI", data, pos)
+        pos += 64
+        end = data.index(b"\0", pos)
+        names.append(data[pos:end].decode("utf-8"))
+        pos = end + 1
+        (num_pts,) = struct.unpack_from("<Q", data, pos)
+        pos += 8
+        blocks.append(np.frombuffer(data, dtype=POINT2D_DTYPE, count=num_pts, offset=pos))
+        pos += num_pts * POINT2D_DTYPE.itemsize
+        images[i] = (rec[0], rec[1:5], rec[5:8], rec[8])
+    points2D = np.concatenate(blocks) if blocks else np.zeros(0, dtype=POINT2D_DTYPE)
+    return images, names, points2D, _offsets(np.array([len(b) for b in blocks], dtype=np.int64))
+
+
+def write_images_binary(images: np.ndarray, names: List[str], points2D: np.ndarray, offsets: np.ndarray, path: str) -> None:
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(images)))
+        for i, img in enumerate(images):
+            f.write(struct.pack("<I4d3dI", int(img["image_id"]), *img["qvec"].tolist(), *img["tvec"].tolist(), int(img["camera_id"])))
+            f.write(names[i].encode("utf-8") + b"\0")
+            pts = np.ascontiguousarray(points2D[offsets[i] : offsets[i + 1]], dtype=POINT2D_DTYPE)
+            f.write(struct.pack("<Q", len(pts)))
+            f.write(pts.tobytes())
+
+
+def _record_offsets(buf: np.ndarray, n: int) -> np.ndarray:
+    """Start offset of each points3D.bin record; the only inherently sequential part of the parse."""
+    mv = memoryview(buf)
+    offsets = np.empty(n + 1, dtype=np.int64)
+    unpack = struct.Struct("<Q").unpack_from
+    pos = 8
+    header = _P3D_HEADER.itemsize
+    for i in range(n):
+        offsets[i] = pos
+        pos += header + 8 * unpack(mv, pos + _TRACK_LEN_AT)[0]
+    offsets[n] = pos
+    return offsets
+
+
+def _gather(buf: np.ndarray, starts: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Copy dtype-sized records starting at arbitrary byte offsets out of buf."""
+    # Zero-copy (len(buf) - k + 1, k) view of every k-byte window; row indexing copies just the records.
+    windows = np.lib.stride_tricks.sliding_window_view(buf, dtype.itemsize)
+    return np.ascontiguousarray(windows[starts]).view(dtype).reshape(len(starts))
+
+
+def read_points3D_binary(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (points3D, tracks, track_offsets) from a memory-mapped points3D.bin."""
+    if os.path.getsize(path) <= 8:
+        return np.zeros(0, dtype=POINT3D_DTYPE), np.zeros(0, dtype=TRACK_DTYPE), np.zeros(1, dtype=np.int64)
+    buf = np.memmap(path, dtype=np.uint8, mode="r")
+    n = int(buf[:8].view("<u8")[0])
+    rec = _record_offsets(buf, n)
+
+    points = np.empty(n, dtype=POINT3D_DTYPE)
+    lengths = np.empty(n, dtype=np.int64)
+    for s in range(0, n, CHUNK):
+        e = min(s + CHUNK, n)
+        hdr = _gather(buf, rec[s:e], _P3D_HEADER)
+        for name in ("point3D_id", "xyz", "rgb", "error"):
+            points[name][s:e] = hdr[name]
+        lengths[s:e] = hdr["track_length"]
+    track_offsets = _offsets(lengths)
+
+    tracks = np.empty(int(track_offsets[-1]), dtype=TRACK_DTYPE)
+    header = _P3D_HEADER.itemsize
+    for s in range(0, n, CHUNK):
+        e = min(s + CHUNK, n)
+        t0, t1 = track_offsets[s], track_offsets[e]
+        if t1 == t0:
+            continue
+        # File position of every track element: record start + header + 8 * index within the track.
+        within = np.arange(t1 - t0, dtype=np.int64) - np.repeat(track_offsets[s:e] - t0, lengths[s:e])
+        starts = np.repeat(rec[s:e] + header, lengths[s:e]) + 8 * within
+        tracks[t0:t1] = _gather(buf, starts, TRACK_DTYPE)
+    return points, tracks, track_offsets
+
+
+def write_points3D_binary(points3D: np.ndarray, tracks: np.ndarray, track_offsets: np.ndarray, path: str) -> None:
+    n = len(points3D)
+    lengths = np.diff(track_offsets).astype(np.int64)
+    header = _P3D_HEADER.itemsize
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", n))
+        for s in range(0, n, CHUNK):
+            e = min(s + CHUNK, n)
+            hdr = np.empty(e - s, dtype=_P3D_HEADER)
+            for name in ("point3D_id", "xyz", "rgb", "error"):
+                hdr[name] = points3D[name][s:e]
+            hdr["track_length"] = lengths[s:e]
+            sizes = header + 8 * lengths[s:e]
+            rec = _offsets(sizes)
+            out = np.empty(int(rec[-1]), dtype=np.uint8)
+            out[rec[:-1, None] + np.arange(header)] = hdr.view(np.uint8).reshape(-1, header)
+            t0, t1 = track_offsets[s], track_offsets[e]
+            if t1 > t0:
+                within = np.arange(t1 - t0, dtype=np.int64) - np.repeat(track_offsets[s:e] - t0, lengths[s:e])
+                starts = np.repeat(rec[:-1] + header, lengths[s:e]) + 8 * within
+                track_bytes = np.ascontiguousarray(tracks[t0:t1], dtype=TRACK_DTYPE).view(np.uint8).reshape(-1, 8)
+                out[starts[:, None] + np.arange(8)] = track_bytes
+            f.write(out.tobytes())
+
+
+# ---------------------------------------------------------------------------
+# Text
+
+
+def _data_lines(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def read_cameras_text(path: str) -> np.ndarray:
+    rows = []
+    for line in _data_lines(path):
+        parts = line.split()
+        model_id = CAMERA_MODEL_IDS[parts[1]]
+        params = [float(x) for x in parts[4:]]
+        rows.append((int(parts[0]), model_id, int(parts[2]), int(parts[3]), len(params), tuple(params) + (0.0,) * (MAX_PARAMS - len(params))))
+    return np.array(rows, dtype=CAMERA_DTYPE)
+
+
+def write_cameras_text(cameras: np.ndarray, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Camera list with one line of data per camera:\n#   CAMERA_ID, MODEL, WIDTH, HEIGHT, PARAMS[]\n")
+        f.write(f"# Number of cameras: {len(cameras)}\n")
+        for cam in cameras:
+            params = " ".join(repr(float(p)) for p in cam["params"][: int(cam["num_params"])])
+            f.write(f"{int(cam['camera_id'])} {CAMERA_MODELS[int(cam['model_id'])][0]} {int(cam['width'])} {int(cam['height'])} {params}\n")
+
+
+def read_images_text(path: str) -> Tuple[np.ndarray, List[str], np.ndarray, np.ndarray]:
+    # Blank 2D-point lines are significant here, so lines are not filtered through _data_lines.
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [ln.rstrip("\n") for ln in f if not ln.startswith("#")]
+    rows, names, blocks = [], [], []
+    for i in range(0, len(lines) - 1, 2):
+        head = lines[i].split()
+        if not head:
+            continue
+        rows.append((int(head[0]), tuple(float(x) for x in head[1:5]), tuple(float(x) for x in head[5:8]), int(head[8])))
+        names.append(" ".join(head[9:]))
+        vals = lines[i + 1].split()
+        pts = np.zeros(len(vals) // 3, dtype=POINT2D_DTYPE)
+        if vals:
+            arr = np.array(vals, dtype=np.float64).reshape(-1, 3)
+            pts["xy"] = arr[:, :2]
+            pts["point3D_id"] = arr[:, 2].astype(np.int64)
+        blocks.append(pts)
+    points2D = np.concatenate(blocks) if blocks else np.zeros(0, dtype=POINT2D_DTYPE)
+    return np.array(rows, dtype=IMAGE_DTYPE), names, points2D, _offsets(np.array([len(b) for b in blocks], dtype=np.int64))
+
+
+def write_images_text(images: np.ndarray, names: List[str], points2D: np.ndarray, offsets: np.ndarray, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Image list with two lines of data per image:\n")
+        f.write("#   IMAGE_ID, QW, QX, QY, QZ, TX, TY, TZ, CAMERA_ID, NAME\n#   POINTS2D[] as (X, Y, POINT3D_ID)\n")
+        f.write(f"# Number of images: {len(images)}\n")
+        for i, img in enumerate(images):
+            pose = " ".join(repr(float(v)) for v in list(img["qvec"]) + list(img["tvec"]))
+            f.write(f"{int(img['image_id'])} {pose} {int(img['camera_id'])} {names[i]}\n")
+            pts = points2D[offsets[i] : offsets[i + 1]]
+            f.write(" ".join(f"{float(p['xy'][0])!r} {float(p['xy'][1])!r} {int(p['point3D_id'])}" for p in pts) + "\n")
+
+
+def read_points3D_text(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, lengths, track_vals = [], [], []
+    for line in _data_lines(path):
+        parts = line.split()
+        rows.append((int(parts[0]), tuple(float(x) for x in parts[1:4]), tuple(int(x) for x in parts[4:7]), float(parts[7])))
+        track = parts[8:]
+        lengths.append(len(track) // 2)
+        track_vals.extend(track)
+    tracks = np.zeros(len(track_vals) // 2, dtype=TRACK_DTYPE)
+    if track_vals:
+        arr = np.array(track_vals, dtype=np.int64).reshape(-1, 2)
+        tracks["image_id"], tracks["point2D_idx"] = arr[:, 0], arr[:, 1]
+    return np.array(rows, dtype=POINT3D_DTYPE), tracks, _offsets(np.array(lengths, dtype=np.int64))
+
+
+def write_points3D_text(points3D: np.ndarray, tracks: np.ndarray, track_offsets: np.ndarray, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# 3D point list with one line of data per point:\n")
+        f.write("#   POINT3D_ID, X, Y, Z, R, G, B, ERROR, TRACK[] as (IMAGE_ID, POINT2D_IDX)\n")
+        f.write(f"# Number of points: {len(points3D)}\n")
+        for i, p in enumerate(points3D):
+            xyz = " ".join(repr(float(v)) for v in p["xyz"])
+            rgb = " ".join(str(int(v)) for v in p["rgb"])
+            track = tracks[track_offsets[i] : track_offsets[i + 1]]
+            t = " ".join(f"{int(e['image_id'])} {int(e['point2D_idx'])}" for e in track)
+            f.write(f"{int(p['point3D_id'])} {xyz} {rgb} {float(p['error'])!r} {t}\n")
+
+
+# ---------------------------------------------------------------------------
+
+
+def detect_model_ext(model_dir: str) -> Optional[str]:
+    """Return ".bin" or ".txt" depending on which complete model exists in model_dir, else None."""
+    for ext in (".bin", ".txt"):
+        if all(os.path.isfile(os.path.join(model_dir, f"{name}{ext}")) for name in ("cameras", "images", "points3D")):
+            return ext
+    return None
+
+
+def read_model(model_dir: str, ext: Optional[str] = None) -> SparseModel:
+    """Read a COLMAP model (e.g. scenes/<name>/sparse/0). ext defaults to whichever format is present."""
+    ext = ext or detect_model_ext(model_dir)
+    if ext is None:
+        raise FileNotFoundError(f"No COLMAP model (cameras/images/points3D .bin or .txt) in {model_dir}")
+    path = lambda name: os.path.join(model_dir, name + ext)  # noqa: E731
+    if ext == ".bin":
+        cameras = read_cameras_binary(path("cameras"))
+        images, names, points2D, p2d_off = read_images_binary(path("images"))
+        points3D, tracks, t_off = read_points3D_binary(path("points3D"))
+    else:
+        cameras = read_cameras_text(path("cameras"))
+        images, names, points2D, p2d_off = read_images_text(path("images"))
+        points3D, tracks, t_off = read_points3D_text(path("points3D"))
+    return SparseModel(cameras, images, names, points2D, p2d_off, points3D, tracks, t_off)
+
+
+def write_model(model: SparseModel, model_dir: str, ext: str = ".bin") -> None:
+    os.makedirs(model_dir, exist_ok=True)
+    path = lambda name: os.path.join(model_dir, name + ext)  # noqa: E731
+    if ext == ".bin":
+        write_cameras_binary(model.cameras, path("cameras"))
+        write_images_binary(model.images, model.image_names, model.points2D, model.points2D_offsets, path("images"))
+        write_points3D_binary(model.points3D, model.tracks, model.track_offsets, path("points3D"))
+    elif ext == ".txt":
+        write_cameras_text(model.cameras, path("cameras"))
+        write_images_text(model.images, model.image_names, model.points2D, model.points2D_offsets, path("images"))
+        write_points3D_text(model.points3D, model.tracks, model.track_offsets, path("points3D"))
+    else:
+        raise ValueError(f"Unknown model extension {ext!r}; expected '.bin' or '.txt'")
+
+
+def summarize_model(model: SparseModel) -> Dict[str, Any]:
+    """Headline statistics used to sanity-check a reconstruction."""
+    lengths = model.track_lengths
+    owner = np.repeat(np.arange(len(model.images)), np.diff(model.points2D_offsets))
+    per_image = np.bincount(owner, weights=model.points2D["point3D_id"] >= 0, minlength=len(model.images))
+    return {
+        "num_cameras": int(len(model.cameras)),
+        "num_registered_images": int(len(model.images)),
+        "num_points3D": int(len(model.points3D)),
+        "num_observations": int(len(model.tracks)),
+        "mean_reprojection_error": float(model.points3D["error"].mean()) if len(model.points3D) else 0.0,
+        "mean_track_length": float(lengths.mean()) if len(lengths) else 0.0,
+        "median_track_length": float(np.median(lengths)) if len(lengths) else 0.0,
+        "max_track_length": int(lengths.max()) if len(lengths) else 0,
+        "mean_observations_per_image": float(per_image.mean()) if len(per_image) else 0.0,
+    }
+
+
+def qvec_to_rotmat(qvec: np.ndarray) -> np.ndarray:
+    """(..., 4) COLMAP wxyz quaternions -> (..., 3, 3) rotation matrices (normalised first)."""
+    q = np.asarray(qvec, dtype=np.float64)
+    w, x, y, z = np.moveaxis(q / np.linalg.norm(q, axis=-1, keepdims=True), -1, 0)
+    return np.stack([
+        np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=-1),
+        np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=-1),
+        np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=-1),
+    ], axis=-2)
+
+
+def camera_centers(model: SparseModel) -> np.ndarray:
+    """(N, 3) world positions of the registered images: C = -R^T t."""
+    if not len(model.images):
+        return np.zeros((0, 3))
+    rot = qvec_to_rotmat(model.images["qvec"])
+    return -np.einsum("nji,nj->ni", rot, model.images["tvec"])
+
+
+def subset_model(model: SparseModel, image_mask: np.ndarray, point_mask: np.ndarray) -> SparseModel:
+    """Model restricted to the selected images and points, with tracks and 2D observations kept consistent.
+
+    Track entries of dropped images are removed, points left without observations are dropped too, and
+    2D observations of dropped points become unmatched (point3D_id -1). Ids are kept, cameras all copied.
+    """
+    image_mask = np.asarray(image_mask, dtype=bool)
+    kept_ids = model.images["image_id"][image_mask]
+    owner = np.repeat(np.arange(len(model.points3D)), model.track_lengths)
+    entry = np.asarray(point_mask, dtype=bool)[owner] & np.isin(model.tracks["image_id"], kept_ids.astype(np.int64))
+    lengths = np.bincount(owner[entry], minlength=len(model.points3D))
+    point_keep = np.asarray(point_mask, dtype=bool) & (lengths > 0)
+    entry &= point_keep[owner]
+
+    rows = np.flatnonzero(image_mask)
+    p2d_lengths = np.diff(model.points2D_offsets)[rows]
+    points2D = np.concatenate([model.image_points2D(i) for i in rows]) if len(rows) else model.points2D[:0]
+    points2D = points2D.copy()
+    matched = points2D["point3D_id"] >= 0
+    valid_ids = model.points3D["point3D_id"][point_keep].astype(np.int64)
+    points2D["point3D_id"][matched & ~np.isin(points2D["point3D_id"], valid_ids)] = -1
+    return SparseModel(
+        model.cameras.copy(),
+        model.images[image_mask].copy(),
+        [model.image_names[i] for i in rows],
+        points2D,
+        _offsets(p2d_lengths),
+        model.points3D[point_keep].copy(),
+        model.tracks[entry].copy(),
+        _offsets(lengths[point_keep]),
+    )
+
+
+def validate_model(model_dir: str, min_registered: int = 2, min_points: int = 1) -> Dict[str, Any]:
+    """Read and summarise a model, raising RuntimeError if it is too small to train on."""
+    summary = summarize_model(read_model(model_dir))
+    if summary["num_registered_images"] < min_registered or summary["num_points3D"] < min_points:
+        raise RuntimeError(
+            f"COLMAP model in {model_dir} is unusable: {summary['num_registered_images']} registered images, "
+            f"{summary['num_points3D']} points (need >= {min_registered} images and >= {min_points} points)"
+        )
+    return summary
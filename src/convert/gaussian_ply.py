@@ -0,0 +1,250 @@
+"""Read and write trained Gaussian splat point clouds (gaussian-splatting's point_cloud.ply).
+
+The file is a binary PLY with one "vertex" element whose float32 properties are, in order:
+x y z, nx ny nz, f_dc_0..2, f_rest_0..(3 * ((degree + 1) ** 2 - 1) - 1), opacity, scale_0..2, rot_0..3.
+Values are stored raw (opacity as a logit, scales as logs, rotations as unnormalised wxyz quaternions).
+
+float16 fields are stored as "ushort" properties flagged by a "comment half_float" header line and are
+mapped back to float16 on read, still without copying. The flag is this module's own convention: other
+PLY readers see those fields as integers.
+
+Readers return a NumPy structured array over `np.memmap`, so opening a multi-million Gaussian file costs
+only the header parse; fields are touched lazily. `iter_gaussians` yields bounded chunks for streaming
+work on files larger than RAM. Writers emit the same header layout and raw little-endian bytes, so read -> write
+is byte-exact for files in the gaussian-splatting layout.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# PLY scalar type names (both spellings) -> NumPy type codes without byte order.
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4", "double": "f8", "float64": "f8",
+}
+# PLY has no half type: float16 fields are written as "ushort" and flagged by this header comment.
+HALF_COMMENT = "half_float"
+_PLY_NAMES = {"f2": "ushort", "i1": "char", "u1": "uchar", "i2": "short", "u2": "ushort", "i4": "int", "u4": "uint", "f4": "float", "f8": "double"}
+_FORMATS = {"binary_little_endian": "<", "binary_big_endian": ">"}
+
+CHUNK_SIZE = 1 << 20
+
+# Column groups of the gaussian-splatting layout; f_dc/f_rest/scale/rot are matched by prefix.
+FIELD_GROUPS = {
+    "positions": ("x", "y", "z"),
+    "normals": ("nx", "ny", "nz"),
+    "sh_dc": "f_dc_",
+    "sh_rest": "f_rest_",
+    "opacity": ("opacity",),
+    "scales": "scale_",
+    "rotations": "rot_",
+}
+
+
+def gaussian_dtype(sh_degree: int = 3, normals: bool = True) -> np.dtype:
+    """Structured dtype of the gaussian-splatting vertex layout for a given SH degree."""
+    names = ["x", "y", "z"] + (["nx", "ny", "nz"] if normals else [])
+    names += [f"f_dc_{i}" for i in range(3)]
+    names += [f"f_rest_{i}" for i in range(3 * ((sh_degree + 1) ** 2 - 1))]
+    names += ["opacity"] + [f"scale_{i}" for i in range(3)] + [f"rot_{i}" for i in range(4)]
+    return np.dtype([(n, "<f4") for n in names])
+
+
+def sh_degree(dtype: np.dtype) -> int:
+    """SH degree implied by the number of f_rest_* fields."""
+    rest = sum(1 for n in dtype.names if n.startswith("f_rest_"))
+    degree = int(round((rest // 3 + 1) ** 0.5)) - 1
+    if 3 * ((degree + 1) ** 2 - 1) != rest:
+        raise ValueError(f"{rest} f_rest_* fields do not match any SH degree")
+    return degree
+
+
+def read_header(path: str) -> Tuple[np.dtype, int, int, List[str]]:
+    """Parse a binary PLY header. Returns (vertex dtype, vertex count, data offset, comments).
+
+    Only files whose first element is "vertex" with scalar properties can be memory-mapped; elements
+    after it (rare in splat files) are ignored.
+    """
+    with open(path, "rb") as f:
+        if f.readline().strip() != b"ply":
+            raise ValueError(f"{path} is not a PLY file")
+        fmt = None
+        elements: List[Tuple[str, int, List[Tuple[str, str]]]] = []
+        comments: List[str] = []
+        while True:
+            raw = f.readline()
+            if not raw:
+                raise ValueError(f"{path}: unterminated PLY header")
+            line = raw.decode("ascii", errors="replace").strip()
+            if line == "end_header":
+                break
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == "format":
+                fmt = words[1]
+            elif words[0] == "comment":
+                comments.append(line[len("comment"):].strip())
+            elif words[0] == "element":
+                elements.append((words[1], int(words[2]), []))
+            elif words[0] == "property":
+                if words[1] == "list":
+                    raise ValueError(f"{path}: list property {words[-1]!r} cannot be memory-mapped")
+                if not elements:
+                    raise ValueError(f"{path}: property before any element")
+                if words[1] not in PLY_TYPES:
+                    raise ValueError(f"{path}: unknown PLY type {words[1]!r}")
+                elements[-1][2].append((words[2], PLY_TYPES[words[1]]))
+        offset = f.tell()
+    if fmt not in _FORMATS:
+        raise ValueError(f"{path}: unsupported PLY format {fmt!r} (binary only)")
+    if not elements or elements[0][0] != "vertex":
+        raise ValueError(f"{path}: first PLY element must be 'vertex'")
+    _, count, props = elements[0]
+    order = _FORMATS[fmt]
+    if HALF_COMMENT in comments:
+        props = [(name, "f2" if code == "u2" else code) for name, code in props]
+    dtype = np.dtype([(name, order + code) for name, code in props])
+    return dtype, count, offset, comments
+
+
+def read_gaussians(path: str, mode: str = "r") -> np.ndarray:
+    """Memory-map the vertex data of a Gaussian PLY as a structured array.
+
+    mode is passed to `np.memmap` ("r" read-only, "r+" edit in place, "c" copy-on-write).
+    """
+    dtype, count, offset, _ = read_header(path)
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    expected = offset + count * dtype.itemsize
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"{path}: truncated ({os.path.getsize(path)} bytes, header needs {expected})")
+    return np.memmap(path, dtype=dtype, mode=mode, offset=offset, shape=(count,))
+
+
+def iter_gaussians(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Yield consecutive in-memory chunks of at most chunk_size Gaussians.
+
+    Each chunk is copied out of the mapping, so the resident set stays bounded by one chunk.
+    """
+    data = read_gaussians(path)
+    for s in range(0, len(data), chunk_size):
+        yield np.array(data[s : s + chunk_size])
+
+
+def field_names(dtype: np.dtype, group: str) -> List[str]:
+    """Field names of a FIELD_GROUPS entry present in dtype (prefix groups in numeric order)."""
+    spec = FIELD_GROUPS[group]
+    if isinstance(spec, tuple):
+        return [n for n in spec if n in dtype.names]
+    names = [n for n in dtype.names if n.startswith(spec) and n[len(spec):].isdigit()]
+    return sorted(names, key=lambda n: int(n[len(spec):]))
+
+
+def field_block(data: np.ndarray, group: str, dtype: str = "f4") -> np.ndarray:
+    """(N, k) array of a column group, e.g. field_block(g, "positions") -> (N, 3).
+
+    Contiguous same-type groups (all of the gaussian-splatting layout) come back as a strided view
+    without copying; anything else is gathered column by column.
+    """
+    names = field_names(data.dtype, group)
+    if not names:
+        return np.zeros((len(data), 0), dtype=dtype)
+    fields = data.dtype.fields
+    first_offset = fields[names[0]][1]
+    base = fields[names[0]][0]
+    contiguous = all(fields[n][0] == base and fields[n][1] == first_offset + i * base.itemsize for i, n in enumerate(names))
+    if contiguous and base == np.dtype(dtype) and data.flags.c_contiguous and len(data):
+        raw = data.view(np.uint8).reshape(len(data), data.dtype.itemsize)
+        return raw[:, first_offset : first_offset + len(names) * base.itemsize].view(base)
+    return np.stack([np.asarray(data[n], dtype=dtype) for n in names], axis=1)
+
+
+def _header(dtype: np.dtype, count: int, comments: Optional[List[str]] = None) -> bytes:
+    comments = list(comments or [])
+    half = any(dtype.fields[n][0].str[1:] == "f2" for n in dtype.names)
+    if half and any(dtype.fields[n][0].str[1:] == "u2" for n in dtype.names):
+        raise ValueError("float16 and uint16 fields cannot be mixed in one PLY")
+    if half and HALF_COMMENT not in comments:
+        comments.append(HALF_COMMENT)
+    lines = ["ply", "format binary_little_endian 1.0"]
+    lines += [f"comment {c}" for c in comments]
+    lines.append(f"element vertex {count}")
+    for name in dtype.names:
+        code = dtype.fields[name][0].str[1:]
+        if code not in _PLY_NAMES or dtype.fields[name][0].shape:
+            raise ValueError(f"Field {name!r} has no PLY scalar type ({dtype.fields[name][0]})")
+        lines.append(f"property {_PLY_NAMES[code]} {name}")
+    lines.append("end_header")
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def _packed(dtype: np.dtype) -> np.dtype:
+    # Little-endian with padding/offset gaps dropped, so records match the PLY property list byte for byte.
+    return np.dtype([(n, dtype.fields[n][0].newbyteorder("<")) for n in dtype.names])
+
+
+def write_gaussians(path: str, data: np.ndarray, comments: Optional[List[str]] = None, chunk_size: int = CHUNK_SIZE) -> str:
+    """Write a structured array (in memory or memory-mapped) as a binary Gaussian PLY, chunk by chunk."""
+    packed = _packed(data.dtype)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_header(packed, len(data), comments))
+        for s in range(0, len(data), chunk_size):
+            chunk = data[s : s + chunk_size]
+            if chunk.dtype != packed:
+                chunk = chunk.astype(packed)
+            f.write(np.ascontiguousarray(chunk).tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def create_gaussians(path: str, dtype: np.dtype, count: int, comments: Optional[List[str]] = None) -> np.ndarray:
+    """Write a header for count Gaussians and return a writable memmap over the (zeroed) body.
+
+    Lets producers fill output in place, chunk by chunk, without holding it in RAM. Call `.flush()`
+    (or drop the reference) when done.
+    """
+    packed = _packed(np.dtype(dtype))
+    header = _header(packed, count, comments)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(header)
+        f.truncate(len(header) + count * packed.itemsize)
+    if count == 0:
+        return np.zeros(0, dtype=packed)
+    return np.memmap(path, dtype=packed, mode="r+", offset=len(header), shape=(count,))
+
+
+_ITERATION_DIR = re.compile(r"^iteration_(\d+)$")
+
+
+def find_point_clouds(model_path: str) -> Dict[int, str]:
+    """{iteration: path} for every <model_path>/point_cloud/iteration_N/point_cloud.ply."""
+    root = os.path.join(model_path, "point_cloud")
+    found: Dict[int, str] = {}
+    if not os.path.isdir(root):
+        return found
+    for name in os.listdir(root):
+        m = _ITERATION_DIR.match(name)
+        ply = os.path.join(root, name, "point_cloud.ply")
+        if m and os.path.isfile(ply):
+            found[int(m.group(1))] = ply
+    return found
+
+
+def latest_point_cloud(model_path: str) -> Optional[str]:
+    """Path of the highest-iteration point_cloud.ply under model_path, or None."""
+    found = find_point_clouds(model_path)
+    return found[max(found)] if found else None
@@ -0,0 +1,202 @@
+"""Octree level-of-detail tiling of trained splats for progressive, range-request streaming.
+
+`build_tiles` turns a point_cloud.ply into two files:
+
+* tiles.bin: every octree node's Gaussians as one contiguous run of records, coarse levels first
+* tiles.json: the node index (octree cell and content bounds, byte offset/length, record count,
+  children), so a viewer reads the root, then fetches only the nodes it needs with HTTP range requests
+
+Gaussians are sorted once by a 30-bit Morton code of their centre, so every octree cell is a contiguous
+range of the sorted order and the tree is found by binary search over the codes. A cell holding more than
+max_per_tile Gaussians is split (up to max_depth) and becomes an interior node whose records are a
+level-of-detail aggregate: its lod_size most important Gaussians (volume x opacity), with scales inflated
+by the cube root of the thinning factor so the coarse level still covers the same space. Leaves hold
+their Gaussians unchanged.
+
+Memory stays bounded: only per-Gaussian scalars (code, index, importance) live for the whole cloud and
+records are gathered from the memory-mapped PLY one node block at a time.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.convert import gaussian_ply, splat_export
+
+RECORD_FORMATS = ("splat", "ply")
+MAX_DEPTH = 10  # Morton codes carry 10 bits per axis
+INDEX_FILE = "tiles.json"
+DATA_FILE = "tiles.bin"
+
+
+def _sorted_codes(data: np.ndarray, index: np.ndarray, lo: np.ndarray, size: float, chunk_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    codes = np.empty(len(index), dtype=np.uint32)
+    weight = np.empty(len(index), dtype=np.float32)
+    cube = np.full(3, size)
+    for s in range(0, len(index), chunk_size):
+        block = data[index[s : s + chunk_size]]
+        codes[s : s + len(block)] = splat_export.morton_codes(gaussian_ply.field_block(block, "positions"), lo, cube)
+        weight[s : s + len(block)] = splat_export.importance(block)
+    order = np.argsort(codes, kind="stable")
+    return codes[order], index[order], weight[order]
+
+
+def build_octree(codes: np.ndarray, max_per_tile: int, max_depth: int = MAX_DEPTH) -> List[Dict[str, Any]]:
+    """Split the Morton-sorted codes into octree nodes, breadth first.
+
+    Each node is {"id", "depth", "cell": (ix, iy, iz) at its depth, "start", "end" (range in sorted
+    order), "leaf", "children"}; ids are "r" followed by one octant digit per level.
+    """
+    if max_depth > MAX_DEPTH:
+        raise ValueError(f"max_depth is limited to {MAX_DEPTH}")
+    nodes: List[Dict[str, Any]] = []
+    queue = deque([("r", 0, (0, 0, 0), 0, len(codes))])
+    while queue:
+        node_id, depth, cell, start, end = queue.popleft()
+        node = {"id": node_id, "depth": depth, "cell": cell, "start": start, "end": end, "leaf": True, "children": []}
+        nodes.append(node)
+        if end - start <= max_per_tile or depth >= max_depth:
+            continue
+        node["leaf"] = False
+        shift = 3 * (MAX_DEPTH - depth - 1)
+        prefix = (int(codes[start]) >> (shift + 3)) << 3
+        bounds = np.searchsorted(codes[start:end], [(prefix + o) << shift for o in range(9)]) + start
+        for octant in range(8):
+            s, e = int(bounds[octant]), int(bounds[octant + 1])
+            if s == e:
+                continue
+            child_cell = tuple(2 * c + ((octant >> axis) & 1) for axis, c in enumerate(cell))
+            node["children"].append(f"{node_id}{octant}")
+            queue.append((f"{node_id}{octant}", depth + 1, child_cell, s, e))
+    return nodes
+
+
+def _content_bounds(rows: np.ndarray) -> List[List[float]]:
+    # Centre AABB grown by three standard deviations of the largest axis, i.e. what the node can draw into.
+    pos = gaussian_ply.field_block(rows, "positions").astype(np.float64)
+    reach = 3.0 * np.exp(gaussian_ply.field_block(rows, "scales").astype(np.float64).max(axis=1))[:, None]
+    return [(pos - reach).min(axis=0).tolist(), (pos + reach).max(axis=0).tolist()]
+
+
+def _encode(rows: np.ndarray, record_format: str, out_dtype: np.dtype) -> bytes:
+    if record_format == "splat":
+        return splat_export.encode_splat(rows)[0].tobytes()
+    return rows.astype(out_dtype).tobytes()
+
+
+def build_tiles(
+    ply_path: str,
+    out_dir: str,
+    max_per_tile: int = 65536,
+    lod_size: Optional[int] = None,
+    max_depth: int = MAX_DEPTH,
+    record_format: str = "splat",
+    min_opacity: float = 0.005,
+    block_size: int = splat_export.BLOCK,
+) -> Dict[str, Any]:
+    """Tile a trained point cloud into out_dir/tiles.bin + tiles.json and return the index.
+
+    Args:
+        max_per_tile: Split octree cells holding more Gaussians than this
+        lod_size: Gaussians kept in each interior (coarse) node (default: max_per_tile)
+        max_depth: Deepest octree level (<= 10); cells at this depth stay leaves whatever their size
+        record_format: "splat" (32-byte .splat records) or "ply" (the source float32 vertex layout)
+        min_opacity: Drop nearly transparent Gaussians first (see `splat_export.prune_mask`)
+    """
+    if record_format not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record format {record_format!r}; expected one of {', '.join(RECORD_FORMATS)}")
+    start_time = time.perf_counter()
+    lod_size = lod_size or max_per_tile
+    data = gaussian_ply.read_gaussians(ply_path)
+    keep, pruned = splat_export.prune_mask(data, min_opacity=min_opacity)
+    index = np.flatnonzero(keep)
+    if not len(index):
+        raise ValueError(f"{ply_path}: no Gaussians left to tile")
+
+    lo, hi = splat_export.position_bounds(data, index)
+    size = float((hi - lo).max()) or 1.0
+    codes, index, weight = _sorted_codes(data, index, lo, size, block_size)
+    nodes = build_octree(codes, max_per_tile, max_depth)
+    out_dtype = np.dtype([(n, "<f4") for n in data.dtype.names])
+    record_size = splat_export.SPLAT_DTYPE.itemsize if record_format == "splat" else out_dtype.itemsize
+
+    os.makedirs(out_dir, exist_ok=True)
+    data_path = os.path.join(out_dir, DATA_FILE)
+    offset = 0
+    entries = []
+    with open(data_path + ".tmp", "wb") as f:
+        for node in nodes:
+            s, e = node["start"], node["end"]
+            if node["leaf"]:
+                picks = index[s:e]
+                inflate = 0.0
+            else:
+                k = min(lod_size, e - s)
+                top = np.argpartition(-weight[s:e], k - 1)[:k] if k < e - s else np.arange(e - s)
+                picks = index[s + np.sort(top)]
+                inflate = np.log((e - s) / k) / 3.0
+            bounds = None
+            for b in range(0, len(picks), block_size):
+                rows = np.array(data[picks[b : b + block_size]])
+                if inflate:
+                    for name in gaussian_ply.field_names(rows.dtype, "scales"):
+                        rows[name] += np.float32(inflate)
+                cb = _content_bounds(rows)
+                bounds = cb if bounds is None else [np.minimum(bounds[0], cb[0]).tolist(), np.maximum(bounds[1], cb[1]).tolist()]
+                f.write(_encode(rows, record_format, out_dtype))
+            cell = size / (1 << node["depth"])
+            cell_lo = (lo + np.array(node["cell"]) * cell).tolist()
+            entries.append({
+                "id": node["id"],
+                "depth": node["depth"],
+                "leaf": node["leaf"],
+                "children": node["children"],
+                "cell_bounds": [cell_lo, [c + cell for c in cell_lo]],
+                "content_bounds": bounds,
+                "offset": offset,
+                "length": len(picks) * record_size,
+                "count": int(len(picks)),
+                "source_count": e - s,
+            })
+            offset += len(picks) * record_size
+    os.replace(data_path + ".tmp", data_path)
+
+    tiles_index = {
+        "version": 1,
+        "source": os.path.abspath(ply_path),
+        "data_file": DATA_FILE,
+        "record_format": record_format,
+        "record_size": record_size,
+        "fields": list(out_dtype.names) if record_format == "ply" else ["position:3f4", "scale:3f4", "rgba:4u1", "rotation:4u1"],
+        "count": int(len(index)),
+        "pruned": pruned,
+        "bounds": [lo.tolist(), (lo + size).tolist()],
+        "max_per_tile": max_per_tile,
+        "lod_size": lod_size,
+        "nodes": entries,
+    }
+    with open(os.path.join(out_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(tiles_index, f, indent=1)
+    leaves = sum(1 for n in entries if n["leaf"])
+    print(
+        f"Tiled {len(index)} Gaussians into {len(entries)} nodes ({leaves} leaves, depth {max(n['depth'] for n in entries)}), "
+        f"{offset / 1e6:.1f} MB in {time.perf_counter() - start_time:.1f}s"
+    )
+    return tiles_index
+
+
+def read_node(out_dir: str, tiles_index: Dict[str, Any], node_id: str) -> np.ndarray:
+    """Read one node's records with a single ranged read (what a streaming client does over HTTP)."""
+    node = next(n for n in tiles_index["nodes"] if n["id"] == node_id)
+    if tiles_index["record_format"] == "splat":
+        dtype = splat_export.SPLAT_DTYPE
+    else:
+        dtype = np.dtype([(n, "<f4") for n in tiles_index["fields"]])
+    with open(os.path.join(out_dir, tiles_index["data_file"]), "rb") as f:
+        f.seek(node["offset"])
+        return np.frombuffer(f.read(node["length"]), dtype=dtype)
@@ -0,0 +1,149 @@
+"""Native resolution pyramid (images_2, images_4, images_8) for a scene's undistorted images.
+
+gaussian-splatting's convert.py builds these levels by running ImageMagick once per image per level,
+which decodes every image three extra times. `build_pyramid` decodes each image once and derives every
+level from that decode with Pillow's reduce-then-Lanczos resampling (`reducing_gap`), spread over a
+process pool like `src.ingest`. A manifest in the scene folder records each source's size, mtime and
+sha256 plus the levels written from it: unchanged sources are skipped on stat alone, touched sources
+only cost a hash, and only missing or stale levels are rewritten.
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.core.hashing import hash_file, hash_params
+from src.ingest import list_images, load_manifest, save_manifest
+
+LEVELS = (2, 4, 8)
+MANIFEST_NAME = ".pyramid_manifest.json"
+REDUCING_GAP = 3.0
+_SAVE_FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG", ".tif": "TIFF", ".tiff": "TIFF", ".bmp": "BMP", ".webp": "WEBP"}
+
+
+def level_dir(scene_path: str, factor: int) -> str:
+    return os.path.join(scene_path, f"images_{factor}")
+
+
+def level_size(size: Tuple[int, int], factor: int) -> Tuple[int, int]:
+    """Size of a 1/factor level, rounded like ImageMagick's -resize percentage."""
+    return max(1, int(round(size[0] / factor))), max(1, int(round(size[1] / factor)))
+
+
+def _stale_levels(src: str, outputs: Dict[int, str], key: str, previous: Optional[Dict[str, Any]]) -> List[int]:
+    done = (previous or {}).get("levels", {}) if (previous or {}).get("key") == key else {}
+    return [f for f, path in outputs.items() if str(f) not in done or not os.path.isfile(path) or os.path.getsize(path) != done[str(f)]]
+
+
+def _pyramid_one(src: str, outputs: Dict[int, str], params: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Worker: write the stale levels of one image from a single decode. Runs in a child process."""
+    start = time.perf_counter()
+    st = os.stat(src)
+    result: Dict[str, Any] = {"source": src, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "bytes_in": st.st_size}
+    same_stat = previous is not None and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns
+    digest = previous["sha256"] if same_stat else hash_file(src)
+    key = hash_params({"source": digest, "params": params})
+    result.update(sha256=digest, key=key)
+    stale = _stale_levels(src, outputs, key, previous)
+    levels = {str(f): os.path.getsize(p) for f, p in outputs.items() if f not in stale}
+    if not stale:
+        result.update(status="skipped", levels=levels, seconds=time.perf_counter() - start)
+        return result
+
+    try:
+        from PIL import Image
+
+        fmt = _SAVE_FORMATS.get(os.path.splitext(src)[1].lower(), "PNG")
+        with Image.open(src) as img:
+            img.load()
+            for factor in sorted(stale):
+                out = img.resize(level_size(img.size, factor), Image.LANCZOS, reducing_gap=REDUCING_GAP)
+                path = outputs[factor]
+                tmp = path + ".part"
+                save_kwargs = {"quality": params["quality"]} if fmt in ("JPEG", "WEBP") else {}
+                out.save(tmp, fmt, **save_kwargs)
+                os.replace(tmp, path)
+                levels[str(factor)] = os.path.getsize(path)
+        result.update(status="built", levels=levels, written=sorted(stale))
+    except Exception as e:
+        result.update(status="error", error=str(e))
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def build_pyramid(
+    scene_path: str,
+    levels: Sequence[int] = LEVELS,
+    source_dir: Optional[str] = None,
+    quality: int = 95,
+    workers: Optional[int] = None,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """Write scene_path/images_<f> for every factor f in levels from scene_path/images.
+
+    Args:
+        levels: Integer downscale factors
+        source_dir: Full-resolution images (default: scene_path/images, the undistorted output)
+        quality: JPEG/WebP quality of the levels (other formats are lossless)
+        workers: Process count (default: os.cpu_count()); 0 runs in-process
+
+    Level images no longer backed by a source are removed. Returns a report with counts, per-image
+    results and throughput.
+    """
+    if any(int(f) < 2 for f in levels):
+        raise ValueError(f"Pyramid factors must be integers >= 2, got {list(levels)}")
+    levels = sorted({int(f) for f in levels})
+    source_dir = source_dir or os.path.join(scene_path, "images")
+    manifest_path = os.path.join(scene_path, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    params = {"quality": quality, "reducing_gap": REDUCING_GAP}
+    names = list_images(source_dir)
+    for factor in levels:
+        out_dir = level_dir(scene_path, factor)
+        os.makedirs(out_dir, exist_ok=True)
+        keep = set(names)
+        for name in os.listdir(out_dir):
+            if name not in keep and os.path.isfile(os.path.join(out_dir, name)):
+                os.remove(os.path.join(out_dir, name))
+    jobs = [
+        (os.path.join(source_dir, n), {f: os.path.join(level_dir(scene_path, f), n) for f in levels}, params, manifest.get(n))
+        for n in names
+    ]
+    if verbose:
+        print(f"Building image pyramid (1/{', 1/'.join(map(str, levels))}) for {len(jobs)} images in {source_dir}")
+
+    start = time.perf_counter()
+    if workers == 0 or len(jobs) <= 1:
+        results = [_pyramid_one(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_pyramid_one, *zip(*jobs)))
+    elapsed = time.perf_counter() - start
+
+    new_manifest = {}
+    counts: Dict[str, int] = {}
+    for name, res in zip(names, results):
+        counts[res["status"]] = counts.get(res["status"], 0) + 1
+        if res["status"] == "error":
+            if verbose:
+                print(f"ERROR building pyramid for {name}: {res.get('error')}")
+            continue
+        new_manifest[name] = {k: res[k] for k in ("size", "mtime_ns", "sha256", "key", "levels")}
+    save_manifest(manifest_path, new_manifest)
+
+    bytes_in = sum(r["bytes_in"] for r in results if r["status"] == "built")
+    report = {
+        "total": len(results),
+        "levels": levels,
+        "counts": counts,
+        "elapsed_s": elapsed,
+        "images_per_s": len(results) / elapsed if elapsed > 0 else 0.0,
+        "mb_per_s": bytes_in / 1e6 / elapsed if elapsed > 0 else 0.0,
+        "results": results,
+    }
+    if verbose:
+        summary = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        print(f"Pyramid complete in {elapsed:.2f}s ({report['images_per_s']:.1f} img/s): {summary}")
+    return report
@@ -0,0 +1,292 @@
+"""Packed image shards: a scene's training images in a few large files, read through mmap.
+
+Reading thousands of small JPEGs from a network mount (Google Drive on Colab) costs a round trip per
+file on every training run. `pack_images` writes the undistorted images of a scene, at a chosen
+resolution, into shard files of about shard_bytes each:
+
+* mode "encoded": the image files' bytes as they are (JPEG blobs for a JPEG scene); only re-encoded,
+  in the source's format, when packing a downscaled resolution the pyramid has not written
+* mode "raw": pre-decoded uint8 H x W x C arrays, 64-byte aligned, readable without decoding
+
+plus shards/index.json listing, per image, its shard, byte offset, length and shape. `ShardReader`
+maps every shard once and serves images as zero-copy views (raw) or decodes from the mapping (encoded),
+with no per-image file opens. `copy_shards` moves the shards to local disk in a few large sequential
+copies, and `extract_images` rebuilds a plain images/ folder there (same file names as the sparse model)
+for tools that only read files, such as gaussian-splatting's train.py.
+"""
+from __future__ import annotations
+
+import io
+import json
+import mmap
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.convert import pyramid
+from src.core.hashing import hash_file
+from src.ingest import list_images
+
+MODES = ("encoded", "raw")
+INDEX_FILE = "index.json"
+SHARD_BYTES = 1 << 30
+ALIGN = 64
+COPY_BUFFER = 16 << 20
+
+
+def source_dir(scene_path: str, resolution: int) -> Tuple[str, bool]:
+    """(folder to read, needs resize): images_<r> from the pyramid if present, else images/."""
+    if resolution > 1:
+        level = os.path.join(scene_path, f"images_{resolution}")
+        if os.path.isdir(level):
+            return level, False
+    return os.path.join(scene_path, "images"), resolution > 1
+
+
+def _encode(path: str, mode: str, resolution: int, resize: bool, quality: int) -> Tuple[bytes, List[int]]:
+    from PIL import Image
+
+    if mode == "encoded" and not resize:
+        with Image.open(path) as img:
+            shape = [img.height, img.width, len(img.getbands())]
+        with open(path, "rb") as f:
+            return f.read(), shape
+    with Image.open(path) as img:
+        img.load()
+        if resize:
+            img = img.resize(pyramid.level_size(img.size, resolution), Image.LANCZOS, reducing_gap=pyramid.REDUCING_GAP)
+        if mode == "raw":
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+            pixels = np.asarray(img, dtype=np.uint8)
+            pixels = pixels.reshape(pixels.shape[0], pixels.shape[1], -1)
+            return pixels.tobytes(), list(pixels.shape)
+        fmt = pyramid._SAVE_FORMATS.get(os.path.splitext(path)[1].lower(), "PNG")
+        buf = io.BytesIO()
+        img.save(buf, fmt, **({"quality": quality} if fmt in ("JPEG", "WEBP") else {}))
+        return buf.getvalue(), [img.height, img.width, len(img.getbands())]
+
+
+def pack_images(
+    scene_path: str,
+    out_dir: Optional[str] = None,
+    resolution: int = 1,
+    mode: str = "encoded",
+    shard_bytes: int = SHARD_BYTES,
+    quality: int = 95,
+    workers: int = 8,
+) -> Dict[str, Any]:
+    """Pack scene_path's training images into shards under out_dir (default scene_path/shards).
+
+    resolution is a downscale factor: images_<resolution> is used when the pyramid exists, otherwise
+    images/ is resized while packing. Images are encoded on a thread pool (Pillow releases the GIL)
+    and appended in name order. Returns the index, which is also written to out_dir/index.json.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown shard mode {mode!r}; expected one of {', '.join(MODES)}")
+    start = time.perf_counter()
+    out_dir = out_dir or os.path.join(scene_path, "shards")
+    source, resize = source_dir(scene_path, resolution)
+    names = list_images(source)
+    if not names:
+        raise FileNotFoundError(f"No images to pack in {source}")
+    os.makedirs(out_dir, exist_ok=True)
+    for stale in os.listdir(out_dir):
+        if stale.startswith("shard-") or stale == INDEX_FILE:
+            os.remove(os.path.join(out_dir, stale))
+
+    shards: List[Dict[str, Any]] = []
+    entries: List[Dict[str, Any]] = []
+    f = None
+    offset = 0
+
+    def close_shard() -> None:
+        if f is not None:
+            f.close()
+            shards[-1]["bytes"] = offset
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # Bounded look-ahead so memory stays at a few images however large the scene.
+            pending: List[Any] = []
+            queue = iter(names)
+            for name in queue:
+                pending.append((name, pool.submit(_encode, os.path.join(source, name), mode, resolution, resize, quality)))
+                if len(pending) >= 2 * max(1, workers):
+                    break
+            while pending:
+                name, fut = pending.pop(0)
+                nxt = next(queue, None)
+                if nxt is not None:
+                    pending.append((nxt, pool.submit(_encode, os.path.join(source, nxt), mode, resolution, resize, quality)))
+                data, shape = fut.result()
+                if f is None or (offset and offset + len(data) > shard_bytes):
+                    close_shard()
+                    shards.append({"file": f"shard-{len(shards):05d}.bin"})
+                    f = open(os.path.join(out_dir, shards[-1]["file"]), "wb")
+                    offset = 0
+                pad = -offset % ALIGN
+                if pad:
+                    f.write(b"\0" * pad)
+                    offset += pad
+                f.write(data)
+                entries.append({"name": name, "shard": len(shards) - 1, "offset": offset, "length": len(data), "shape": shape})
+                offset += len(data)
+    finally:
+        close_shard()
+
+    for shard in shards:
+        shard["sha256"] = hash_file(os.path.join(out_dir, shard["file"]))
+    index = {
+        "version": 1,
+        "mode": mode,
+        "resolution": resolution,
+        "source": os.path.relpath(source, scene_path),
+        "shards": shards,
+        "images": entries,
+    }
+    with open(os.path.join(out_dir, INDEX_FILE + ".tmp"), "w", encoding="utf-8") as fh:
+        json.dump(index, fh, indent=1)
+    os.replace(os.path.join(out_dir, INDEX_FILE + ".tmp"), os.path.join(out_dir, INDEX_FILE))
+    total = sum(s["bytes"] for s in shards)
+    print(f"Packed {len(entries)} images ({mode}, 1/{resolution}) into {len(shards)} shard(s), {total / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+    return index
+
+
+class ShardReader:
+    """Random access to packed images through one read-only mmap per shard.
+
+    reader[i] or reader["name.jpg"] returns an H x W x C uint8 array: a zero-copy view of the mapping
+    for raw shards, a decode from the mapped bytes for encoded shards. Use as a context manager or call
+    close(); views returned for raw shards must not outlive it.
+    """
+
+    def __init__(self, shard_dir: str):
+        with open(os.path.join(shard_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        self.shard_dir = shard_dir
+        self.mode = self.index["mode"]
+        self.entries = self.index["images"]
+        self.names = [e["name"] for e in self.entries]
+        self._by_name = {n: i for i, n in enumerate(self.names)}
+        self._files = []
+        self._maps: List[mmap.mmap] = []
+        for shard in self.index["shards"]:
+            fh = open(os.path.join(shard_dir, shard["file"]), "rb")
+            self._files.append(fh)
+            self._maps.append(mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _entry(self, key: Union[int, str]) -> Dict[str, Any]:
+        return self.entries[self._by_name[key] if isinstance(key, str) else key]
+
+    def raw_bytes(self, key: Union[int, str]) -> memoryview:
+        """The stored bytes of an image (file contents or raw pixels) as a view of the mapping."""
+        e = self._entry(key)
+        return memoryview(self._maps[e["shard"]])[e["offset"] : e["offset"] + e["length"]]
+
+    def __getitem__(self, key: Union[int, str]) -> np.ndarray:
+        e = self._entry(key)
+        if self.mode == "raw":
+            return np.frombuffer(self._maps[e["shard"]], dtype=np.uint8, count=e["length"], offset=e["offset"]).reshape(e["shape"])
+        from PIL import Image
+
+        with Image.open(io.BytesIO(self.raw_bytes(key))) as img:
+            pixels = np.asarray(img)
+        return pixels.reshape(pixels.shape[0], pixels.shape[1], -1)
+
+    def __iter__(self) -> Iterator[Tuple[str, np.ndarray]]:
+        for i, name in enumerate(self.names):
+            yield name, self[i]
+
+    def close(self) -> None:
+        for m in self._maps:
+            try:
+                m.close()
+            except BufferError:
+                pass  # a caller still holds a view; the mapping is released with it
+        for fh in self._files:
+            fh.close()
+        self._maps, self._files = [], []
+
+    def __enter__(self) -> "ShardReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _copy_one(src: str, dst: str, digest: Optional[str]) -> Dict[str, Any]:
+    if os.path.isfile(dst) and os.path.getsize(dst) == os.path.getsize(src) and (digest is None or hash_file(dst) == digest):
+        return {"file": os.path.basename(src), "status": "skipped", "bytes": 0}
+    tmp = dst + ".part"
+    with open(src, "rb") as fs, open(tmp, "wb") as fd:
+        shutil.copyfileobj(fs, fd, COPY_BUFFER)
+    os.replace(tmp, dst)
+    return {"file": os.path.basename(src), "status": "copied", "bytes": os.path.getsize(dst)}
+
+
+def copy_shards(shard_dir: str, local_dir: str, workers: int = 4, verify: bool = True) -> Dict[str, Any]:
+    """Copy the shards and index to local_dir with large sequential reads, skipping intact copies.
+
+    verify=True compares existing local shards against the index's sha256 (otherwise size only).
+    Returns {"copied", "skipped", "bytes", "seconds", "mb_per_s"}.
+    """
+    start = time.perf_counter()
+    with open(os.path.join(shard_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    os.makedirs(local_dir, exist_ok=True)
+    jobs = [(os.path.join(shard_dir, s["file"]), os.path.join(local_dir, s["file"]), s.get("sha256") if verify else None) for s in index["shards"]]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(lambda job: _copy_one(*job), jobs))
+    shutil.copy2(os.path.join(shard_dir, INDEX_FILE), os.path.join(local_dir, INDEX_FILE))
+    elapsed = time.perf_counter() - start
+    moved = sum(r["bytes"] for r in results)
+    report = {
+        "copied": sum(1 for r in results if r["status"] == "copied"),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "bytes": moved,
+        "seconds": elapsed,
+        "mb_per_s": moved / 1e6 / elapsed if elapsed > 0 else 0.0,
+    }
+    print(f"Shards -> {local_dir}: {report['copied']} copied, {report['skipped']} up to date ({moved / 1e6:.1f} MB, {report['mb_per_s']:.0f} MB/s)")
+    return report
+
+
+def extract_images(shard_dir: str, out_dir: str, quality: int = 95) -> int:
+    """Write every packed image to out_dir/<name>, the name the sparse model refers to. Returns the count.
+
+    Encoded shards give back the stored file bytes (files already there at the right size are kept).
+    Raw pixels are encoded in the format of the name's extension (JPEG at `quality`, PNG/TIFF lossless).
+    Other files in out_dir are removed, so it mirrors the shards.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with ShardReader(shard_dir) as reader:
+        wanted = set(reader.names)
+        for name in os.listdir(out_dir):
+            if name not in wanted and os.path.isfile(os.path.join(out_dir, name)):
+                os.remove(os.path.join(out_dir, name))
+        for i, e in enumerate(reader.entries):
+            path = os.path.join(out_dir, e["name"])
+            if reader.mode == "encoded":
+                if os.path.isfile(path) and os.path.getsize(path) == e["length"]:
+                    continue
+                with open(path + ".part", "wb") as f:
+                    f.write(reader.raw_bytes(i))
+            else:
+                from PIL import Image
+
+                pixels = reader[i]
+                img = Image.fromarray(pixels[:, :, 0] if pixels.shape[2] == 1 else pixels)
+                fmt = pyramid._SAVE_FORMATS.get(os.path.splitext(path)[1].lower(), "PNG")
+                if fmt == "JPEG" and img.mode == "RGBA":
+                    img = img.convert("RGB")
+                img.save(path + ".part", fmt, **({"quality": quality} if fmt in ("JPEG", "WEBP") else {}))
+            os.replace(path + ".part", path)
+        return len(reader)
@@ -0,0 +1,234 @@
+"""Sparse point cloud cleanup between COLMAP and training.
+
+gaussian-splatting initialises one Gaussian per COLMAP point, so floaters and badly triangulated
+points become Gaussians that cost time on every iteration until densification prunes them.
+`clean_points` selects the points worth keeping:
+
+* track length and reprojection error thresholds on COLMAP's own per-point statistics
+* statistical outlier removal: a point whose mean distance to its nb_neighbors nearest neighbours
+  exceeds mean + std_ratio * std over the cloud is dropped
+* optional voxel downsampling of dense regions, keeping per voxel the point with the longest track
+
+Neighbours come from a vectorised grid hash (points sorted by cell, candidate pairs from the 27
+surrounding cells, processed in bounded chunks), so no per-point Python loop or SciPy is needed;
+the few points too sparse for the first grid are retried on coarser ones (see `knn_mean_distance`). `clean_model` applies
+the selection with `colmap_model.subset_model`, so tracks and 2D observations stay consistent.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.convert import colmap_model
+
+NB_NEIGHBORS = 16
+STD_RATIO = 2.0
+MIN_TRACK_LENGTH = 3
+MAX_ERROR = 2.0
+PAIR_CHUNK = 1 << 22
+# Neighbour search gives up at this multiple of the first cell size; distances beyond count as it.
+MAX_GROWTH = 8
+# Filters off: the model is written back unchanged.
+DISABLED = {"nb_neighbors": 0, "min_track_length": 0, "max_error": None, "voxel_size": None}
+
+
+def _cell_size(xyz: np.ndarray, nb_neighbors: int, steps: int = 4) -> float:
+    """Cell edge whose ball holds about 1.5 * nb_neighbors points where the average point lies.
+
+    Starts from the inner-90% bounding box density and corrects it with the measured occupancy of
+    the grid (points per cell, weighted per point), since sparse clouds concentrate on surfaces.
+    """
+    lo, hi = np.percentile(xyz, [5, 95], axis=0)
+    extent = np.maximum(hi - lo, 1e-9)
+    cell = float(np.prod(extent) / (0.9 * len(xyz))) ** (1 / 3) * (1.5 * nb_neighbors / (4 / 3 * np.pi)) ** (1 / 3)
+    target = 1.5 * nb_neighbors / (4 / 3 * np.pi)
+    for _ in range(steps):
+        coords = np.floor((xyz - xyz.min(axis=0)) / cell).astype(np.int64)
+        dims = coords.max(axis=0) + 1
+        _, counts = np.unique((coords[:, 0] * dims[1] + coords[:, 1]) * dims[2] + coords[:, 2], return_counts=True)
+        occupancy = float(np.square(counts).sum()) / len(xyz)
+        if target / 1.5 < occupancy < target * 1.5:
+            break
+        cell *= (target / occupancy) ** (1 / 3)
+    return max(cell, 1e-9)
+
+
+def _neighbour_runs(keys: np.ndarray, cells: np.ndarray, starts: np.ndarray, counts: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(len(keys), 27) start and length, in cell-sorted order, of the points in each surrounding cell."""
+    neighbour = keys[:, None] + offsets[None, :]
+    slot = np.clip(np.searchsorted(cells, neighbour), 0, len(cells) - 1)
+    present = cells[slot] == neighbour
+    return np.where(present, starts[slot], 0), np.where(present, counts[slot], 0)
+
+
+def _grid_knn(xyz: np.ndarray, queries: np.ndarray, nb_neighbors: int, cell: float, chunk: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum of distances to, and count of, the (at most nb_neighbors) nearest neighbours within cell of each query.
+
+    Every point within `cell` of a query lies in its 3x3x3 block of cells, so the result is exact
+    up to that radius. Candidate pairs are generated for as many queries at a time as fit in about chunk pairs.
+    """
+    coords = np.floor((xyz - xyz.min(axis=0)) / cell).astype(np.int64) + 1
+    dims = coords.max(axis=0) + 2
+    keys = (coords[:, 0] * dims[1] + coords[:, 1]) * dims[2] + coords[:, 2]
+    # Work in cell-sorted order so a query's candidates are neighbours in memory too.
+    order = np.argsort(keys, kind="stable")
+    cells, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    axes = [np.ascontiguousarray(xyz[order, i] - xyz[:, i].min(), dtype=np.float32) for i in range(3)]
+    offsets = np.array([(dx * dims[1] + dy) * dims[2] + dz for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)])
+    rank_of = np.empty(len(xyz), dtype=np.int64)
+    rank_of[order] = np.arange(len(xyz))
+    perm = np.argsort(rank_of[queries], kind="stable")
+    qpos = rank_of[queries][perm]  # query positions in sorted order
+    qkeys = keys[order][qpos]
+
+    block = max(1, chunk // 64)
+    per_query = np.concatenate([_neighbour_runs(qkeys[s : s + block], cells, starts, counts, offsets)[1].sum(axis=1) for s in range(0, len(qpos), block)])
+    cumulative = np.cumsum(per_query)
+    sums, found = np.zeros(len(qpos)), np.zeros(len(qpos), dtype=np.int64)
+    lo = 0
+    while lo < len(qpos):
+        done = cumulative[lo - 1] if lo else 0
+        hi = min(len(qpos), max(lo + 1, int(np.searchsorted(cumulative, done + chunk, side="right"))))
+        run_start, run_count = _neighbour_runs(qkeys[lo:hi], cells, starts, counts, offsets)
+        rs, rc = run_start.reshape(-1), run_count.reshape(-1)
+        repeats = per_query[lo:hi]
+        query = np.repeat(np.arange(lo, hi), repeats)
+        # Ragged arange: candidate j of run r is rs[r] + j.
+        cand = np.repeat(rs - (np.cumsum(rc) - rc), rc) + np.arange(len(query))
+        sq = np.zeros(len(query), dtype=np.float32)
+        for a in axes:
+            sq += np.square(a[cand] - np.repeat(a[qpos[lo:hi]], repeats))
+        mask = (sq < cell * cell) & (cand != qpos[query])
+        query, dist = query[mask], np.sqrt(sq[mask])
+        # query is already grouped; one sort on query + dist / cell orders each group by distance.
+        srt = np.argsort(query + dist / cell, kind="stable")
+        query, dist = query[srt], dist[srt]
+        first = np.searchsorted(query, np.arange(lo, hi))
+        rank = np.arange(len(query)) - np.repeat(first, np.diff(np.r_[first, len(query)]))
+        keep = rank < nb_neighbors
+        sums[lo:hi] = np.bincount(query[keep] - lo, weights=dist[keep], minlength=hi - lo)
+        found[lo:hi] = np.bincount(query[keep] - lo, minlength=hi - lo)
+        lo = hi
+    # Back to the caller's query order.
+    out_sums, out_found = np.empty_like(sums), np.empty_like(found)
+    out_sums[perm], out_found[perm] = sums, found
+    return out_sums, out_found
+
+
+def knn_mean_distance(xyz: np.ndarray, nb_neighbors: int = NB_NEIGHBORS, cell: Optional[float] = None, chunk: int = PAIR_CHUNK) -> np.ndarray:
+    """Mean distance of every point to its nb_neighbors nearest neighbours (grid-hash search).
+
+    The first pass uses cells sized for the cloud's typical density; points with fewer than
+    nb_neighbors neighbours inside one cell (the sparse ones) are searched again with cells twice as
+    large, up to MAX_GROWTH times the first size. Neighbours still farther away are counted at that
+    radius, far beyond any outlier threshold, which keeps isolated points from scanning dense regions.
+    """
+    xyz = np.asarray(xyz, dtype=np.float64)
+    n = len(xyz)
+    if n < 2 or nb_neighbors < 1:
+        return np.zeros(n)
+    nb_neighbors = min(nb_neighbors, n - 1)
+    cell = cell or _cell_size(xyz, nb_neighbors)
+    limit = cell * MAX_GROWTH
+    result = np.empty(n)
+    todo = np.arange(n)
+    while len(todo):
+        sums, found = _grid_knn(xyz, todo, nb_neighbors, cell, chunk)
+        done = (found >= nb_neighbors) | (cell >= limit)
+        result[todo[done]] = (sums[done] + (nb_neighbors - found[done]) * cell) / nb_neighbors
+        todo = todo[~done]
+        cell *= 2
+    return result
+
+
+def voxel_representatives(xyz: np.ndarray, voxel_size: float, score: np.ndarray) -> np.ndarray:
+    """Boolean mask keeping the highest-score point of every occupied voxel."""
+    voxel = np.floor(np.asarray(xyz) / voxel_size).astype(np.int64)
+    _, cell = np.unique(voxel, axis=0, return_inverse=True)
+    cell = cell.reshape(-1)
+    order = np.lexsort((-np.asarray(score, dtype=np.float64), cell))
+    first = np.r_[True, cell[order][1:] != cell[order][:-1]]
+    keep = np.zeros(len(xyz), dtype=bool)
+    keep[order[first]] = True
+    return keep
+
+
+def clean_points(
+    model: colmap_model.SparseModel,
+    nb_neighbors: int = NB_NEIGHBORS,
+    std_ratio: float = STD_RATIO,
+    min_track_length: int = MIN_TRACK_LENGTH,
+    max_error: Optional[float] = MAX_ERROR,
+    voxel_size: Optional[float] = None,
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Keep mask over model.points3D and a report of how many points each filter removed.
+
+    Filters run in order (track length, error, outliers, voxels), each on the survivors of the last;
+    nb_neighbors=0 disables outlier removal and voxel_size=None disables downsampling.
+    """
+    start = time.perf_counter()
+    points = model.points3D
+    keep = np.ones(len(points), dtype=bool)
+    removed: Dict[str, int] = {}
+
+    def apply(name: str, mask: np.ndarray) -> None:
+        removed[name] = int((keep & ~mask).sum())
+        keep[:] &= mask
+
+    if min_track_length:
+        apply("track_length", model.track_lengths >= min_track_length)
+    if max_error is not None:
+        apply("reprojection_error", points["error"] <= max_error)
+    if nb_neighbors and keep.sum() > nb_neighbors:
+        idx = np.flatnonzero(keep)
+        mean_dist = knn_mean_distance(points["xyz"][idx], nb_neighbors)
+        inlier = np.ones(len(points), dtype=bool)
+        inlier[idx] = mean_dist <= mean_dist.mean() + std_ratio * mean_dist.std()
+        apply("statistical_outlier", inlier)
+    if voxel_size:
+        idx = np.flatnonzero(keep)
+        lengths = model.track_lengths[idx].astype(np.float64)
+        score = lengths - points["error"][idx] / (points["error"][idx].max() + 1.0)  # ties: lower error wins
+        rep = np.zeros(len(points), dtype=bool)
+        rep[idx] = voxel_representatives(points["xyz"][idx], voxel_size, score)
+        apply("voxel_downsample", rep)
+
+    report = {
+        "points_before": int(len(points)),
+        "points_after": int(keep.sum()),
+        "removed": removed,
+        "seconds": time.perf_counter() - start,
+    }
+    return keep, report
+
+
+def clean_model(model_dir: str, out_dir: Optional[str] = None, verbose: bool = True, **filters: Any) -> Dict[str, Any]:
+    """Read the model in model_dir, drop the points rejected by `clean_points` and write it to out_dir.
+
+    out_dir defaults to model_dir (in place); the original format (.bin or .txt) is kept. filters go to
+    `clean_points`. A points3D.ply left in out_dir is removed: gaussian-splatting reuses that cached
+    conversion when present and would otherwise train from the old points. Returns the report of
+    `clean_points` with the total time including I/O.
+    """
+    start = time.perf_counter()
+    ext = colmap_model.detect_model_ext(model_dir)
+    model = colmap_model.read_model(model_dir, ext)
+    keep, report = clean_points(model, **filters)
+    cleaned = colmap_model.subset_model(model, np.ones(len(model.images), dtype=bool), keep)
+    out_dir = out_dir or model_dir
+    colmap_model.write_model(cleaned, out_dir, ext=ext)
+    stale_ply = os.path.join(out_dir, "points3D.ply")
+    if os.path.isfile(stale_ply):
+        os.remove(stale_ply)
+    report["points_after"] = int(len(cleaned.points3D))
+    report["total_seconds"] = time.perf_counter() - start
+    if verbose:
+        detail = ", ".join(f"{k} {v}" for k, v in report["removed"].items()) or "no filters"
+        print(
+            f"Sparse cleanup: {report['points_before']} -> {report['points_after']} points "
+            f"({report['points_before'] - report['points_after']} removed: {detail}) in {report['total_seconds']:.2f}s"
+        )
+    return report
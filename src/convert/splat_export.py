@@ -0,0 +1,453 @@
+"""Compact and export trained Gaussian splats for download and web viewers.
+
+`export_splats` streams a gaussian-splatting point_cloud.ply (see `src.convert.gaussian_ply`) in two
+passes over the memory map:
+
+1. prune: drop Gaussians that are nearly transparent, oversized or outside a bounding box, and work out
+   the output order (Morton order for chunk-quantized PLY, so each chunk covers a small region)
+2. encode: gather kept Gaussians block by block, optionally truncate the SH degree, and write each format
+
+Only per-Gaussian scalars (mask, sort key, index) are held for the whole cloud; full records are touched
+one block at a time. Formats:
+
+* "splat": the 32-byte antimatter15 .splat record (float32 position/scale, 8-bit RGBA and rotation),
+  sorted by visual importance as web viewers expect
+* "compressed_ply": the chunked PLY used by PlayCanvas/SuperSplat; every 256 Gaussians share min/max
+  bounds and positions/scales are packed 11-10-11 bits, rotations 2+10-10-10, colour 8-8-8-8, SH 8-bit
+* "half_ply": the gaussian-splatting layout with every attribute stored as float16. PLY has no half
+  type, so the fields are declared "ushort" with a "comment half_float" flag: only `gaussian_ply` reads
+  them back as floats (other PLY readers and viewers see integers). A repo-internal, half-size archive;
+  use "compressed_ply" for a quantized file viewers can open
+* "ply": the standard float32 layout, pruned and SH-truncated only
+
+Each format is decoded again in memory while writing, so the report carries the exact attribute error
+it introduced (max and RMS against the pruned, SH-truncated cloud, in activated units: linear scale,
+sigmoid opacity, RGB colour, unit quaternions) next to the size reduction.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.convert import gaussian_ply
+
+FORMATS = ("splat", "compressed_ply", "half_ply", "ply")
+DEFAULT_FORMATS = ("splat", "compressed_ply")
+SUFFIXES = {"splat": ".splat", "compressed_ply": ".compressed.ply", "half_ply": ".half.ply", "ply": ".ply"}
+SH_C0 = 0.28209479177387814
+PACK_CHUNK = 256  # Gaussians per quantization chunk in compressed_ply
+BLOCK = 1 << 18  # Gaussians gathered per encode step (a multiple of PACK_CHUNK)
+
+SPLAT_DTYPE = np.dtype([("position", "<f4", 3), ("scale", "<f4", 3), ("rgba", "u1", 4), ("rotation", "u1", 4)])
+CHUNK_FIELDS = (
+    "min_x", "min_y", "min_z", "max_x", "max_y", "max_z",
+    "min_scale_x", "min_scale_y", "min_scale_z", "max_scale_x", "max_scale_y", "max_scale_z",
+    "min_r", "min_g", "min_b", "max_r", "max_g", "max_b",
+)
+PACKED_CHUNK_DTYPE = np.dtype([(n, "<f4") for n in CHUNK_FIELDS])
+PACKED_VERTEX_DTYPE = np.dtype([("packed_position", "<u4"), ("packed_rotation", "<u4"), ("packed_scale", "<u4"), ("packed_color", "<u4")])
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _unit_quats(q: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(q, axis=1, keepdims=True)
+    return q / np.where(norm > 0, norm, 1.0)
+
+
+def activated(rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Attribute groups in the units viewers render with, used as the reference for error reporting."""
+    out = {
+        "positions": gaussian_ply.field_block(rows, "positions").astype(np.float64),
+        "scales": np.exp(gaussian_ply.field_block(rows, "scales").astype(np.float64)),
+        "colors": 0.5 + SH_C0 * gaussian_ply.field_block(rows, "sh_dc").astype(np.float64),
+        "opacity": _sigmoid(gaussian_ply.field_block(rows, "opacity").astype(np.float64)),
+        "rotations": _unit_quats(gaussian_ply.field_block(rows, "rotations").astype(np.float64)),
+    }
+    rest = gaussian_ply.field_block(rows, "sh_rest")
+    if rest.shape[1]:
+        out["sh_rest"] = rest.astype(np.float64)
+    return out
+
+
+class ErrorStats:
+    """Running max-abs and RMS error per attribute group across blocks."""
+
+    def __init__(self) -> None:
+        self.max: Dict[str, float] = {}
+        self.sq: Dict[str, float] = {}
+        self.count: Dict[str, int] = {}
+
+    def add(self, reference: Dict[str, np.ndarray], decoded: Dict[str, np.ndarray]) -> None:
+        for group, dec in decoded.items():
+            ref = reference[group]
+            if group == "rotations":
+                # q and -q are the same rotation
+                dec = np.where(np.sum(ref * dec, axis=1, keepdims=True) < 0, -dec, dec)
+            diff = np.abs(ref - dec)
+            if not diff.size:
+                continue
+            self.max[group] = max(self.max.get(group, 0.0), float(diff.max()))
+            self.sq[group] = self.sq.get(group, 0.0) + float(np.square(diff).sum())
+            self.count[group] = self.count.get(group, 0) + diff.size
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {g: {"max_abs": self.max[g], "rmse": (self.sq[g] / self.count[g]) ** 0.5} for g in sorted(self.max)}
+
+
+# -- pruning and ordering ---------------------------------------------------
+
+
+def prune_mask(
+    data: np.ndarray,
+    min_opacity: float = 0.0,
+    max_scale: Optional[float] = None,
+    bbox: Optional[Sequence[Sequence[float]]] = None,
+    chunk_size: int = gaussian_ply.CHUNK_SIZE,
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Boolean keep mask plus {"opacity", "scale", "bbox": number removed} (first failing rule counts).
+
+    Args:
+        min_opacity: Drop Gaussians whose activated opacity is below this
+        max_scale: Drop Gaussians whose largest activated scale exceeds this (scene units)
+        bbox: ((min_x, min_y, min_z), (max_x, max_y, max_z)); Gaussians centred outside are dropped
+    """
+    keep = np.ones(len(data), dtype=bool)
+    pruned = {"opacity": 0, "scale": 0, "bbox": 0}
+    for s in range(0, len(data), chunk_size):
+        block = data[s : s + chunk_size]
+        ok = np.ones(len(block), dtype=bool)
+        if min_opacity > 0:
+            bad = _sigmoid(block["opacity"].astype(np.float64)) < min_opacity
+            pruned["opacity"] += int(np.count_nonzero(bad & ok))
+            ok &= ~bad
+        if max_scale is not None:
+            bad = gaussian_ply.field_block(block, "scales").max(axis=1) > np.log(max_scale)
+            pruned["scale"] += int(np.count_nonzero(bad & ok))
+            ok &= ~bad
+        if bbox is not None:
+            pos = gaussian_ply.field_block(block, "positions")
+            lo, hi = np.asarray(bbox[0], dtype=np.float32), np.asarray(bbox[1], dtype=np.float32)
+            bad = np.any((pos < lo) | (pos > hi), axis=1)
+            pruned["bbox"] += int(np.count_nonzero(bad & ok))
+            ok &= ~bad
+        keep[s : s + len(block)] = ok
+    return keep, pruned
+
+
+def _part1by2(v: np.ndarray) -> np.ndarray:
+    # Spread the low 10 bits of v so two zero bits follow each one (3D Morton interleave).
+    v = v.astype(np.uint32) & 0x3FF
+    v = (v | (v << 16)) & 0x030000FF
+    v = (v | (v << 8)) & 0x0300F00F
+    v = (v | (v << 4)) & 0x030C30C3
+    v = (v | (v << 2)) & 0x09249249
+    return v
+
+
+def position_bounds(data: np.ndarray, index: np.ndarray, chunk_size: int = gaussian_ply.CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """(min, max) of the centres of data[index], computed chunk by chunk."""
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for s in range(0, len(index), chunk_size):
+        pos = gaussian_ply.field_block(data[index[s : s + chunk_size]], "positions")
+        lo = np.minimum(lo, pos.min(axis=0))
+        hi = np.maximum(hi, pos.max(axis=0))
+    return lo, hi
+
+
+def morton_codes(positions: np.ndarray, lo: np.ndarray, size: np.ndarray) -> np.ndarray:
+    """30-bit Morton codes (10 bits per axis, x in the lowest bit of each triplet) within the box lo + [0, size]."""
+    q = np.clip((positions - lo) / np.where(size > 0, size, 1.0) * 1024.0, 0, 1023).astype(np.uint32)
+    return _part1by2(q[:, 0]) | (_part1by2(q[:, 1]) << 1) | (_part1by2(q[:, 2]) << 2)
+
+
+def morton_order(data: np.ndarray, index: np.ndarray, chunk_size: int = gaussian_ply.CHUNK_SIZE) -> np.ndarray:
+    """index reordered along a Morton curve of the Gaussians' positions."""
+    lo, hi = position_bounds(data, index, chunk_size)
+    codes = np.empty(len(index), dtype=np.uint32)
+    for s in range(0, len(index), chunk_size):
+        pos = gaussian_ply.field_block(data[index[s : s + chunk_size]], "positions")
+        codes[s : s + len(pos)] = morton_codes(pos, lo, hi - lo)
+    return index[np.argsort(codes, kind="stable")]
+
+
+def importance(rows: np.ndarray) -> np.ndarray:
+    """log(volume x opacity) per Gaussian: how much it contributes to a rendered view."""
+    return gaussian_ply.field_block(rows, "scales").astype(np.float64).sum(axis=1) + np.log(_sigmoid(rows["opacity"].astype(np.float64)) + 1e-12)
+
+
+def importance_order(data: np.ndarray, index: np.ndarray, chunk_size: int = gaussian_ply.CHUNK_SIZE) -> np.ndarray:
+    """index sorted by decreasing volume x opacity (the order .splat viewers load progressively)."""
+    key = np.empty(len(index), dtype=np.float64)
+    for s in range(0, len(index), chunk_size):
+        block = data[index[s : s + chunk_size]]
+        key[s : s + len(block)] = importance(block)
+    return index[np.argsort(-key, kind="stable")]
+
+
+def truncate_sh(rows: np.ndarray, degree: int) -> np.ndarray:
+    """Copy of rows with f_rest_* reduced to SH degree `degree` (channel-major layout kept)."""
+    current = gaussian_ply.sh_degree(rows.dtype)
+    if degree >= current:
+        return rows
+    old_k = (current + 1) ** 2 - 1
+    new_k = (degree + 1) ** 2 - 1
+    out_dtype = gaussian_ply.gaussian_dtype(degree, normals="nx" in rows.dtype.names)
+    out = np.empty(len(rows), dtype=out_dtype)
+    for name in out_dtype.names:
+        if not name.startswith("f_rest_"):
+            out[name] = rows[name]
+    for c in range(3):
+        for k in range(new_k):
+            out[f"f_rest_{c * new_k + k}"] = rows[f"f_rest_{c * old_k + k}"]
+    return out
+
+
+# -- encoders ---------------------------------------------------------------
+
+
+def encode_splat(rows: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """.splat records for rows and their decoded attributes."""
+    ref = activated(rows)
+    out = np.empty(len(rows), dtype=SPLAT_DTYPE)
+    out["position"] = ref["positions"]
+    out["scale"] = ref["scales"]
+    rgba = np.concatenate([ref["colors"], ref["opacity"]], axis=1)
+    out["rgba"] = np.clip(np.round(rgba * 255.0), 0, 255)
+    out["rotation"] = np.clip(np.round(ref["rotations"] * 128.0 + 128.0), 0, 255)
+    decoded = {
+        "positions": out["position"].astype(np.float64),
+        "scales": out["scale"].astype(np.float64),
+        "colors": out["rgba"][:, :3] / 255.0,
+        "opacity": out["rgba"][:, 3:] / 255.0,
+        "rotations": _unit_quats((out["rotation"].astype(np.float64) - 128.0) / 128.0),
+    }
+    return out, decoded
+
+
+def _chunk_bounds(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # values: (n, k) -> per-chunk (C, k) min and max; the last partial chunk only covers its own rows.
+    n = len(values)
+    chunks = -(-n // PACK_CHUNK)
+    padded = np.concatenate([values, np.repeat(values[-1:], chunks * PACK_CHUNK - n, axis=0)]) if n % PACK_CHUNK else values
+    grouped = padded.reshape(chunks, PACK_CHUNK, -1)
+    return grouped.min(axis=1), grouped.max(axis=1)
+
+
+def _quantize(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, bits: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    # Normalise each row into its chunk's [lo, hi] and round to `bits` per column; returns (codes, decoded).
+    per_row = np.arange(len(values)) // PACK_CHUNK
+    lo, hi = lo[per_row], hi[per_row]
+    span = np.where(hi > lo, hi - lo, 1.0)
+    levels = np.array([(1 << b) - 1 for b in bits], dtype=np.float64)
+    codes = np.clip(np.round((values - lo) / span * levels), 0, levels).astype(np.uint32)
+    return codes, lo + codes / levels * span
+
+
+def _pack(codes: np.ndarray, bits: Sequence[int]) -> np.ndarray:
+    out = np.zeros(len(codes), dtype=np.uint32)
+    for col, b in enumerate(bits):
+        out = (out << np.uint32(b)) | codes[:, col]
+    return out
+
+
+def _pack_rotations(q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Smallest-three quaternion packing: 2-bit index of the largest component + three 10-bit values."""
+    largest = np.argmax(np.abs(q), axis=1)
+    rows = np.arange(len(q))
+    q = q * np.where(q[rows, largest] < 0, -1.0, 1.0)[:, None]
+    norm = np.sqrt(2.0) * 0.5
+    others = np.array([[j for j in range(4) if j != i] for i in range(4)])[largest]
+    small = q[rows[:, None], others]
+    codes = np.clip(np.round((small * norm + 0.5) * 1023.0), 0, 1023).astype(np.uint32)
+    packed = (largest.astype(np.uint32) << np.uint32(30)) | _pack(codes, (10, 10, 10))
+    dec_small = (codes / 1023.0 - 0.5) / norm
+    decoded = np.zeros_like(q)
+    decoded[rows[:, None], others] = dec_small
+    decoded[rows, largest] = np.sqrt(np.clip(1.0 - np.square(dec_small).sum(axis=1), 0.0, None))
+    return packed, decoded
+
+
+def encode_compressed(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """(chunk records, packed vertices, 8-bit SH, decoded attributes) for rows (a whole number of chunks
+    except possibly at the end of the cloud)."""
+    ref = activated(rows)
+    pos = ref["positions"]
+    log_scale = gaussian_ply.field_block(rows, "scales").astype(np.float64)
+    color = ref["colors"]
+    chunks = np.empty(-(-len(rows) // PACK_CHUNK), dtype=PACKED_CHUNK_DTYPE)
+    vertices = np.empty(len(rows), dtype=PACKED_VERTEX_DTYPE)
+    decoded: Dict[str, np.ndarray] = {}
+
+    for group, field, values, bits, names in (
+        ("positions", "packed_position", pos, (11, 10, 11), ("x", "y", "z")),
+        ("scales", "packed_scale", log_scale, (11, 10, 11), ("scale_x", "scale_y", "scale_z")),
+        ("colors", "packed_color", color, (8, 8, 8), ("r", "g", "b")),
+    ):
+        lo, hi = _chunk_bounds(values)
+        for i, n in enumerate(names):
+            chunks[f"min_{n}"] = lo[:, i]
+            chunks[f"max_{n}"] = hi[:, i]
+        # Quantize against the float32 bounds actually stored in the file.
+        lo32 = np.stack([chunks[f"min_{n}"] for n in names], axis=1).astype(np.float64)
+        hi32 = np.stack([chunks[f"max_{n}"] for n in names], axis=1).astype(np.float64)
+        codes, dec = _quantize(values, lo32, hi32, bits)
+        if group == "colors":
+            alpha = np.clip(np.round(ref["opacity"] * 255.0), 0, 255).astype(np.uint32)
+            vertices[field] = _pack(np.concatenate([codes, alpha], axis=1), (8, 8, 8, 8))
+            decoded["opacity"] = alpha / 255.0
+        else:
+            vertices[field] = _pack(codes, bits)
+        decoded[group] = np.exp(dec) if group == "scales" else dec
+    vertices["packed_rotation"], decoded["rotations"] = _pack_rotations(ref["rotations"])
+
+    sh = np.zeros((len(rows), 0), dtype=np.uint8)
+    if "sh_rest" in ref:
+        sh = np.clip(np.floor((ref["sh_rest"] / 8.0 + 0.5) * 256.0), 0, 255).astype(np.uint8)
+        decoded["sh_rest"] = ((sh + 0.5) / 256.0 - 0.5) * 8.0
+    return chunks, vertices, sh, decoded
+
+
+def encode_fp16(rows: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    out = rows.astype(np.dtype([(n, "<f2") for n in rows.dtype.names]))
+    return out, activated(out.astype(rows.dtype))
+
+
+def _compressed_header(num_chunks: int, count: int, sh_names: List[str]) -> bytes:
+    lines = ["ply", "format binary_little_endian 1.0", f"element chunk {num_chunks}"]
+    lines += [f"property float {n}" for n in CHUNK_FIELDS]
+    lines.append(f"element vertex {count}")
+    lines += [f"property uint {n}" for n in PACKED_VERTEX_DTYPE.names]
+    if sh_names:
+        lines.append(f"element sh {count}")
+        lines += [f"property uchar {n}" for n in sh_names]
+    lines.append("end_header")
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+# -- writers ----------------------------------------------------------------
+
+
+def _write_splat(data: np.ndarray, order: np.ndarray, degree: int, path: str, stats: ErrorStats, block_size: int) -> None:
+    with open(path, "wb") as f:
+        for s in range(0, len(order), block_size):
+            rows = truncate_sh(data[order[s : s + block_size]], degree)
+            records, decoded = encode_splat(rows)
+            f.write(records.tobytes())
+            stats.add(activated(rows), decoded)
+
+
+def _write_compressed(data: np.ndarray, order: np.ndarray, degree: int, sh_names: List[str], path: str, stats: ErrorStats, block_size: int) -> None:
+    # Elements are stored one after another (chunks, vertices, SH), so each block seeks to its slot in each.
+    count = len(order)
+    num_chunks = -(-count // PACK_CHUNK)
+    header = _compressed_header(num_chunks, count, sh_names)
+    vertex_at = len(header) + num_chunks * PACKED_CHUNK_DTYPE.itemsize
+    sh_at = vertex_at + count * PACKED_VERTEX_DTYPE.itemsize
+    with open(path, "wb") as f:
+        f.write(header)
+        f.truncate(sh_at + count * len(sh_names))
+        for s in range(0, count, block_size):
+            rows = truncate_sh(data[order[s : s + block_size]], degree)
+            chunks, vertices, sh, decoded = encode_compressed(rows)
+            f.seek(len(header) + (s // PACK_CHUNK) * PACKED_CHUNK_DTYPE.itemsize)
+            f.write(chunks.tobytes())
+            f.seek(vertex_at + s * PACKED_VERTEX_DTYPE.itemsize)
+            f.write(vertices.tobytes())
+            if sh_names:
+                f.seek(sh_at + s * len(sh_names))
+                f.write(np.ascontiguousarray(sh).tobytes())
+            stats.add(activated(rows), decoded)
+
+
+# -- driver -----------------------------------------------------------------
+
+
+def export_splats(
+    ply_path: str,
+    out_dir: str,
+    formats: Sequence[str] = DEFAULT_FORMATS,
+    name: Optional[str] = None,
+    min_opacity: float = 0.005,
+    max_scale: Optional[float] = None,
+    bbox: Optional[Sequence[Sequence[float]]] = None,
+    sh_degree: Optional[int] = None,
+    block_size: int = BLOCK,
+    report_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Prune, optionally reduce SH, and write `formats` for a trained point_cloud.ply.
+
+    Outputs are written to out_dir as <name><suffix> (name defaults to the PLY's file stem). Returns a
+    report with the pruning counts, and per format the output path, size, compression ratio and
+    attribute errors; the report is also saved as JSON when report_path is given.
+    """
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s) {unknown}; expected some of {', '.join(FORMATS)}")
+    if block_size % PACK_CHUNK:
+        raise ValueError(f"block_size must be a multiple of {PACK_CHUNK}")
+    start = time.perf_counter()
+    data = gaussian_ply.read_gaussians(ply_path)
+    source_degree = gaussian_ply.sh_degree(data.dtype)
+    degree = source_degree if sh_degree is None else min(sh_degree, source_degree)
+    name = name or os.path.splitext(os.path.basename(ply_path))[0]
+    os.makedirs(out_dir, exist_ok=True)
+
+    keep, pruned = prune_mask(data, min_opacity=min_opacity, max_scale=max_scale, bbox=bbox)
+    index = np.flatnonzero(keep)
+    count = len(index)
+    input_bytes = os.path.getsize(ply_path)
+    out_dtype = gaussian_ply.gaussian_dtype(degree, normals="nx" in data.dtype.names)
+    sh_names = gaussian_ply.field_names(out_dtype, "sh_rest")
+
+    outputs: Dict[str, Any] = {}
+    for fmt in formats:
+        path = os.path.join(out_dir, name + SUFFIXES[fmt])
+        tmp = path + ".tmp"
+        stats = ErrorStats()
+        if fmt == "splat":
+            _write_splat(data, importance_order(data, index), degree, tmp, stats, block_size)
+        elif fmt == "compressed_ply":
+            _write_compressed(data, morton_order(data, index), degree, sh_names, tmp, stats, block_size)
+        else:
+            # Source order: diffs against the original cloud stay meaningful.
+            fields = [(n, "<f2" if fmt == "half_ply" else "<f4") for n in out_dtype.names]
+            out = gaussian_ply.create_gaussians(tmp, np.dtype(fields), count)
+            for s in range(0, count, block_size):
+                rows = truncate_sh(data[index[s : s + block_size]], degree)
+                records, decoded = encode_fp16(rows) if fmt == "half_ply" else (rows.astype(out_dtype), activated(rows))
+                out[s : s + len(rows)] = records
+                stats.add(activated(rows), decoded)
+            if isinstance(out, np.memmap):
+                out.flush()
+            del out
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        outputs[fmt] = {"path": path, "bytes": size, "ratio": input_bytes / size if size else 0.0, "errors": stats.report()}
+        print(f"Exported {fmt}: {path} ({size / 1e6:.1f} MB, {outputs[fmt]['ratio']:.1f}x smaller)")
+
+    report = {
+        "source": os.path.abspath(ply_path),
+        "input_bytes": input_bytes,
+        "total": len(data),
+        "kept": count,
+        "pruned": pruned,
+        "params": {"min_opacity": min_opacity, "max_scale": max_scale, "bbox": bbox, "sh_degree": degree, "source_sh_degree": source_degree},
+        "outputs": outputs,
+        "seconds": time.perf_counter() - start,
+    }
+    if report_path:
+        folder = os.path.dirname(report_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(f"Splat export: kept {count}/{len(data)} Gaussians (pruned {pruned}) in {report['seconds']:.1f}s")
+    return report
@@ -1,13 +1,45 @@
 """Environment detection utilities for local runs.
 
 Keep this lightweight so tests can import it without heavy dependencies.
+
+Importing torch (and initialising CUDA) takes seconds and can hang on a broken driver, so
+`cached_env_report` probes torch in a child interpreter with a timeout (`probe_torch`) and caches the
+result on disk, keyed by interpreter path, torch install mtime and NVIDIA driver version: repeated
+checks reuse it until one of those changes.
 """
 from __future__ import annotations
 
 import importlib
+import importlib.util
+import json
+import os
 import platform
+import shutil
+import subprocess
 import sys
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
+
+CACHE_VERSION = 1
+PROBE_TIMEOUT = 60.0
+_PROBE_PREFIX = "ENV_PROBE "
+# Run by `probe_torch` in a child interpreter; prints one prefixed JSON line with get_torch_info's keys.
+PROBE = """
+import json
+info = {}
+try:
+    import torch
+    info["installed"] = True
+    info["version"] = getattr(torch, "__version__", None)
+    try:
+        info["cuda_available"] = torch.cuda.is_available()
+        info["cuda_device_count"] = torch.cuda.device_count()
+    except Exception as e:
+        info["cuda_error"] = str(e)
+except Exception:
+    info["installed"] = False
+print(%r + json.dumps(info), flush=True)
+""" % _PROBE_PREFIX
 
 
 def get_python_info() -> Dict[str, Any]:
@@ -36,3 +68,106 @@ def get_torch_info() -> Dict[str, Any]:
 
 def full_env_report() -> Dict[str, Any]:
     return {"python": get_python_info(), "system": get_system_info(), "torch": get_torch_info()}
+
+
+def _probe_parser(line: str) -> Optional[Dict[str, Any]]:
+    if not line.startswith(_PROBE_PREFIX):
+        return None
+    try:
+        return {"torch": json.loads(line[len(_PROBE_PREFIX):])}
+    except ValueError:
+        return None
+
+
+def probe_torch(timeout: Optional[float] = PROBE_TIMEOUT, python: Optional[str] = None) -> Dict[str, Any]:
+    """`get_torch_info` run in a child interpreter, so a slow or hanging CUDA init cannot block the caller.
+
+    On timeout the child's process group is stopped and {"installed": None, "probe_error": ...} is
+    returned; a probe that crashes, or an interpreter that cannot be started, is reported the same way.
+    """
+    from src.core import logstream, process
+
+    found: Dict[str, Any] = {}
+    processor = logstream.LogProcessor(parsers=[_probe_parser], on_event=found.update, tail_lines=20)
+    try:
+        result = process.run([python or sys.executable, "-c", PROBE], processor=processor, timeout=timeout, grace=2.0)
+    except OSError as e:
+        return {"installed": None, "probe_error": f"could not start {python or sys.executable}: {e}"}
+    if "torch" in found:
+        return found["torch"]
+    if result.timed_out:
+        return {"installed": None, "probe_error": f"torch probe timed out after {timeout}s"}
+    return {"installed": None, "probe_error": f"torch probe exited with {result.returncode}: {processor.tail_text(5)}"}
+
+
+def driver_version(timeout: float = 5.0) -> Optional[str]:
+    """NVIDIA driver version from /proc (Linux) or nvidia-smi; None without an NVIDIA driver."""
+    try:
+        with open("/proc/driver/nvidia/version", "r", encoding="utf-8") as f:
+            for word in f.readline().split():
+                if word[:1].isdigit() and "." in word:
+                    return word
+    except OSError:
+        pass
+    smi = shutil.which("nvidia-smi")
+    if not smi:
+        return None
+    try:
+        out = subprocess.run([smi, "--query-gpu=driver_version", "--format=csv,noheader"], capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    lines = out.stdout.strip().splitlines()
+    return lines[0].strip() if out.returncode == 0 and lines else None
+
+
+def _torch_mtime() -> Optional[float]:
+    # find_spec locates the package without importing it.
+    try:
+        spec = importlib.util.find_spec("torch")
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin:
+        return None
+    try:
+        return os.path.getmtime(os.path.dirname(spec.origin))
+    except OSError:
+        return None
+
+
+def env_cache_key() -> Dict[str, Any]:
+    """What a cached report depends on; any change forces a new probe."""
+    return {"version": CACHE_VERSION, "executable": sys.executable, "torch_mtime": _torch_mtime(), "driver": driver_version()}
+
+
+def default_cache_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "gaussian-splatting-colab", "env_report.json")
+
+
+def cached_env_report(refresh: bool = False, timeout: Optional[float] = PROBE_TIMEOUT, cache_path: Optional[str] = None) -> Dict[str, Any]:
+    """`full_env_report` with the torch section probed out of process and cached on disk.
+
+    The report gains "cached" (True when read from the cache) and "cache_key". refresh=True ignores the
+    cache. Failed probes (timeout, crash) are returned but not cached, so the next check retries.
+    """
+    path = cache_path or default_cache_path()
+    key = env_cache_key()
+    if not refresh:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("cache_key") == key:
+                return dict(cached, python=get_python_info(), system=get_system_info(), cached=True)
+        except (OSError, ValueError):
+            pass
+    torch_info = probe_torch(timeout)
+    report = {"python": get_python_info(), "system": get_system_info(), "torch": torch_info, "cache_key": key, "probed_at": time.time(), "cached": False}
+    if "probe_error" not in torch_info:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Could not cache environment report at {path}: {e}")
+    return report
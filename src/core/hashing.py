@@ -0,0 +1,41 @@
+"""Content hashing helpers shared by the caching layers (ingest manifest, stage cache, sync).
+
+Hashes are computed over file contents only so renamed or re-copied files still hit the cache.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Iterable
+
+CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """Return the hex sha256 digest of a file's contents, read in fixed-size chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_params(params: Any) -> str:
+    """Stable digest of a JSON-serialisable parameter set (key order does not matter)."""
+    return hash_bytes(json.dumps(params, sort_keys=True, default=str).encode())
+
+
+def combine_digests(digests: Iterable[str]) -> str:
+    """Fold an ordered sequence of digests into one digest."""
+    h = hashlib.sha256()
+    for d in digests:
+        h.update(d.encode())
+        h.update(b"\0")
+    return h.hexdigest()
@@ -0,0 +1,44 @@
+"""Deferred module imports to keep CLI startup fast.
+
+`lazy_import("src.colmap")` returns a stand-in that imports the real module on first attribute access,
+so `run_local.py --check` and other light entry points never pay for NumPy, Pillow or asyncio they don't
+use. The import itself goes through `importlib.import_module`, so the interpreter's import lock keeps it
+safe when batch threads touch the same module at once. Modules already imported are returned as they are.
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+from types import ModuleType
+from typing import Any, List, Union
+
+
+class LazyModule:
+    """Attribute access (get, set, delete) is forwarded to the module, imported on first use."""
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_lazy_name", name)
+
+    def _load(self) -> ModuleType:
+        return importlib.import_module(object.__getattribute__(self, "_lazy_name"))
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        name = object.__getattribute__(self, "_lazy_name")
+        return f"<lazy module {name!r}{' (loaded)' if name in sys.modules else ''}>"
+
+
+def lazy_import(name: str) -> Union[ModuleType, LazyModule]:
+    """Module `name` if already imported, else a `LazyModule` that imports it when first used."""
+    return sys.modules.get(name) or LazyModule(name)
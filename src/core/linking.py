@@ -0,0 +1,179 @@
+"""Zero-copy file placement for scene setup: reflink, hardlink, symlink, or threaded copy.
+
+`link_tree` populates a destination folder from a source folder with the cheapest method the
+filesystem supports. In "auto" mode reflink is probed once per call and the first method in
+AUTO_ORDER (reflink -> copy) that works is used for every file.
+
+Hardlinks and symlinks share data with the source, so a tool that rewrites a destination file in
+place (COLMAP's image_undistorter, ingest, selection) also changes the original. They are never
+picked by "auto"; pass them explicitly, and only for folders that nothing downstream writes to.
+Reflinks and copies are independent of the source.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.hashing import hash_file
+
+MODES = ("auto", "reflink", "hardlink", "symlink", "copy")
+AUTO_ORDER = ("reflink", "copy")
+SHARED_MODES = ("hardlink", "symlink")
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def reflink(src: str, dst: str) -> None:
+    """Create dst as a copy-on-write clone of src (Linux FICLONE: btrfs, XFS, overlayfs on those)."""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError("reflink not supported on this platform")
+    with open(src, "rb") as fs:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            fcntl.ioctl(fd, FICLONE, fs.fileno())
+        except OSError:
+            os.close(fd)
+            os.unlink(dst)
+            raise
+        os.close(fd)
+    shutil.copystat(src, dst)
+
+
+def place_file(src: str, dst: str, mode: str) -> int:
+    """Place src at dst using `mode`. Returns the number of bytes physically written (0 for links)."""
+    if mode == "reflink":
+        reflink(src, dst)
+        return 0
+    if mode == "hardlink":
+        os.link(src, dst)
+        return 0
+    if mode == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+        return 0
+    if mode == "copy":
+        shutil.copy2(src, dst)
+        return os.path.getsize(dst)
+    raise ValueError(f"Unknown link mode {mode!r}; expected one of {', '.join(MODES)}")
+
+
+def _up_to_date(src: str, dst: str, shared: bool) -> bool:
+    if not os.path.lexists(dst):
+        return False
+    try:
+        if os.path.samefile(src, dst):
+            # A link left by an earlier shared-mode run is replaced by an independent file.
+            return shared
+        s, d = os.stat(src), os.stat(dst)
+    except OSError:
+        return False
+    # copy2/reflink preserve mtime, so an equal size+mtime destination is a previous placement.
+    return s.st_size == d.st_size and int(s.st_mtime) == int(d.st_mtime)
+
+
+def detect_mode(src: str, dst_dir: str) -> str:
+    """Probe which AUTO_ORDER method works from src's filesystem into dst_dir."""
+    os.makedirs(dst_dir, exist_ok=True)
+    probe = os.path.join(dst_dir, ".link_probe")
+    for mode in AUTO_ORDER[:-1]:
+        if os.path.lexists(probe):
+            os.unlink(probe)
+        try:
+            place_file(src, probe, mode)
+        except (OSError, NotImplementedError):
+            continue
+        finally:
+            if os.path.lexists(probe):
+                os.unlink(probe)
+        return mode
+    return "copy"
+
+
+def _duplicate_groups(files: List[str]) -> Dict[str, str]:
+    """Map each duplicate file to the first file with identical content. Only same-size files are hashed."""
+    by_size: Dict[int, List[str]] = {}
+    for path in files:
+        by_size.setdefault(os.path.getsize(path), []).append(path)
+    dupes: Dict[str, str] = {}
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+        first_by_digest: Dict[str, str] = {}
+        for path in group:
+            digest = hash_file(path)
+            if digest in first_by_digest:
+                dupes[path] = first_by_digest[digest]
+            else:
+                first_by_digest[digest] = path
+    return dupes
+
+
+def link_tree(
+    src_dir: str,
+    dst_dir: str,
+    mode: str = "auto",
+    workers: int = 8,
+    dedupe: bool = True,
+    names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Populate dst_dir with the files (not recursive) of src_dir using the cheapest placement method.
+
+    Args:
+        src_dir: Source folder
+        dst_dir: Destination folder (created if missing)
+        mode: One of MODES; "auto" probes reflink, then falls back to copy. "hardlink" and "symlink"
+            share the source's data and are only safe for read-only consumers
+        workers: Thread count for the copy path (copies are I/O bound and release the GIL)
+        dedupe: When copying, write identical files once and hardlink the rest to that copy if possible
+        names: Restrict to these filenames (default: every regular file in src_dir)
+
+    Returns a report dict: mode, files, placed, skipped, deduped, bytes_moved.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown link mode {mode!r}; expected one of {', '.join(MODES)}")
+    os.makedirs(dst_dir, exist_ok=True)
+    if names is None:
+        names = sorted(f for f in os.listdir(src_dir) if os.path.isfile(os.path.join(src_dir, f)))
+    pairs = [(os.path.join(src_dir, n), os.path.join(dst_dir, n)) for n in names]
+    report: Dict[str, Any] = {"mode": mode, "files": len(pairs), "placed": 0, "skipped": 0, "deduped": 0, "bytes_moved": 0}
+
+    todo = [(s, d) for s, d in pairs if not _up_to_date(s, d, mode in SHARED_MODES)]
+    report["skipped"] = len(pairs) - len(todo)
+    if not todo:
+        return report
+    if mode == "auto":
+        mode = detect_mode(todo[0][0], dst_dir)
+        report["mode"] = mode
+
+    dupes: Dict[str, str] = _duplicate_groups([s for s, _ in todo]) if dedupe and mode == "copy" else {}
+    primaries = [(s, d) for s, d in todo if s not in dupes]
+    dst_of = {s: d for s, d in todo}
+
+    def _place(pair: Tuple[str, str]) -> int:
+        s, d = pair
+        if os.path.lexists(d):
+            os.unlink(d)
+        return place_file(s, d, mode)
+
+    if mode == "copy" and workers > 1 and len(primaries) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            moved = list(pool.map(_place, primaries))
+    else:
+        moved = [_place(p) for p in primaries]
+    report["bytes_moved"] = sum(moved)
+    report["placed"] = len(primaries)
+
+    for s, original in dupes.items():
+        d = dst_of[s]
+        if os.path.lexists(d):
+            os.unlink(d)
+        try:
+            os.link(dst_of[original], d)
+        except OSError:
+            report["bytes_moved"] += place_file(s, d, "copy")
+        report["deduped"] += 1
+    return report
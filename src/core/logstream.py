@@ -0,0 +1,180 @@
+"""Bounded, streaming processing of subprocess output.
+
+`LogProcessor` consumes raw output chunks, splits them into lines (tqdm's `\r` updates included)
+and, per line, matches failure signatures, keeps a fixed-size tail for error reports and runs
+pluggable parsers that turn progress lines into structured events. Memory use is bounded by the
+tail size and the longest line, not by the length of the log.
+"""
+from __future__ import annotations
+
+import collections
+import re
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence
+
+Event = Dict[str, Any]
+Parser = Callable[[str], Optional[Event]]
+
+MAX_LINE = 64 * 1024
+
+# ---------------------------------------------------------------------------
+# Progress parsers: each takes one decoded line and returns an event dict or None.
+
+_COLMAP_PATTERNS = [
+    # feature_extractor: "Processed file [12/200]"
+    (re.compile(r"Processed file \[(\d+)/(\d+)\]"), "feature_extraction"),
+    # exhaustive_matcher: "Matching block [1/5, 2/5]"
+    (re.compile(r"Matching block \[(\d+)/(\d+), (\d+)/(\d+)\]"), "matching"),
+    # sequential/vocab_tree/spatial matchers: "Matching image [12/200]"
+    (re.compile(r"Matching image \[(\d+)/(\d+)\]"), "matching"),
+    # image_undistorter: "Undistorting image [12/200]"
+    (re.compile(r"Undistorting image \[(\d+)/(\d+)\]"), "undistortion"),
+]
+_COLMAP_REGISTER = re.compile(r"Registering image #(\d+) \((\d+)\)")
+
+
+def colmap_progress_parser(line: str) -> Optional[Event]:
+    """Parse COLMAP feature extraction, matching, mapping and undistortion progress lines."""
+    for pattern, stage in _COLMAP_PATTERNS:
+        m = pattern.search(line)
+        if not m:
+            continue
+        g = [int(x) for x in m.groups()]
+        if len(g) == 4:
+            # Block matching: flatten (row, col) block indices into a single counter.
+            current, total = (g[0] - 1) * g[3] + g[2], g[1] * g[3]
+        else:
+            current, total = g
+        return {"source": "colmap", "stage": stage, "current": current, "total": total}
+    m = _COLMAP_REGISTER.search(line)
+    if m:
+        return {"source": "colmap", "stage": "mapping", "image_id": int(m.group(1)), "registered": int(m.group(2))}
+    return None
+
+
+_TQDM = re.compile(r"(\d+)/(\d+) \[([^<\]]*)<([^,\]]*),\s*([\d.]+)(it/s|s/it)(.*)\]")
+_TQDM_FIELD = re.compile(r"(\w+)=([-+\deE.]+)")
+_ITER_EVAL = re.compile(r"\[ITER (\d+)\] Evaluating (\w+): L1 ([\d.eE+-]+) PSNR ([\d.eE+-]+)")
+_ITER_MARK = re.compile(r"\[ITER (\d+)\] (Saving Gaussians|Saving Checkpoint)")
+
+
+def _clock_seconds(text: str) -> Optional[float]:
+    """'01:02:03' / '02:03' -> seconds; None for tqdm's '?'."""
+    try:
+        seconds = 0.0
+        for part in text.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+def training_progress_parser(line: str) -> Optional[Event]:
+    """Parse gaussian-splatting train.py progress: tqdm bar, evaluation and save markers."""
+    m = _ITER_EVAL.search(line)
+    if m:
+        return {"source": "training", "kind": "eval", "iteration": int(m.group(1)), "split": m.group(2), "l1": float(m.group(3)), "psnr": float(m.group(4))}
+    m = _ITER_MARK.search(line)
+    if m:
+        kind = "saved_gaussians" if m.group(2) == "Saving Gaussians" else "saved_checkpoint"
+        return {"source": "training", "kind": kind, "iteration": int(m.group(1))}
+    m = _TQDM.search(line)
+    if m:
+        rate = float(m.group(5))
+        it_s = rate if m.group(6) == "it/s" else (1.0 / rate if rate else 0.0)
+        event: Event = {
+            "source": "training",
+            "kind": "progress",
+            "iteration": int(m.group(1)),
+            "total": int(m.group(2)),
+            "it_s": it_s,
+            "elapsed_s": _clock_seconds(m.group(3)),
+            "eta_s": _clock_seconds(m.group(4)),
+        }
+        for key, value in _TQDM_FIELD.findall(m.group(7)):
+            try:
+                event[key.lower()] = float(value)
+            except ValueError:
+                pass
+        return event
+    return None
+
+
+# ---------------------------------------------------------------------------
+
+
+class LogProcessor:
+    """Incrementally process a byte stream line by line with constant memory.
+
+    Args:
+        patterns: Substrings to watch for (case-insensitive); see `matched`
+        parsers: Callables turning a line into an event dict (first non-None wins)
+        on_event: Called with every parsed event
+        tail_lines: Number of most recent lines kept for error reports
+    """
+
+    def __init__(
+        self,
+        patterns: Sequence[str] = (),
+        parsers: Sequence[Parser] = (),
+        on_event: Optional[Callable[[Event], None]] = None,
+        tail_lines: int = 200,
+    ):
+        self._patterns = [(p, p.lower()) for p in patterns]
+        self.parsers = list(parsers)
+        self.on_event = on_event
+        self.tail: Deque[str] = collections.deque(maxlen=tail_lines)
+        self.matched: List[str] = []
+        self.last_event: Dict[str, Event] = {}
+        self.lines = 0
+        self.bytes = 0
+        # Unterminated last line per stream, so interleaved stdout/stderr chunks never mix within a line.
+        self._partial: Dict[str, bytes] = {}
+
+    def feed(self, chunk: bytes, stream: str = "stdout") -> None:
+        self.bytes += len(chunk)
+        data = self._partial.pop(stream, b"") + chunk
+        # tqdm redraws with '\r'; treat it as a line break so each update is parsed.
+        parts = re.split(rb"\r\n|\r|\n", data)
+        partial = parts.pop()
+        if len(partial) > MAX_LINE:
+            parts.append(partial)
+        elif partial:
+            self._partial[stream] = partial
+        for raw in parts:
+            if raw:
+                self._line(raw.decode(errors="replace"))
+
+    def close(self) -> None:
+        for partial in self._partial.values():
+            self._line(partial.decode(errors="replace"))
+        self._partial = {}
+
+    def _line(self, line: str) -> None:
+        self.lines += 1
+        self.tail.append(line)
+        if len(self.matched) < len(self._patterns):
+            lowered = line.lower()
+            for original, low in self._patterns:
+                if low in lowered and original not in self.matched:
+                    self.matched.append(original)
+        for parser in self.parsers:
+            event = parser(line)
+            if event is not None:
+                self.last_event[str(event.get("stage") or event.get("kind"))] = event
+                if self.on_event:
+                    self.on_event(event)
+                break
+
+    def tail_text(self, n: Optional[int] = None) -> str:
+        lines = list(self.tail)
+        return "\n".join(lines[-n:] if n else lines)
+
+
+def iter_events(lines: Iterable[str], parsers: Sequence[Parser]) -> Iterable[Event]:
+    """Parse an existing log (e.g. a saved colmap.log) into events."""
+    for line in lines:
+        for parser in parsers:
+            event = parser(line)
+            if event is not None:
+                yield event
+                break
@@ -0,0 +1,33 @@
+"""Locate the external gaussian-splatting checkout (convert.py, train.py).
+
+Search order: $GAUSSIAN_SPLATTING_DIR, the Docker image location, then <project_root>/external/gaussian-splatting.
+"""
+from __future__ import annotations
+
+import os
+from typing import List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DOCKER_GS_DIR = "/home/appuser/gaussian-splatting"
+LOCAL_GS_DIR = os.path.join(PROJECT_ROOT, "external", "gaussian-splatting")
+
+
+def gs_script_candidates(name: str) -> List[Tuple[str, str]]:
+    """Return (path, label) candidates for a gaussian-splatting script in search order."""
+    candidates = []
+    override = os.environ.get("GAUSSIAN_SPLATTING_DIR")
+    if override:
+        candidates.append((os.path.join(override, name), "$GAUSSIAN_SPLATTING_DIR"))
+    candidates.append((os.path.join(DOCKER_GS_DIR, name), "Docker"))
+    candidates.append((os.path.join(LOCAL_GS_DIR, name), "local"))
+    return candidates
+
+
+def find_gs_script(name: str, description: str) -> str:
+    """Return the first existing candidate for `name`, else raise FileNotFoundError listing what was tried."""
+    candidates = gs_script_candidates(name)
+    for path, _ in candidates:
+        if os.path.isfile(path):
+            return path
+    tried = "\n".join(f"  - {path} ({label})" for path, label in candidates)
+    raise FileNotFoundError(f"{description} not found. Tried:\n{tried}")
@@ -0,0 +1,229 @@
+"""Shared asyncio subprocess runner for the COLMAP, convert and training wrappers.
+
+`run_async` starts a command in its own process group, consumes stdout and stderr concurrently (each
+chunk is written to the log and fed to a `LogProcessor` before the next read, so a slow consumer
+back-pressures the child through the pipe instead of buffering without bound), and enforces an optional
+timeout. On timeout or cancellation the whole group is stopped gracefully: SIGINT, then SIGTERM, then
+SIGKILL, each after a grace period (CTRL_BREAK, terminate, kill on Windows). The outcome is returned as
+a `ProcessResult`.
+
+Several commands can share one event loop (`asyncio.gather(run_async(a), run_async(b))`) without a
+thread per process. `run` is the blocking entry point used by the wrappers; it also works when the
+caller already runs an event loop (Jupyter/Colab) by running the command on a helper thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, List, Optional, Sequence
+
+from src.core import profiler
+
+CHUNK_SIZE = 65536
+GRACE_SECONDS = 10.0
+_WINDOWS = sys.platform == "win32"
+
+
+@dataclass
+class ProcessResult:
+    """Outcome of one command run through `run_async`."""
+
+    command: List[str]
+    returncode: Optional[int]
+    pid: int
+    started_at: float
+    duration_s: float
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    timed_out: bool = False
+    signals: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def check_returncode(self) -> None:
+        """Raise CalledProcessError (TimeoutExpired after a timeout) unless the command succeeded."""
+        if self.timed_out:
+            raise subprocess.TimeoutExpired(self.command, self.duration_s)
+        if self.returncode != 0:
+            raise subprocess.CalledProcessError(self.returncode if self.returncode is not None else -1, self.command)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def _group_kwargs() -> Dict[str, Any]:
+    if _WINDOWS:
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}  # type: ignore[attr-defined]
+    return {"start_new_session": True}
+
+
+def _send(proc: asyncio.subprocess.Process, step: int) -> str:
+    """Send escalation step 0/1/2 to proc's process group; returns the signal name."""
+    if _WINDOWS:
+        if step == 0:
+            proc.send_signal(signal.CTRL_BREAK_EVENT)  # type: ignore[attr-defined]
+            return "CTRL_BREAK_EVENT"
+        if step == 1:
+            proc.terminate()
+            return "TERMINATE"
+        proc.kill()
+        return "KILL"
+    sig = (signal.SIGINT, signal.SIGTERM, signal.SIGKILL)[step]
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        pass
+    return sig.name
+
+
+async def _stop(proc: asyncio.subprocess.Process, grace: float, sent: List[str]) -> None:
+    for step in range(3):
+        if proc.returncode is not None:
+            return
+        try:
+            sent.append(_send(proc, step))
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.wait_for(proc.wait(), grace if step < 2 else None)
+            return
+        except asyncio.TimeoutError:
+            continue
+
+
+def _echo(chunk: bytes, name: str) -> None:
+    out = sys.stdout if name == "stdout" else sys.stderr
+    buffer = getattr(out, "buffer", None)
+    if buffer is not None:
+        buffer.write(chunk)
+        buffer.flush()
+    else:  # notebook streams are text-only
+        out.write(chunk.decode(errors="replace"))
+
+
+async def _pump(stream: asyncio.StreamReader, name: str, log: Optional[IO[bytes]], processor: Any, echo: bool, counts: Dict[str, int], chunk_size: int) -> None:
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        counts[name] += len(chunk)
+        if log is not None:
+            log.write(chunk)
+        if processor is not None:
+            processor.feed(chunk, stream=name)
+        if echo:
+            _echo(chunk, name)
+
+
+async def run_async(
+    command: Sequence[str],
+    logfile_path: Optional[str] = None,
+    processor: Any = None,
+    env: Optional[Dict[str, str]] = None,
+    cwd: Optional[str] = None,
+    timeout: Optional[float] = None,
+    grace: float = GRACE_SECONDS,
+    chunk_size: int = CHUNK_SIZE,
+    echo: bool = False,
+) -> ProcessResult:
+    """Run command to completion, timeout or cancellation and return its `ProcessResult`.
+
+    Args:
+        logfile_path: Append both output streams here (with a "--- Running:" header line)
+        processor: Object with feed(chunk, stream=...) / close(), normally a `logstream.LogProcessor`
+        timeout: Seconds before the process group is stopped (result.timed_out is then True)
+        grace: Seconds to wait after each of SIGINT and SIGTERM before escalating
+        echo: Also pass the output through to this process's stdout/stderr
+    """
+    command = [str(c) for c in command]
+    log = open(logfile_path, "ab") if logfile_path else None
+    started = time.time()
+    t0 = time.perf_counter()
+    counts = {"stdout": 0, "stderr": 0}
+    sent: List[str] = []
+    timed_out = cancelled = False
+    try:
+        if log is not None:
+            log.write(("\n--- Running: " + " ".join(command) + "\n").encode())
+        proc = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=env or os.environ, cwd=cwd, **_group_kwargs()
+        )
+        assert proc.stdout is not None and proc.stderr is not None
+        pumps = asyncio.gather(
+            _pump(proc.stdout, "stdout", log, processor, echo, counts, chunk_size),
+            _pump(proc.stderr, "stderr", log, processor, echo, counts, chunk_size),
+            proc.wait(),
+        )
+        try:
+            await asyncio.wait_for(asyncio.shield(pumps), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await _stop(proc, grace, sent)
+            await pumps
+        except asyncio.CancelledError:
+            cancelled = True
+            await _stop(proc, grace, sent)
+            await pumps
+            raise
+        finally:
+            if processor is not None:
+                processor.close()
+    finally:
+        if log is not None:
+            log.close()
+        if cancelled:
+            print(f"Cancelled {' '.join(command)} (sent {', '.join(sent) or 'nothing'})")
+    return ProcessResult(
+        command=command,
+        returncode=proc.returncode,
+        pid=proc.pid,
+        started_at=started,
+        duration_s=time.perf_counter() - t0,
+        stdout_bytes=counts["stdout"],
+        stderr_bytes=counts["stderr"],
+        timed_out=timed_out,
+        signals=sent,
+    )
+
+
+def _in_running_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def run(command: Sequence[str], **kwargs: Any) -> ProcessResult:
+    """Blocking `run_async`, recorded as a subprocess span on the active profiler."""
+    name = os.path.basename(command[1] if len(command) > 1 else command[0])
+    with profiler.span(name) as rec:
+        if not _in_running_loop():
+            result = asyncio.run(run_async(command, **kwargs))
+        else:
+            # Already inside an event loop (notebooks): run on a helper thread with its own loop.
+            box: Dict[str, Any] = {}
+
+            def target() -> None:
+                try:
+                    box["result"] = asyncio.run(run_async(command, **kwargs))
+                except BaseException as e:  # re-raised in the caller's thread
+                    box["error"] = e
+
+            thread = threading.Thread(target=target, name=f"run-{name}", daemon=True)
+            thread.start()
+            thread.join()
+            if "error" in box:
+                raise box["error"]
+            result = box["result"]
+        if rec is not None:
+            rec["args"].update(returncode=result.returncode, timed_out=result.timed_out)
+    return result
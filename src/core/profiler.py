@@ -0,0 +1,229 @@
+"""Per-stage resource profiling with Chrome-trace export.
+
+`Profiler` records nested spans (orchestrator stages, child subprocesses). While any span is open a
+background thread samples the whole process tree: RSS, CPU time, disk read/write bytes and, when
+`pynvml` is installed, GPU memory. Per-process counters are remembered after a child exits so its CPU
+and I/O still count towards the span that launched it. `save()` writes a JSON trace that loads in
+chrome://tracing or https://ui.perfetto.dev, with span metrics in each event's args.
+
+psutil is optional: without it spans still record wall time and this process's CPU time.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is in requirements.txt but keep profiling optional
+    psutil = None
+
+# Per-thread stack of profilers with open spans, so concurrent batch stages don't mix traces.
+_local = threading.local()
+
+
+def _stack() -> List["Profiler"]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _nvml_handle():
+    try:
+        import pynvml
+
+        pynvml.nvmlInit()
+        return pynvml, pynvml.nvmlDeviceGetHandleByIndex(0)
+    except Exception:
+        return None, None
+
+
+class Profiler:
+    """Collect spans and resource samples for one pipeline run.
+
+    Args:
+        name: Trace name (usually the scene name)
+        interval: Sampling period in seconds
+    """
+
+    def __init__(self, name: str = "pipeline", interval: float = 0.25):
+        self.name = name
+        self.interval = interval
+        self.events: List[Dict[str, Any]] = []
+        self.spans: List[Dict[str, Any]] = []
+        self._open: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+        self._proc = psutil.Process() if psutil else None
+        # pid -> last seen [cpu_seconds, read_bytes, write_bytes] (kept after the process exits)
+        self._seen: Dict[int, List[float]] = {}
+        self._nvml, self._gpu = _nvml_handle()
+        self.gpu_available = self._gpu is not None
+
+    # -- sampling ----------------------------------------------------------
+
+    def _tree(self) -> List[Any]:
+        if not self._proc:
+            return []
+        try:
+            return [self._proc] + self._proc.children(recursive=True)
+        except psutil.Error:
+            return [self._proc]
+
+    def sample(self) -> Dict[str, float]:
+        """Take one sample; returns current tree RSS and cumulative CPU/IO over every process seen."""
+        rss = 0
+        if self._proc:
+            for p in self._tree():
+                try:
+                    with p.oneshot():
+                        mem = p.memory_info().rss
+                        cpu = p.cpu_times()
+                        try:
+                            io = p.io_counters()
+                            read_b, write_b = io.read_bytes, io.write_bytes
+                        except (AttributeError, psutil.Error):
+                            read_b = write_b = 0
+                except psutil.Error:
+                    continue
+                rss += mem
+                self._seen[p.pid] = [cpu.user + cpu.system, float(read_b), float(write_b)]
+        else:
+            t = os.times()
+            self._seen[self._pid] = [t.user + t.system, 0.0, 0.0]
+        cpu_total = sum(v[0] for v in self._seen.values())
+        sample = {
+            "rss": float(rss),
+            "cpu_s": cpu_total,
+            "read_bytes": sum(v[1] for v in self._seen.values()),
+            "write_bytes": sum(v[2] for v in self._seen.values()),
+        }
+        if self._gpu is not None:
+            try:
+                sample["gpu_mem"] = float(self._nvml.nvmlDeviceGetMemoryInfo(self._gpu).used)
+            except Exception:
+                pass
+        return sample
+
+    def _record_sample(self) -> Dict[str, float]:
+        with self._lock:
+            s = self.sample()
+            for span in self._open:
+                span["peak_rss"] = max(span["peak_rss"], s["rss"])
+                if "gpu_mem" in s:
+                    span["peak_gpu_mem"] = max(span.get("peak_gpu_mem", 0.0), s["gpu_mem"])
+            counters = {"rss_mb": s["rss"] / 1e6}
+            if "gpu_mem" in s:
+                counters["gpu_mem_mb"] = s["gpu_mem"] / 1e6
+            self.events.append({"name": "memory", "ph": "C", "ts": self._us(), "pid": self._pid, "args": counters})
+            return s
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._record_sample()
+
+    def _us(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e6
+
+    # -- spans -------------------------------------------------------------
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "stage", **args: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block and attach its resource deltas/peaks to the trace. Yields the span record."""
+        start = self._record_sample()
+        rec: Dict[str, Any] = {"name": name, "cat": category, "args": dict(args), "peak_rss": start["rss"], "_start": start, "_ts": self._us()}
+        with self._lock:
+            self._open.append(rec)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._loop, name="profiler-sampler", daemon=True)
+                self._thread.start()
+        _stack().append(self)
+        error: Optional[BaseException] = None
+        try:
+            yield rec
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _stack().remove(self)
+            end = self._record_sample()
+            with self._lock:
+                self._open.remove(rec)
+                stop = not self._open
+            if stop and self._thread is not None:
+                self._stop.set()
+                self._thread.join()
+                self._thread = None
+            begin = rec.pop("_start")
+            ts = rec.pop("_ts")
+            metrics = {
+                "wall_s": (self._us() - ts) / 1e6,
+                "cpu_s": end["cpu_s"] - begin["cpu_s"],
+                "peak_rss_mb": rec.pop("peak_rss") / 1e6,
+                "read_mb": (end["read_bytes"] - begin["read_bytes"]) / 1e6,
+                "write_mb": (end["write_bytes"] - begin["write_bytes"]) / 1e6,
+            }
+            if "peak_gpu_mem" in rec:
+                metrics["peak_gpu_mem_mb"] = rec.pop("peak_gpu_mem") / 1e6
+            if error is not None:
+                metrics["error"] = f"{type(error).__name__}: {error}"
+            rec["args"].update(metrics)
+            rec["wall_s"] = metrics["wall_s"]
+            self.spans.append(rec)
+            self.events.append({"name": name, "cat": category, "ph": "X", "ts": ts, "dur": metrics["wall_s"] * 1e6, "pid": self._pid, "tid": threading.get_ident(), "args": rec["args"]})
+
+    # -- export ------------------------------------------------------------
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [dict(name=s["name"], category=s["cat"], **s["args"]) for s in self.spans]
+
+    def print_summary(self) -> None:
+        for s in self.summary():
+            line = f"[profile] {s['name']}: {s['wall_s']:.1f}s wall, {s['cpu_s']:.1f}s cpu, peak RSS {s['peak_rss_mb']:.0f} MB"
+            line += f", read {s['read_mb']:.0f} MB, write {s['write_mb']:.0f} MB"
+            if "peak_gpu_mem_mb" in s:
+                line += f", peak GPU {s['peak_gpu_mem_mb']:.0f} MB"
+            print(line)
+
+    def trace(self) -> Dict[str, Any]:
+        meta = {"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": self.name}}
+        return {"traceEvents": [meta] + self.events, "displayTimeUnit": "ms", "otherData": {"name": self.name, "created": time.time(), "gpu_sampled": self.gpu_available}}
+
+    def save(self, path: str) -> str:
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+        return path
+
+    def save_to_scene(self, scene_path: str, label: str = "") -> str:
+        """Write scenes/<name>/logs/trace-<timestamp>[-label].json and return its path."""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        suffix = f"-{label}" if label else ""
+        return self.save(os.path.join(scene_path, "logs", f"trace-{stamp}{suffix}.json"))
+
+
+def active() -> Optional[Profiler]:
+    """The innermost profiler with an open span in this thread, if any."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+@contextlib.contextmanager
+def span(name: str, category: str = "subprocess", **args: Any) -> Iterator[Optional[Dict[str, Any]]]:
+    """Record a nested span on the active profiler; a no-op when nothing is being profiled."""
+    prof = active()
+    if prof is None:
+        yield None
+        return
+    with prof.span(name, category, **args) as rec:
+        yield rec
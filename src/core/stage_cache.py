@@ -0,0 +1,152 @@
+"""Per-scene, content-addressed stage cache for the pipeline orchestrator.
+
+Each scene keeps `scenes/<name>/.pipeline_manifest.json` recording, per stage, the parameters,
+a digest of the stage inputs and a digest of each output path. A stage is up to date when its
+parameters and input digest are unchanged and its outputs are still on disk with the recorded content.
+Downstream stages include upstream output digests in their inputs, so a change re-runs only what follows it.
+
+File digests are memoised by (size, mtime_ns) so unchanged multi-GB image folders are not re-read.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.hashing import combine_digests, hash_file, hash_params
+
+MANIFEST_NAME = ".pipeline_manifest.json"
+
+
+class StageCache:
+    """Load, query and update the stage manifest of a single scene."""
+
+    def __init__(self, scene_path: str, manifest_name: str = MANIFEST_NAME):
+        self.scene_path = os.path.abspath(scene_path)
+        self.path = os.path.join(self.scene_path, manifest_name)
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.file_cache: Dict[str, List[Any]] = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.stages = data.get("stages", {})
+                self.file_cache = data.get("file_cache", {})
+            except (OSError, ValueError):
+                # A corrupt manifest only costs a rerun.
+                self.stages, self.file_cache = {}, {}
+
+    def save(self) -> None:
+        os.makedirs(self.scene_path, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "stages": self.stages, "file_cache": self.file_cache}, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    # -- digests ---------------------------------------------------------
+
+    def file_digest(self, path: str) -> str:
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        cached = self.file_cache.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hash_file(path)
+        self.file_cache[key] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def path_digest(self, path: str) -> Optional[str]:
+        """Digest of a file, or of every file under a directory (relative names included). None if missing."""
+        if os.path.isfile(path):
+            return self.file_digest(path)
+        if not os.path.isdir(path):
+            return None
+        parts = []
+        for root, dirs, files in os.walk(path, followlinks=True):
+            dirs.sort()
+            for fname in sorted(files):
+                full = os.path.join(root, fname)
+                rel = os.path.relpath(full, path).replace(os.sep, "/")
+                parts.append(rel)
+                parts.append(self.file_digest(full))
+        return combine_digests(parts)
+
+    def outputs_digest(self, outputs: Iterable[str]) -> Dict[str, Optional[str]]:
+        return {self._rel(p): self.path_digest(p) for p in outputs}
+
+    def _rel(self, path: str) -> str:
+        path = os.path.abspath(path)
+        try:
+            return os.path.relpath(path, self.scene_path).replace(os.sep, "/")
+        except ValueError:
+            return path
+
+    def _abs(self, rel: str) -> str:
+        return rel if os.path.isabs(rel) else os.path.join(self.scene_path, rel)
+
+    # -- stage records ---------------------------------------------------
+
+    def is_fresh(self, stage: str, params: Dict[str, Any], inputs_digest: str, check_outputs: bool = True) -> bool:
+        """True when `stage` was recorded with these params/inputs and its outputs are intact.
+
+        check_outputs=False only requires the outputs to still exist, for stages whose outputs later
+        stages rewrite in place (scene preparation: the undistorter and selection change images/).
+        """
+        rec = self.stages.get(stage)
+        if not rec or rec.get("params_digest") != hash_params(params):
+            return False
+        if inputs_digest not in (rec.get("inputs"), rec.get("inputs_after")):
+            return False
+        outputs = rec.get("outputs", {})
+        if not outputs:
+            return False
+        for rel, digest in outputs.items():
+            current = self.path_digest(self._abs(rel))
+            if digest is None or current is None or (check_outputs and current != digest):
+                return False
+        return True
+
+    def record(
+        self,
+        stage: str,
+        params: Dict[str, Any],
+        inputs_digest: str,
+        outputs: Iterable[str],
+        inputs_after: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Record a completed stage and persist the manifest.
+
+        inputs_after is the input digest measured after the stage ran, for stages that rewrite
+        their own inputs (COLMAP's undistorter writes into images/); either digest counts as unchanged.
+        """
+        rec = {
+            "params": params,
+            "params_digest": hash_params(params),
+            "inputs": inputs_digest,
+            "inputs_after": inputs_after or inputs_digest,
+            "outputs": self.outputs_digest(outputs),
+            "completed_at": time.time(),
+        }
+        self.stages[stage] = rec
+        self.save()
+        return rec
+
+    def output_digest(self, stage: str) -> Optional[str]:
+        """Single digest summarising a recorded stage's outputs, for use as a downstream input."""
+        rec = self.stages.get(stage)
+        if not rec:
+            return None
+        return combine_digests(f"{k}={v}" for k, v in sorted(rec.get("outputs", {}).items()))
+
+    def refresh_outputs(self, stage: str) -> None:
+        """Re-digest a recorded stage's outputs after a later stage rewrote them in place (sparse cleanup)."""
+        rec = self.stages.get(stage)
+        if rec:
+            rec["outputs"] = self.outputs_digest(self._abs(rel) for rel in rec.get("outputs", {}))
+            self.save()
+
+    def invalidate(self, stages: Iterable[str]) -> None:
+        for stage in stages:
+            self.stages.pop(stage, None)
+        self.save()
@@ -0,0 +1,212 @@
+"""Parallel image ingest: decode, EXIF-orient, convert and resize photos before COLMAP.
+
+Replaces the serial loops in `scripts/convert_heic.py` and `scripts/make_input_jpgs.py`.
+Work is spread over a process pool and a content-hash manifest in the destination folder
+lets repeat runs skip images whose bytes (and ingest parameters) have not changed.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.core.hashing import hash_file, hash_params
+
+MANIFEST_NAME = ".ingest_manifest.json"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".heic", ".heif", ".tif", ".tiff", ".bmp", ".webp"}
+JPEG_EXTENSIONS = {".jpg", ".jpeg"}
+HEIF_EXTENSIONS = {".heic", ".heif"}
+
+
+def _register_heif() -> bool:
+    try:
+        from pillow_heif import register_heif_opener
+    except ImportError:
+        return False
+    register_heif_opener()
+    return True
+
+
+def list_images(src_dir: str, extensions: Optional[Iterable[str]] = None) -> List[str]:
+    """Return sorted image filenames (not recursive) in src_dir, optionally limited to some extensions."""
+    allowed = {e.lower() for e in extensions} if extensions is not None else IMAGE_EXTENSIONS
+    names = []
+    for fname in sorted(os.listdir(src_dir)):
+        if os.path.splitext(fname)[1].lower() in allowed and os.path.isfile(os.path.join(src_dir, fname)):
+            names.append(fname)
+    return names
+
+
+def output_names(names: List[str]) -> Dict[str, str]:
+    """Map each source filename to a unique `<stem>.jpg` output name.
+
+    When two sources share a stem (e.g. `a.HEIC` and `a.png`) the later one keeps its extension in the name.
+    """
+    mapping: Dict[str, str] = {}
+    used = set()
+    for fname in names:
+        stem, ext = os.path.splitext(fname)
+        out = f"{stem}.jpg"
+        if out.lower() in used:
+            out = f"{stem}_{ext.lstrip('.').lower()}.jpg"
+        used.add(out.lower())
+        mapping[fname] = out
+    return mapping
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("entries", {}) if isinstance(data, dict) else {}
+
+
+def save_manifest(path: str, entries: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "entries": entries}, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _ingest_one(src: str, dst: str, params: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Worker: hash src, skip if the manifest entry still matches, otherwise convert. Runs in a child process."""
+    start = time.perf_counter()
+    digest = hash_file(src)
+    key = hash_params({"source": digest, "params": params})
+    result: Dict[str, Any] = {"source": src, "output": dst, "source_sha256": digest, "key": key, "bytes_in": os.path.getsize(src)}
+    if previous and previous.get("key") == key and os.path.isfile(dst):
+        result.update(status="skipped", seconds=time.perf_counter() - start, bytes_out=os.path.getsize(dst))
+        return result
+
+    try:
+        from PIL import Image, ImageOps
+
+        ext = os.path.splitext(src)[1].lower()
+        if ext in HEIF_EXTENSIONS and not _register_heif():
+            raise RuntimeError("pillow-heif not installed. Install with: pip install pillow-heif")
+
+        max_size = params.get("max_size")
+        with Image.open(src) as img:
+            orientation = img.getexif().get(0x0112, 1)
+            fits = not max_size or max(img.size) <= max_size
+            if ext in JPEG_EXTENSIONS and fits and orientation == 1 and img.mode in ("RGB", "L"):
+                # Already a correctly oriented JPEG at target size: copy bytes instead of re-encoding
+                # (nothing to do when ingesting in place).
+                if not (os.path.exists(dst) and os.path.samefile(src, dst)):
+                    shutil.copy2(src, dst)
+                mode = "copied"
+            else:
+                if max_size and ext in JPEG_EXTENSIONS:
+                    # Let libjpeg decode at a reduced DCT scale; far cheaper than full decode + resize.
+                    img.draft("RGB", (max_size, max_size))
+                out = ImageOps.exif_transpose(img)
+                if out.mode != "RGB":
+                    out = out.convert("RGB")
+                if max_size:
+                    out.thumbnail((max_size, max_size), Image.LANCZOS)
+                tmp = dst + ".part"
+                out.save(tmp, "JPEG", quality=params.get("quality", 95))
+                os.replace(tmp, dst)
+                mode = "converted"
+        result.update(status=mode, bytes_out=os.path.getsize(dst))
+    except Exception as e:
+        result.update(status="error", error=str(e))
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def ingest_images(
+    src_dir: str,
+    dst_dir: str,
+    max_size: Optional[int] = None,
+    quality: int = 95,
+    workers: Optional[int] = None,
+    manifest_path: Optional[str] = None,
+    verbose: bool = True,
+    extensions: Optional[Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """Convert every image in src_dir into an upright RGB JPEG in dst_dir using a process pool.
+
+    Args:
+        src_dir: Folder of source images (JPG/PNG/HEIC/...; not recursive)
+        dst_dir: Output folder for `<stem>.jpg` files
+        max_size: Optional longest-side limit in pixels (aspect ratio kept)
+        quality: JPEG quality for re-encoded images
+        workers: Process count (default: os.cpu_count()); 0 runs in-process
+        manifest_path: Content-hash manifest (default: dst_dir/.ingest_manifest.json)
+        extensions: Only ingest sources with these extensions (default: every IMAGE_EXTENSIONS type)
+
+    Returns a report dict with counts, per-image results and throughput (images/s, MB/s).
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(dst_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    params = {"max_size": max_size, "quality": quality}
+
+    names = list_images(src_dir, extensions)
+    if os.path.abspath(src_dir) == os.path.abspath(dst_dir):
+        # In place: JPEGs written by an earlier run from a different, still present source are
+        # outputs, not new sources (otherwise every rerun would add a_png.jpg, a_png_jpg.jpg, ...).
+        present = set(names)
+        generated = {out for out, e in manifest.items() if e.get("source") != out and e.get("source") in present}
+        names = [n for n in names if n not in generated]
+    mapping = output_names(names)
+    jobs: List[Tuple[str, str, Dict[str, Any], Optional[Dict[str, Any]]]] = [
+        (os.path.join(src_dir, n), os.path.join(dst_dir, mapping[n]), params, manifest.get(mapping[n])) for n in names
+    ]
+    if verbose:
+        print(f"Ingesting {len(jobs)} images from {src_dir} -> {dst_dir}")
+
+    start = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    if workers == 0 or len(jobs) <= 1:
+        results = [_ingest_one(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_ingest_one, *job) for job in jobs]
+            for i, fut in enumerate(futures, 1):
+                res = fut.result()
+                results.append(res)
+                if verbose and (i % 50 == 0 or res["status"] == "error"):
+                    print(f"[{i}/{len(jobs)}] {os.path.basename(res['source'])}: {res['status']} ({res['seconds']:.2f}s)")
+    elapsed = time.perf_counter() - start
+
+    # Entries for sources outside this run's extension filter stay valid.
+    new_manifest = {}
+    if extensions is not None:
+        allowed = {e.lower() for e in extensions}
+        new_manifest = {out: e for out, e in manifest.items() if os.path.splitext(e.get("source", ""))[1].lower() not in allowed}
+    for name, res in zip(names, results):
+        out_name = mapping[name]
+        if res["status"] == "error":
+            if verbose:
+                print(f"ERROR converting {name}: {res.get('error')}")
+            continue
+        new_manifest[out_name] = {"source": name, "source_sha256": res["source_sha256"], "key": res["key"], "params": params}
+    save_manifest(manifest_path, new_manifest)
+
+    counts: Dict[str, int] = {}
+    for res in results:
+        counts[res["status"]] = counts.get(res["status"], 0) + 1
+    processed = [r for r in results if r["status"] in ("converted", "copied")]
+    bytes_in = sum(r["bytes_in"] for r in results)
+    report = {
+        "total": len(results),
+        "counts": counts,
+        "elapsed_s": elapsed,
+        "images_per_s": len(results) / elapsed if elapsed > 0 else 0.0,
+        "mb_per_s": bytes_in / 1e6 / elapsed if elapsed > 0 else 0.0,
+        "mean_image_s": sum(r["seconds"] for r in processed) / len(processed) if processed else 0.0,
+        "results": results,
+    }
+    if verbose:
+        summary = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        print(f"Ingest complete in {elapsed:.2f}s ({report['images_per_s']:.1f} img/s, {report['mb_per_s']:.1f} MB/s): {summary}")
+    return report
@@ -0,0 +1,206 @@
+"""Pre-COLMAP image set reduction: reject blurred frames and near-duplicates.
+
+COLMAP matching cost grows with the square of the image count, and handheld/burst captures contain
+many soft or near-identical frames. Images are decoded once at reduced size on a process pool and
+scored in batches with NumPy:
+
+* sharpness: variance of the 4-neighbour Laplacian on a grayscale thumbnail
+* perceptual hash: 64-bit DCT hash (pHash) of a 32x32 thumbnail; near-duplicates differ in few bits
+
+Selection drops frames much softer than the shoot's median, then keeps the sharpest frame of every
+group of near-duplicates, and finally (optionally) thins the sequence to a target count by keeping
+the sharpest frame in each of `target_count` consecutive buckets so temporal coverage is preserved.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.ingest import list_images
+
+SHARPNESS_SIZE = 384
+HASH_SIZE = 32
+HASH_BITS = 8  # 8x8 low-frequency DCT block -> 64-bit hash
+BATCH = 256
+
+
+def _thumbnails(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker: decode once, return (sharpness thumbnail, hash thumbnail) as grayscale uint8."""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        img.draft("L", (SHARPNESS_SIZE, SHARPNESS_SIZE))
+        gray = ImageOps.exif_transpose(img).convert("L")
+    sharp = np.asarray(gray.resize((SHARPNESS_SIZE, SHARPNESS_SIZE), Image.BILINEAR))
+    small = np.asarray(gray.resize((HASH_SIZE, HASH_SIZE), Image.LANCZOS))
+    return sharp, small
+
+
+def laplacian_variance(batch: np.ndarray) -> np.ndarray:
+    """Variance of the discrete Laplacian for a (N, H, W) stack of grayscale images."""
+    x = batch.astype(np.float32)
+    lap = x[:, :-2, 1:-1] + x[:, 2:, 1:-1] + x[:, 1:-1, :-2] + x[:, 1:-1, 2:] - 4.0 * x[:, 1:-1, 1:-1]
+    return lap.reshape(len(x), -1).var(axis=1)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m
+
+
+def phash(batch: np.ndarray) -> np.ndarray:
+    """64-bit DCT perceptual hashes for a (N, 32, 32) stack, returned as uint64."""
+    d = _dct_matrix(batch.shape[1])
+    coeffs = np.einsum("ij,njk,lk->nil", d, batch.astype(np.float64), d)[:, :HASH_BITS, :HASH_BITS]
+    flat = coeffs.reshape(len(batch), -1)
+    # Median over the block excluding the DC term, which only encodes overall brightness.
+    bits = flat > np.median(flat[:, 1:], axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between uint64 hash arrays a (N,) and b (M,) -> (N, M)."""
+    x = np.bitwise_xor(a[:, None], b[None, :])
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x).astype(np.int32)
+    return np.unpackbits(x.view(np.uint8).reshape(x.shape + (8,)), axis=-1).sum(axis=-1).astype(np.int32)
+
+
+def score_images(paths: List[str], workers: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Sharpness and perceptual hash for every path, decoded in bounded batches on a process pool."""
+    sharpness = np.zeros(len(paths), dtype=np.float64)
+    hashes = np.zeros(len(paths), dtype=np.uint64)
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 0 and len(paths) > 1 else None
+    try:
+        for s in range(0, len(paths), BATCH):
+            chunk = paths[s : s + BATCH]
+            thumbs = list(pool.map(_thumbnails, chunk)) if pool else [_thumbnails(p) for p in chunk]
+            sharpness[s : s + len(chunk)] = laplacian_variance(np.stack([t[0] for t in thumbs]))
+            hashes[s : s + len(chunk)] = phash(np.stack([t[1] for t in thumbs]))
+    finally:
+        if pool:
+            pool.shutdown()
+    return {"sharpness": sharpness, "hash": hashes}
+
+
+def select_images(
+    sharpness: np.ndarray,
+    hashes: np.ndarray,
+    blur_ratio: float = 0.3,
+    min_sharpness: Optional[float] = None,
+    dup_distance: int = 6,
+    target_count: Optional[int] = None,
+) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """Decide which images to keep. Inputs are in capture order.
+
+    Args:
+        blur_ratio: Reject images whose sharpness is below this fraction of the median sharpness
+        min_sharpness: Optional absolute sharpness floor (applied in addition to blur_ratio)
+        dup_distance: Hashes within this many bits (of 64) are near-duplicates
+        target_count: Optionally thin the survivors to at most this many, evenly over the sequence
+
+    Returns (keep mask, list of {"index", "reason", ...} for every removed image).
+    """
+    n = len(sharpness)
+    keep = np.ones(n, dtype=bool)
+    removed: List[Dict[str, Any]] = []
+    if n == 0:
+        return keep, removed
+
+    floor = blur_ratio * float(np.median(sharpness))
+    if min_sharpness is not None:
+        floor = max(floor, min_sharpness)
+    for i in np.flatnonzero(sharpness < floor):
+        keep[i] = False
+        removed.append({"index": int(i), "reason": "blur", "sharpness": float(sharpness[i]), "threshold": floor})
+
+    # Greedy near-duplicate suppression: sharpest first, drop anything too close to an already kept frame.
+    kept_idx: List[int] = []
+    for i in sorted(np.flatnonzero(keep), key=lambda j: -sharpness[j]):
+        if kept_idx:
+            d = hamming(hashes[i : i + 1], hashes[np.array(kept_idx)])[0]
+            j = int(np.argmin(d))
+            if d[j] <= dup_distance:
+                keep[i] = False
+                removed.append({"index": int(i), "reason": "duplicate", "duplicate_of": kept_idx[j], "distance": int(d[j])})
+                continue
+        kept_idx.append(int(i))
+
+    if target_count is not None and keep.sum() > target_count:
+        survivors = np.flatnonzero(keep)
+        for bucket in np.array_split(survivors, target_count):
+            best = bucket[np.argmax(sharpness[bucket])]
+            for i in bucket:
+                if i != best:
+                    keep[i] = False
+                    removed.append({"index": int(i), "reason": "target_count", "kept_instead": int(best)})
+    return keep, removed
+
+
+def reduce_image_set(
+    images_dir: str,
+    rejected_dir: Optional[str] = None,
+    report_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    dry_run: bool = False,
+    **select_kwargs: Any,
+) -> Dict[str, Any]:
+    """Score images_dir, move rejected frames to rejected_dir and write a JSON report.
+
+    Rejected images are moved, not deleted (default: <images_dir>_rejected next to images_dir), so a
+    selection can be undone by moving them back. select_kwargs are passed to `select_images`.
+    """
+    start = time.perf_counter()
+    names = list_images(images_dir)
+    paths = [os.path.join(images_dir, n) for n in names]
+    scores = score_images(paths, workers=workers)
+    scored = time.perf_counter()
+    keep, removed = select_images(scores["sharpness"], scores["hash"], **select_kwargs)
+
+    rejected_dir = rejected_dir or images_dir.rstrip("/\\") + "_rejected"
+    for rec in removed:
+        rec["name"] = names[rec["index"]]
+        for key in ("duplicate_of", "kept_instead"):
+            if key in rec:
+                rec[key] = names[rec[key]]
+        if not dry_run:
+            os.makedirs(rejected_dir, exist_ok=True)
+            shutil.move(paths[rec["index"]], os.path.join(rejected_dir, rec["name"]))
+
+    reasons: Dict[str, int] = {}
+    for rec in removed:
+        reasons[rec["reason"]] = reasons.get(rec["reason"], 0) + 1
+    report = {
+        "images_dir": os.path.abspath(images_dir),
+        "rejected_dir": os.path.abspath(rejected_dir),
+        "total": len(names),
+        "kept": int(keep.sum()),
+        "removed": len(removed),
+        "removed_by_reason": reasons,
+        "dry_run": dry_run,
+        "params": select_kwargs,
+        "score_seconds": scored - start,
+        "elapsed_seconds": time.perf_counter() - start,
+        "median_sharpness": float(np.median(scores["sharpness"])) if len(names) else 0.0,
+        "removed_images": removed,
+    }
+    if report_path:
+        folder = os.path.dirname(report_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(
+        f"Image selection: kept {report['kept']}/{report['total']} "
+        f"({', '.join(f'{k}={v}' for k, v in sorted(reasons.items())) or 'nothing removed'}) in {report['elapsed_seconds']:.1f}s"
+    )
+    return report
@@ -5,49 +5,415 @@ Functions are intentionally thin and delegate to the src.* modules so they stay
 """
 from __future__ import annotations
 
+import contextlib
+import json
 import os
 import shutil
-from typing import Optional
+import tempfile
+from typing import Any, Dict, Optional, Sequence
 
-from src import colmap as colmap_mod
-from src import training as training_mod
+from src.core import profiler
+from src.core.hashing import combine_digests, hash_params
+from src.core.lazy import lazy_import
+from src.core.stage_cache import StageCache
 
+# Stage implementations pull in NumPy, Pillow and asyncio; import them on first use.
+colmap_mod = lazy_import("src.colmap")
+ingest_mod = lazy_import("src.ingest")
+training_mod = lazy_import("src.training")
+colmap_model = lazy_import("src.convert.colmap_model")
+gaussian_ply = lazy_import("src.convert.gaussian_ply")
+lod = lazy_import("src.convert.lod")
+pyramid = lazy_import("src.convert.pyramid")
+splat_export = lazy_import("src.convert.splat_export")
+selection = lazy_import("src.ingest.selection")
+shards = lazy_import("src.convert.shards")
+sparse_cleanup = lazy_import("src.convert.sparse_cleanup")
+sync_mod = lazy_import("src.sync")
+linking = lazy_import("src.core.linking")
 
-def prepare_scene_from_dir(src_images_dir: str, scene_name: str) -> str:
-    """Prepare a scene directory by copying images from src_images_dir into scenes/<scene_name>/images.
+# Pipeline stages in execution order; used by the stage cache and the --from-stage control.
+STAGES = ("colmap", "cleanup", "training")
 
+
+def prepare_scene_from_dir(
+    src_images_dir: str,
+    scene_name: str,
+    convert_images: bool = False,
+    max_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    link_mode: str = "auto",
+) -> str:
+    """Prepare a scene directory by placing images from src_images_dir into scenes/<scene_name>/images.
+
+    Files are placed with `src.core.linking.link_tree`: link_mode "auto" tries a reflink before falling
+    back to a threaded copy. "hardlink"/"symlink" share the source files and later steps (COLMAP's
+    undistorter, selection) rewrite images/ in place, so only pass them when the originals are disposable.
+    With convert_images=True (or a max_size) images go through `src.ingest.ingest_images` instead:
+    HEIC/PNG decoding, EXIF orientation and resizing run on a process pool and unchanged files are skipped.
+    The step is recorded in the stage cache: while src_images_dir and the options are unchanged it is
+    skipped, so a rerun does not put the originals back over images the undistorter or selection changed.
     Returns the absolute scene path.
     """
     scene_base = os.path.abspath(os.path.join("scenes", scene_name))
     images_dir = os.path.join(scene_base, "images")
     os.makedirs(images_dir, exist_ok=True)
-    # copy files (not recursive) to images folder
-    for fname in os.listdir(src_images_dir):
-        src = os.path.join(src_images_dir, fname)
-        if os.path.isfile(src):
-            dst = os.path.join(images_dir, fname)
-            shutil.copy2(src, dst)
+    cache = StageCache(scene_base)
+    params = {"convert": bool(convert_images or max_size), "max_size": max_size, "link_mode": link_mode}
+    inputs = cache.path_digest(src_images_dir) or ""
+    if cache.is_fresh("prepare", params, inputs, check_outputs=False):
+        print("Scene images already prepared from this source; skipping.")
+        return scene_base
+    if convert_images or max_size:
+        ingest_mod.ingest_images(src_images_dir, images_dir, max_size=max_size, workers=workers)
+    else:
+        report = linking.link_tree(src_images_dir, images_dir, mode=link_mode)
+        print(
+            f"Placed {report['placed']} images via {report['mode']} ({report['skipped']} up to date, "
+            f"{report['deduped']} duplicates, {report['bytes_moved'] / 1e6:.1f} MB moved)"
+        )
+    cache.record("prepare", params, inputs, [images_dir])
     return scene_base
 
 
-def run_full_pipeline(scene_name: str, src_images_dir: Optional[str] = None, aabb_scale: int = 16, iterations: int = 30000) -> None:
-    """Run the full pipeline for a scene.
+def select_scene_images(scene_name: str, target_count: Optional[int] = None, force: bool = False, **select_kwargs: Any) -> Dict[str, Any]:
+    """Drop blurred frames and near-duplicates from scenes/<scene_name>/images before COLMAP.
 
-    If src_images_dir is provided, images are copied into `scenes/<scene_name>/images` first.
-    This function delegates to the colmap/convert/training modules and raises on failures.
+    Rejected images are moved to scenes/<scene_name>/images_rejected and a report is written to
+    logs/selection_report.json. The stage cache keys the result on the names of the full set (kept
+    plus rejected), so neither COLMAP rewriting the kept images nor a rerun thins an already reduced
+    set; when the selection does run again (new images, new parameters, force) the earlier rejects
+    are moved back first and the whole set is scored afresh.
     """
-    if src_images_dir:
-        prepare_scene_from_dir(src_images_dir, scene_name)
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    images_dir = os.path.join(scene_base, "images")
+    rejected_dir = os.path.join(scene_base, "images_rejected")
+    report_path = os.path.join(scene_base, "logs", "selection_report.json")
+    cache = StageCache(scene_base)
+    # workers only changes how fast the images are scored, not which are kept.
+    params = dict({k: v for k, v in select_kwargs.items() if k != "workers"}, target_count=target_count)
+    rejected = ingest_mod.list_images(rejected_dir) if os.path.isdir(rejected_dir) else []
+    inputs = hash_params({"names": sorted(ingest_mod.list_images(images_dir) + rejected)})
+    if not force and cache.is_fresh("select", params, inputs):
+        print("Image selection up to date; skipping.")
+        return {"skipped": True}
+    for name in rejected:
+        if not os.path.exists(os.path.join(images_dir, name)):
+            shutil.move(os.path.join(rejected_dir, name), os.path.join(images_dir, name))
+    report = selection.reduce_image_set(images_dir, rejected_dir=rejected_dir, report_path=report_path, target_count=target_count, **select_kwargs)
+    cache.record("select", params, inputs, [report_path])
+    return report
+
+
+def validate_sparse(scene_base: str) -> Dict[str, Any]:
+    """Check the COLMAP model in scenes/<name>/sparse/0 in-process and save its summary to logs/.
+
+    Raises FileNotFoundError if no model was written and RuntimeError if it is too small to train on.
+    """
+    summary = colmap_model.validate_model(os.path.join(scene_base, "sparse", "0"))
+    logs_dir = os.path.join(scene_base, "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+    with open(os.path.join(logs_dir, "sparse_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(
+        f"Sparse model: {summary['num_registered_images']} registered images, {summary['num_points3D']} points, "
+        f"mean reprojection error {summary['mean_reprojection_error']:.3f}px, mean track length {summary['mean_track_length']:.2f}"
+    )
+    return summary
+
+
+def run_stage(
+    scene_name: str,
+    stage: str,
+    aabb_scale: int = 16,
+    iterations: int = 30000,
+    use_gpu: bool = True,
+    force: bool = False,
+    matcher: str = "auto",
+    cleanup: Optional[Dict[str, Any]] = None,
+    images: Optional[str] = None,
+) -> str:
+    """Run one pipeline stage for scenes/<scene_name>, consulting the stage cache.
 
+    Returns "ran" or "skipped". Stages are independent calls so schedulers (see `src.batch`)
+    can place each one on its own resource pool. cleanup overrides the filters of the "cleanup"
+    stage (see `src.convert.sparse_cleanup.clean_points`); `sparse_cleanup.DISABLED` turns them off.
+    images makes training load its images from that folder, e.g. the local copy `pack_scene_images` extracts.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage {stage!r}; expected one of {', '.join(STAGES)}")
     scene_base = os.path.abspath(os.path.join("scenes", scene_name))
     images_dir = os.path.join(scene_base, "images")
     if not os.path.isdir(images_dir):
         raise FileNotFoundError(f"Images folder missing: {images_dir}")
+    cache = StageCache(scene_base)
+
+    if stage == "colmap":
+        # COLMAP (includes conversion to Gaussian Splatting format)
+        colmap_params = {"aabb_scale": aabb_scale, "use_gpu": use_gpu, "matcher": matcher}
+        colmap_inputs = cache.path_digest(images_dir) or ""
+        if not force and cache.is_fresh("colmap", colmap_params, colmap_inputs):
+            print("COLMAP outputs up to date; skipping (use force/from_stage to rerun).")
+            return "skipped"
+        colmap_mod.run_colmap(images_dir, scene_base, aabb_scale=aabb_scale, wrapper_script=os.path.join("scripts", "run-colmap.py"), use_gpu=use_gpu, matcher=matcher, resume=not force)
+        validate_sparse(scene_base)
+        # convert.py undistorts into images/, so remember the post-run digest as an accepted input too.
+        cache.record("colmap", colmap_params, colmap_inputs, [os.path.join(scene_base, "sparse")], inputs_after=cache.path_digest(images_dir))
+        return "ran"
+
+    if stage == "cleanup":
+        # Filter sparse/0 in place. The untouched COLMAP model is kept in sparse_raw/0 so that new
+        # filter settings start from the original points rather than from an already cleaned model.
+        sparse_dir = os.path.join(scene_base, "sparse", "0")
+        raw_dir = os.path.join(scene_base, "sparse_raw", "0")
+        cleanup_params = dict(cleanup or {})
+        current = cache.path_digest(sparse_dir)
+        if current is None:
+            raise FileNotFoundError(f"No COLMAP model in {sparse_dir}; run the colmap stage first")
+        if not force and cache.is_fresh("cleanup", cleanup_params, current):
+            print("Sparse cleanup up to date; skipping (use force/from_stage to rerun).")
+            return "skipped"
+        previous = cache.stages.get("cleanup")
+        if not (previous and previous.get("inputs_after") == current and os.path.isdir(raw_dir)):
+            shutil.rmtree(raw_dir, ignore_errors=True)
+            shutil.copytree(sparse_dir, raw_dir)
+        raw_digest = cache.path_digest(raw_dir) or ""
+        report = sparse_cleanup.clean_model(raw_dir, out_dir=sparse_dir, **cleanup_params)
+        os.makedirs(os.path.join(scene_base, "logs"), exist_ok=True)
+        with open(os.path.join(scene_base, "logs", "sparse_cleanup.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        cache.record("cleanup", cleanup_params, raw_digest, [sparse_dir], inputs_after=cache.path_digest(sparse_dir))
+        # COLMAP's recorded outputs now describe the cleaned model; without this COLMAP would rerun.
+        cache.refresh_outputs("colmap")
+        return "ran"
+
+    # Training (the COLMAP convert.py script handles conversion, so no separate step is needed)
+    model_path = os.path.join(scene_base, "output")
+    training_params = {"iterations": iterations, "pipeline": "gaussian"}
+    training_inputs = combine_digests([cache.output_digest("colmap") or "", cache.path_digest(images_dir) or ""])
+    if not force and cache.is_fresh("training", training_params, training_inputs):
+        print("Training outputs up to date; skipping (use force/from_stage to rerun).")
+        return "skipped"
+    training_mod.run_training(scene_base, pipeline="gaussian", iterations=iterations, wrapper_script=os.path.join("scripts", "train.py"), model_path=model_path, resume=not force, inputs_digest=training_inputs, images_dir=images)
+    cache.record("training", training_params, training_inputs, [os.path.join(model_path, "point_cloud")])
+    return "ran"
+
+
+def build_scene_pyramid(scene_name: str, levels: Sequence[int] = (2, 4, 8), workers: Optional[int] = None) -> Dict[str, Any]:
+    """Write scenes/<scene_name>/images_2, images_4, ... from the undistorted images (see `src.convert.pyramid`).
+
+    Up-to-date levels are skipped per image by the pyramid manifest, so this is cheap to rerun.
+    """
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    if not os.path.isdir(os.path.join(scene_base, "sparse", "0")):
+        raise FileNotFoundError(f"No COLMAP model in {os.path.join(scene_base, 'sparse', '0')}; run the colmap stage first")
+    return pyramid.build_pyramid(scene_base, levels=levels, workers=workers)
+
+
+def pack_scene_images(
+    scene_name: str,
+    resolution: int = 1,
+    mode: str = "encoded",
+    local_dir: Optional[str] = None,
+    force: bool = False,
+    **pack_kwargs: Any,
+) -> Dict[str, Any]:
+    """Pack the undistorted images of scenes/<scene_name> into scenes/<scene_name>/shards (see `src.convert.shards`).
+
+    resolution picks images/ (1) or a pyramid level images_<resolution>. Repacking is skipped while
+    the source images and parameters are unchanged. With local_dir (e.g. /content/<scene> on Colab)
+    the shards are copied in bulk to local_dir/shards and their images extracted to local_dir/images,
+    so training reads local files instead of one network round trip per image; the report then has
+    "local" (the copy report) and "images" (the extracted folder).
+    """
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    source, _ = shards.source_dir(scene_base, resolution)
+    cache = StageCache(scene_base)
+    shard_dir = os.path.join(scene_base, "shards")
+    params = dict(pack_kwargs, resolution=resolution, mode=mode, source=os.path.relpath(source, scene_base))
+    inputs = cache.path_digest(source)
+    if inputs is None:
+        raise FileNotFoundError(f"No images to pack in {source}")
+    if not force and cache.is_fresh("shards", params, inputs):
+        print("Image shards up to date; skipping.")
+        report: Dict[str, Any] = {"skipped": True}
+    else:
+        report = shards.pack_images(scene_base, shard_dir, resolution=resolution, mode=mode, **pack_kwargs)
+        cache.record("shards", params, inputs, [shard_dir])
+    if local_dir:
+        report["local"] = shards.copy_shards(shard_dir, os.path.join(local_dir, "shards"))
+        report["images"] = os.path.join(local_dir, "images")
+        count = shards.extract_images(os.path.join(local_dir, "shards"), report["images"])
+        print(f"Extracted {count} images to {report['images']}")
+    return report
 
-    # 1) COLMAP (includes conversion to Gaussian Splatting format)
-    colmap_mod.run_colmap(images_dir, scene_base, aabb_scale=aabb_scale, wrapper_script=os.path.join("scripts", "run-colmap.py"))
 
-    # Note: The COLMAP convert.py script handles conversion, so no separate step needed
+def export_scene(
+    scene_name: str,
+    formats: Optional[Sequence[str]] = None,
+    force: bool = False,
+    **export_kwargs: Any,
+) -> Dict[str, Any]:
+    """Write compact copies of the latest trained point cloud to scenes/<scene_name>/export.
+
+    formats defaults to `splat_export.DEFAULT_FORMATS`; export_kwargs go to
+    `src.convert.splat_export.export_splats` (min_opacity, max_scale, bbox, sh_degree). The report is saved to logs/export_report.json; an unchanged export is skipped.
+    """
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    ply_path = gaussian_ply.latest_point_cloud(os.path.join(scene_base, "output"))
+    if ply_path is None:
+        raise FileNotFoundError(f"No trained point cloud under {os.path.join(scene_base, 'output', 'point_cloud')}")
+    formats = list(formats or splat_export.DEFAULT_FORMATS)
+    cache = StageCache(scene_base)
+    export_dir = os.path.join(scene_base, "export")
+    params = dict(export_kwargs, formats=list(formats), source=os.path.relpath(ply_path, scene_base))
+    inputs = cache.file_digest(ply_path)
+    if not force and cache.is_fresh("export", params, inputs):
+        print("Export up to date; skipping.")
+        return {"skipped": True}
+    report = splat_export.export_splats(
+        ply_path, export_dir, formats=formats, name=scene_name, report_path=os.path.join(scene_base, "logs", "export_report.json"), **export_kwargs
+    )
+    cache.record("export", params, inputs, [export_dir])
+    return report
+
+
+def tile_scene(scene_name: str, force: bool = False, **tile_kwargs: Any) -> Dict[str, Any]:
+    """Build octree LOD tiles of the latest trained point cloud in scenes/<scene_name>/tiles.
+
+    tile_kwargs go to `src.convert.lod.build_tiles` (max_per_tile, lod_size, max_depth, record_format,
+    min_opacity). Unchanged tiles are skipped via the stage cache.
+    """
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    ply_path = gaussian_ply.latest_point_cloud(os.path.join(scene_base, "output"))
+    if ply_path is None:
+        raise FileNotFoundError(f"No trained point cloud under {os.path.join(scene_base, 'output', 'point_cloud')}")
+    cache = StageCache(scene_base)
+    tiles_dir = os.path.join(scene_base, "tiles")
+    params = dict(tile_kwargs, source=os.path.relpath(ply_path, scene_base))
+    inputs = cache.file_digest(ply_path)
+    if not force and cache.is_fresh("tiles", params, inputs):
+        print("Tiles up to date; skipping.")
+        return {"skipped": True}
+    index = lod.build_tiles(ply_path, tiles_dir, **tile_kwargs)
+    cache.record("tiles", params, inputs, [tiles_dir])
+    return index
+
+
+def sync_scene(scene_name: str, dest: str, background: bool = False, **sync_kwargs: Any) -> Any:
+    """Upload what changed in scenes/<scene_name> to dest under the prefix <scene_name> (see `src.sync`).
+
+    dest is a directory (e.g. a mounted Drive folder) or a URL of a registered backend. Inputs such
+    as images/ are excluded by default. With background=True the sync is queued on a background
+    thread and its Future returned, so the caller can go on to train the next scene.
+    """
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    if not os.path.isdir(scene_base):
+        raise FileNotFoundError(f"Scene folder missing: {scene_base}")
+    sync_kwargs.setdefault("prefix", scene_name)
+    if background:
+        return sync_mod.start_sync(scene_base, dest, **sync_kwargs)
+    return sync_mod.sync_dir(scene_base, dest, **sync_kwargs)
+
+
+def run_full_pipeline(
+    scene_name: str,
+    src_images_dir: Optional[str] = None,
+    aabb_scale: int = 16,
+    iterations: int = 30000,
+    use_gpu: bool = True,
+    force: bool = False,
+    from_stage: Optional[str] = None,
+    profile: bool = True,
+    reduce_images: bool = False,
+    target_count: Optional[int] = None,
+    matcher: str = "auto",
+    export_formats: Optional[Sequence[str]] = None,
+    tiles: bool = False,
+    pyramid_levels: Optional[Sequence[int]] = None,
+    shard_mode: Optional[str] = None,
+    shard_resolution: int = 1,
+    shard_local_dir: Optional[str] = None,
+    cleanup: Optional[Dict[str, Any]] = None,
+    sync_dest: Optional[str] = None,
+) -> Dict[str, str]:
+    """Run the full pipeline for a scene.
+
+    If src_images_dir is provided, images are copied into `scenes/<scene_name>/images` first.
+    This function delegates to the colmap/convert/training modules and raises on failures.
+
+    Stages whose inputs and parameters match `scenes/<scene_name>/.pipeline_manifest.json` and whose
+    outputs are intact are skipped. `force` reruns every stage; `from_stage` (one of STAGES) reruns
+    that stage and everything after it. Returns {stage: "ran" | "skipped"}.
+
+    Between COLMAP and training the sparse points are filtered (track length, reprojection error,
+    statistical outliers, optional voxel downsampling); cleanup overrides those filters as in `run_stage`.
+
+    With reduce_images=True (or a target_count) blurred and near-duplicate frames are removed first
+    (see `select_scene_images`).
+
+    With export_formats (see `src.convert.splat_export.FORMATS`) the trained point cloud is pruned and
+    written in those compact formats afterwards (see `export_scene`); status then includes "export".
+    With tiles=True an octree LOD tiling for streaming viewers is built too (see `tile_scene`).
+
+    With pyramid_levels (e.g. (2, 4, 8)) the images_<f> resolution levels are written after COLMAP,
+    as convert.py's --resize would (see `build_scene_pyramid`); status then includes "pyramid".
+    With shard_mode ("encoded" or "raw") the images at shard_resolution are then packed into mmap-able
+    shards, copied in bulk to shard_local_dir (default <tempdir>/gs_shards/<scene_name>) and extracted
+    there, and training reads that local copy (see `pack_scene_images`); status then includes "shards".
+
+    With sync_dest the scene's outputs are finally uploaded there incrementally (see `sync_scene`);
+    status then includes "sync" ("ran", or "failed" if some files could not be uploaded).
+
+    With profile=True each stage and child process is timed by `src.core.profiler` and a Chrome trace
+    is written to scenes/<scene_name>/logs/trace-<timestamp>.json.
+    """
+    if from_stage is not None and from_stage not in STAGES:
+        raise ValueError(f"Unknown stage {from_stage!r}; expected one of {', '.join(STAGES)}")
+    if src_images_dir:
+        prepare_scene_from_dir(src_images_dir, scene_name)
 
-    # 2) Train
-    training_mod.run_training(scene_base, pipeline="gaussian", iterations=iterations, wrapper_script=os.path.join("scripts", "train.py"))
+    forced = set(STAGES) if force else set(STAGES[STAGES.index(from_stage):]) if from_stage else set()
+    status: Dict[str, str] = {}
+    train_images = None
+    if shard_mode and not shard_local_dir:
+        shard_local_dir = os.path.join(tempfile.gettempdir(), "gs_shards", scene_name)
+    prof = profiler.Profiler(scene_name) if profile else None
+    try:
+        if reduce_images or target_count:
+            with prof.span("select") if prof else contextlib.nullcontext():
+                select_scene_images(scene_name, target_count=target_count)
+        for stage in STAGES:
+            with prof.span(stage) if prof else contextlib.nullcontext() as rec:
+                status[stage] = run_stage(
+                    scene_name, stage, aabb_scale=aabb_scale, iterations=iterations, use_gpu=use_gpu, force=stage in forced, matcher=matcher, cleanup=cleanup, images=train_images
+                )
+                if rec is not None:
+                    rec["args"]["result"] = status[stage]
+            if stage == "colmap" and pyramid_levels:
+                with prof.span("pyramid") if prof else contextlib.nullcontext():
+                    report = build_scene_pyramid(scene_name, levels=pyramid_levels)
+                    status["pyramid"] = "skipped" if report["counts"].get("skipped") == report["total"] else "ran"
+            if stage == "colmap" and shard_mode:
+                with prof.span("shards") if prof else contextlib.nullcontext():
+                    report = pack_scene_images(scene_name, resolution=shard_resolution, mode=shard_mode, local_dir=shard_local_dir, force=force or from_stage is not None)
+                    status["shards"] = "skipped" if report.get("skipped") else "ran"
+                    train_images = report["images"]
+        if export_formats:
+            with prof.span("export") if prof else contextlib.nullcontext():
+                report = export_scene(scene_name, formats=export_formats, force=force or from_stage is not None)
+                status["export"] = "skipped" if report.get("skipped") else "ran"
+        if tiles:
+            with prof.span("tiles") if prof else contextlib.nullcontext():
+                index = tile_scene(scene_name, force=force or from_stage is not None)
+                status["tiles"] = "skipped" if index.get("skipped") else "ran"
+        if sync_dest:
+            with prof.span("sync") if prof else contextlib.nullcontext():
+                report = sync_scene(scene_name, sync_dest)
+                status["sync"] = "failed" if report["failed"] else "skipped" if not report["uploaded"] and not report["deleted"] else "ran"
+    finally:
+        if prof:
+            trace_path = prof.save_to_scene(os.path.abspath(os.path.join("scenes", scene_name)))
+            prof.print_summary()
+            print("Profile trace:", trace_path)
+    return status
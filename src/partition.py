@@ -0,0 +1,503 @@
+"""Large-scene partitioning: split a scene into overlapping spatial blocks, run each block as an
+independent job and merge the per-block Gaussians.
+
+Cameras are placed on a ground plane (the two principal axes of their positions) and split recursively
+at the median of the wider axis until no block holds more than max_images cameras. The resulting core
+cells tile the plane (outer cells are unbounded), and each block also takes every camera within an
+overlap margin of its core so boundary content is seen from both sides.
+
+Camera positions come from one of two sources:
+
+* "sparse": a global COLMAP model already exists in scenes/<name>/sparse/0 (e.g. from a cheap
+  low-resolution run). Each block gets its images plus the matching sub-model and only trains, so
+  every block shares the global frame.
+* "gps": EXIF GPS positions. Each block runs COLMAP and training; its model is then aligned to the
+  local metric GPS frame with a similarity transform fitted to its camera centres.
+
+`merge_blocks` crops every block's Gaussians to its core cell, which leaves exactly one owner for each
+point of the plane, then deduplicates across the cell boundaries: within dedup_radius of a boundary,
+voxels claimed by more than one block keep only the Gaussians of the block contributing the most
+there. The merge streams blocks through memory maps and writes scenes/<name>/output/point_cloud/
+iteration_<N>/point_cloud.ply, so export and tiling work on the merged scene unchanged.
+
+Planning, alignment and merging only need NumPy and are tested on synthetic data.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src import batch, orchestrator
+from src.colmap import matching
+from src.convert import colmap_model, gaussian_ply, splat_export
+from src.core import linking
+from src.core.stage_cache import StageCache
+from src.ingest import list_images
+
+SOURCES = ("auto", "sparse", "gps")
+PARTITION_FILE = "partition.json"
+BLOCKS_DIR = "blocks"
+MAX_IMAGES = 400
+OVERLAP = 0.2
+DEDUP_FRACTION = 0.002  # default dedup radius as a fraction of the camera extent
+
+
+# ---------------------------------------------------------------------------
+# Planning
+
+
+def ground_frame(positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(origin, (2, 3) axes) of the plane spanned by the two principal directions of positions."""
+    positions = np.asarray(positions, dtype=np.float64)
+    origin = positions.mean(axis=0) if len(positions) else np.zeros(3)
+    if len(positions) < 3:
+        return origin, np.eye(3)[:2]
+    _, _, vt = np.linalg.svd(positions - origin, full_matrices=False)
+    return origin, vt[:2]
+
+
+def to_ground(positions: np.ndarray, origin: np.ndarray, axes: np.ndarray) -> np.ndarray:
+    return (np.asarray(positions, dtype=np.float64) - origin) @ np.asarray(axes).T
+
+
+def split_cells(xy: np.ndarray, max_images: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Recursive median splits of the 2D points into cells of at most max_images points.
+
+    Returns [(lo, hi)] cell bounds, half-open [lo, hi) and unbounded (+-inf) on the outside, that tile
+    the plane. A cell whose points all coincide is not split further.
+    """
+    cells = []
+    stack = [(np.full(2, -np.inf), np.full(2, np.inf), np.arange(len(xy)))]
+    while stack:
+        lo, hi, idx = stack.pop()
+        pts = xy[idx]
+        if len(idx) <= max_images:
+            cells.append((lo, hi))
+            continue
+        axis = int(np.argmax(pts.max(axis=0) - pts.min(axis=0)))
+        split = float(np.median(pts[:, axis]))
+        left = pts[:, axis] < split
+        if left.all() or not left.any():
+            cells.append((lo, hi))
+            continue
+        left_hi, right_lo = hi.copy(), lo.copy()
+        left_hi[axis] = right_lo[axis] = split
+        stack.append((right_lo, hi, idx[~left]))
+        stack.append((lo, left_hi, idx[left]))
+    return cells
+
+
+def in_cell(xy: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    return np.all((xy >= lo) & (xy < hi), axis=1)
+
+
+def _expand(lo: np.ndarray, hi: np.ndarray, pts: np.ndarray, overlap: float) -> Tuple[np.ndarray, np.ndarray]:
+    # Margin relative to the cell size; unbounded sides use the extent of the cell's cameras instead.
+    if len(pts):
+        extent = np.where(np.isfinite(hi), hi, pts.max(axis=0)) - np.where(np.isfinite(lo), lo, pts.min(axis=0))
+    else:
+        extent = np.zeros(2)
+    margin = overlap * np.maximum(extent, 0.0)
+    return lo - margin, hi + margin
+
+
+def _bounds_json(lo: np.ndarray, hi: np.ndarray) -> List[List[Optional[float]]]:
+    return [[float(v) if np.isfinite(v) else None for v in b] for b in (lo, hi)]
+
+
+def _bounds_array(bounds: List[List[Optional[float]]]) -> Tuple[np.ndarray, np.ndarray]:
+    lo = np.array([-np.inf if v is None else v for v in bounds[0]])
+    hi = np.array([np.inf if v is None else v for v in bounds[1]])
+    return lo, hi
+
+
+def plan_partition(positions: np.ndarray, names: Sequence[str], max_images: int = MAX_IMAGES, overlap: float = OVERLAP) -> Dict[str, Any]:
+    """Split cameras into overlapping blocks.
+
+    Returns {"origin", "axes", "extent", "blocks": [{"id", "core", "bounds", "images"}]} where core
+    and bounds are [[lo_u, lo_v], [hi_u, hi_v]] in ground-plane coordinates (None = unbounded) and
+    images lists the camera names inside the overlap-expanded bounds.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    if len(positions) != len(names):
+        raise ValueError(f"{len(positions)} positions for {len(names)} images")
+    if max_images < 1:
+        raise ValueError("max_images must be at least 1")
+    origin, axes = ground_frame(positions)
+    xy = to_ground(positions, origin, axes)
+    blocks = []
+    for i, (lo, hi) in enumerate(split_cells(xy, max_images)):
+        core = in_cell(xy, lo, hi)
+        exp_lo, exp_hi = _expand(lo, hi, xy[core], overlap)
+        members = np.flatnonzero(in_cell(xy, exp_lo, exp_hi))
+        blocks.append({
+            "id": f"b{i:02d}",
+            "core": _bounds_json(lo, hi),
+            "bounds": _bounds_json(exp_lo, exp_hi),
+            "core_images": int(core.sum()),
+            "images": [names[j] for j in members],
+        })
+    extent = float(np.ptp(positions, axis=0).max()) if len(positions) else 0.0
+    return {"origin": origin.tolist(), "axes": np.asarray(axes).tolist(), "extent": extent, "blocks": blocks}
+
+
+# ---------------------------------------------------------------------------
+# Camera positions
+
+
+def sparse_positions(model_dir: str) -> Tuple[np.ndarray, List[str]]:
+    model = colmap_model.read_model(model_dir)
+    return colmap_model.camera_centers(model), list(model.image_names)
+
+
+def gps_positions(images_dir: str, names: Optional[List[str]] = None) -> Tuple[np.ndarray, List[str]]:
+    """Local metric positions from EXIF GPS (see `matching.gps_to_local`).
+
+    Images without GPS take the position of the nearest image with GPS in file order, which follows
+    the capture sequence. Raises ValueError if fewer than `matching.METADATA_COVERAGE` have GPS.
+    """
+    names = names if names is not None else list_images(images_dir)
+    meta = matching.collect_metadata(images_dir, names)
+    has = np.array([m["lat"] is not None and m["lon"] is not None for m in meta], dtype=bool)
+    if not len(names) or has.mean() < matching.METADATA_COVERAGE:
+        raise ValueError(f"Only {int(has.sum())} of {len(names)} images in {images_dir} have GPS; partition by a sparse model instead")
+    lat = np.array([m["lat"] for m in meta if m["lat"] is not None and m["lon"] is not None])
+    lon = np.array([m["lon"] for m in meta if m["lat"] is not None and m["lon"] is not None])
+    alts = [m["alt"] for m, ok in zip(meta, has) if ok]
+    alt = np.array(alts, dtype=np.float64) if all(a is not None for a in alts) else None
+    local = matching.gps_to_local(lat, lon, alt)
+    known = np.flatnonzero(has)
+    order = np.arange(len(names))
+    right = np.clip(np.searchsorted(known, order), 0, len(known) - 1)
+    left = np.clip(right - 1, 0, len(known) - 1)
+    pick = np.where(np.abs(known[left] - order) <= np.abs(known[right] - order), left, right)
+    return local[pick], list(names)
+
+
+# ---------------------------------------------------------------------------
+# Alignment
+
+
+def fit_similarity(src: np.ndarray, dst: np.ndarray) -> Dict[str, Any]:
+    """Least-squares similarity dst ~ scale * R @ src + t (Umeyama). Needs three non-collinear points."""
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    if len(src) < 3:
+        raise ValueError("At least three correspondences are needed to align a block")
+    mu_s, mu_d = src.mean(axis=0), dst.mean(axis=0)
+    a, b = src - mu_s, dst - mu_d
+    u, d, vt = np.linalg.svd(b.T @ a / len(src))
+    sign = np.eye(3)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        sign[2, 2] = -1.0
+    rot = u @ sign @ vt
+    var = (a ** 2).sum() / len(src)
+    scale = float(np.trace(np.diag(d) @ sign) / var) if var > 0 else 1.0
+    t = mu_d - scale * rot @ mu_s
+    residual = float(np.sqrt(((scale * a @ rot.T - b) ** 2).sum(axis=1).mean()))
+    return {"scale": scale, "rotation": rot.tolist(), "translation": t.tolist(), "rms_error": residual}
+
+
+def _rotmat_to_qvec(rot: np.ndarray) -> np.ndarray:
+    # Shepperd's method on the largest diagonal term, wxyz like COLMAP and gaussian-splatting.
+    m = np.asarray(rot, dtype=np.float64)
+    trace = np.trace(m)
+    if trace > 0:
+        s = 2.0 * np.sqrt(trace + 1.0)
+        q = [0.25 * s, (m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s]
+    else:
+        i = int(np.argmax(np.diag(m)))
+        j, k = (i + 1) % 3, (i + 2) % 3
+        s = 2.0 * np.sqrt(1.0 + m[i, i] - m[j, j] - m[k, k])
+        q = [0.0] * 4
+        q[0] = (m[k, j] - m[j, k]) / s
+        q[1 + i] = 0.25 * s
+        q[1 + j] = (m[j, i] + m[i, j]) / s
+        q[1 + k] = (m[k, i] + m[i, k]) / s
+    return np.array(q)
+
+
+def transform_gaussians(rows: np.ndarray, transform: Dict[str, Any]) -> np.ndarray:
+    """Copy of rows with positions, scales (log) and rotations (wxyz) moved by a similarity transform.
+
+    Spherical-harmonic rest coefficients are not rotated, so view-dependent colour of a rotated block
+    keeps its original orientation.
+    """
+    rows = np.array(rows)
+    scale = float(transform["scale"])
+    rot = np.asarray(transform["rotation"], dtype=np.float64)
+    pos = gaussian_ply.field_block(rows, "positions").astype(np.float64) @ rot.T * scale + np.asarray(transform["translation"])
+    for i, name in enumerate(gaussian_ply.field_names(rows.dtype, "positions")):
+        rows[name] = pos[:, i]
+    for name in gaussian_ply.field_names(rows.dtype, "scales"):
+        rows[name] += np.float32(np.log(scale))
+    names = gaussian_ply.field_names(rows.dtype, "rotations")
+    if len(names) == 4:
+        w0, x0, y0, z0 = _rotmat_to_qvec(rot)
+        w, x, y, z = (rows[n].astype(np.float64) for n in names)
+        product = (w0 * w - x0 * x - y0 * y - z0 * z, w0 * x + x0 * w + y0 * z - z0 * y, w0 * y - x0 * z + y0 * w + z0 * x, w0 * z + x0 * y - y0 * x + z0 * w)
+        for name, value in zip(names, product):
+            rows[name] = value
+    return rows
+
+
+def align_block(block_base: str, reference: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Fit the similarity from a block's sparse/0 frame to reference {image name: position}."""
+    centers, names = sparse_positions(os.path.join(block_base, "sparse", "0"))
+    shared = [i for i, n in enumerate(names) if n in reference]
+    return fit_similarity(centers[shared], np.array([reference[names[i]] for i in shared]))
+
+
+# ---------------------------------------------------------------------------
+# Merging
+
+
+def _boundary_distance(xy: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    edges = [np.abs(xy[:, a] - v) for a in range(2) for v in (lo[a], hi[a]) if np.isfinite(v)]
+    return np.min(edges, axis=0) if edges else np.full(len(xy), np.inf)
+
+
+def merge_blocks(
+    partition: Dict[str, Any],
+    block_plys: Sequence[str],
+    out_path: str,
+    dedup_radius: Optional[float] = None,
+    chunk_size: int = splat_export.BLOCK,
+) -> Dict[str, Any]:
+    """Crop each block's Gaussians to its core cell, deduplicate along cell boundaries and write one PLY.
+
+    block_plys follows partition["blocks"]; a block with a "transform" is moved into the partition frame
+    first. dedup_radius defaults to DEDUP_FRACTION of the camera extent (0 disables deduplication).
+    Returns merge statistics.
+    """
+    blocks = partition["blocks"]
+    if len(block_plys) != len(blocks):
+        raise ValueError(f"{len(block_plys)} point clouds for {len(blocks)} blocks")
+    origin = np.asarray(partition["origin"])
+    axes = np.asarray(partition["axes"])
+    if dedup_radius is None:
+        dedup_radius = DEDUP_FRACTION * float(partition.get("extent") or 0.0)
+
+    dtype = None
+    kept: List[np.ndarray] = []
+    border: List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]] = []  # (block, index, voxel, weight)
+    stats: Dict[str, Any] = {"blocks": []}
+    for b, (block, ply) in enumerate(zip(blocks, block_plys)):
+        data = gaussian_ply.read_gaussians(ply)
+        packed = np.dtype([(n, "<f4") for n in data.dtype.names])
+        if dtype is None:
+            dtype = packed
+        elif packed != dtype:
+            raise ValueError(f"{ply}: fields differ from the first block ({len(packed.names)} vs {len(dtype.names)})")
+        lo, hi = _bounds_array(block["core"])
+        keep = np.zeros(len(data), dtype=bool)
+        for s in range(0, len(data), chunk_size):
+            rows = np.array(data[s : s + chunk_size])
+            if block.get("transform"):
+                rows = transform_gaussians(rows, block["transform"])
+            pos = gaussian_ply.field_block(rows, "positions").astype(np.float64)
+            xy = to_ground(pos, origin, axes)
+            inside = in_cell(xy, lo, hi)
+            keep[s : s + len(rows)] = inside
+            if dedup_radius > 0:
+                near = inside & (_boundary_distance(xy, lo, hi) < dedup_radius)
+                if near.any():
+                    voxel = np.floor(pos[near] / dedup_radius).astype(np.int64)
+                    border.append((b, s + np.flatnonzero(near), voxel, splat_export.importance(rows[near])))
+        kept.append(keep)
+        stats["blocks"].append({"id": block["id"], "input": int(len(data)), "in_core": int(keep.sum())})
+
+    duplicates = 0
+    if border:
+        owner = np.concatenate([np.full(len(idx), b) for b, idx, _, _ in border])
+        index = np.concatenate([idx for _, idx, _, _ in border])
+        voxel = np.concatenate([v for _, _, v, _ in border])
+        weight = np.concatenate([w for _, _, _, w in border]).astype(np.float64)
+        _, cell = np.unique(voxel, axis=0, return_inverse=True)
+        cell = cell.reshape(-1)
+        # Per (voxel, block) total importance; each contested voxel goes to its strongest block.
+        pair, pair_of = np.unique(np.stack([cell, owner], axis=1), axis=0, return_inverse=True)
+        pair_of = pair_of.reshape(-1)
+        totals = np.bincount(pair_of, weights=weight)
+        order = np.lexsort((-totals, pair[:, 0]))
+        first = order[np.r_[True, pair[order[1:], 0] != pair[order[:-1], 0]]]
+        winner = np.full(cell.max() + 1, -1)
+        winner[pair[first, 0]] = pair[first, 1]
+        drop = winner[cell] != owner
+        duplicates = int(drop.sum())
+        for b in np.unique(owner[drop]).tolist():
+            kept[b][index[drop & (owner == b)]] = False
+
+    total = int(sum(k.sum() for k in kept))
+    out = gaussian_ply.create_gaussians(out_path, dtype, total)
+    pos_out = 0
+    for block, ply, keep in zip(blocks, block_plys, kept):
+        data = gaussian_ply.read_gaussians(ply)
+        for s in range(0, len(data), chunk_size):
+            sel = np.flatnonzero(keep[s : s + chunk_size]) + s
+            if not len(sel):
+                continue
+            rows = np.array(data[sel])
+            if block.get("transform"):
+                rows = transform_gaussians(rows, block["transform"])
+            out[pos_out : pos_out + len(rows)] = rows.astype(dtype)
+            pos_out += len(rows)
+    if total:
+        out.flush()
+    del out
+    stats.update(count=total, duplicates_removed=duplicates, dedup_radius=dedup_radius, path=out_path)
+    print(f"Merged {len(blocks)} blocks into {total} Gaussians ({duplicates} boundary duplicates removed) -> {out_path}")
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+
+
+def block_scene(scene_name: str, block_id: str) -> str:
+    """Scene name of a block, as used by `orchestrator.run_stage` (scenes/<scene>/blocks/<id>)."""
+    return os.path.join(scene_name, BLOCKS_DIR, block_id)
+
+
+def _sync_images(src_dir: str, dst_dir: str, names: List[str], link_mode: str) -> None:
+    os.makedirs(dst_dir, exist_ok=True)
+    wanted = set(names)
+    for name in os.listdir(dst_dir):
+        if name not in wanted and os.path.isfile(os.path.join(dst_dir, name)):
+            os.remove(os.path.join(dst_dir, name))
+    linking.link_tree(src_dir, dst_dir, mode=link_mode, names=names)
+
+
+def prepare_blocks(
+    scene_name: str,
+    source: str = "auto",
+    max_images: int = MAX_IMAGES,
+    overlap: float = OVERLAP,
+    link_mode: str = "auto",
+) -> Dict[str, Any]:
+    """Plan the partition of scenes/<scene_name> and lay out one block scene per cell.
+
+    source "auto" uses the sparse model if scenes/<scene_name>/sparse/0 exists, else EXIF GPS. Block
+    images are placed from the scene's images/ with `src.core.linking`. GPS blocks run their own COLMAP,
+    whose undistorter rewrites images/ in place, so a shared link_mode (hardlink/symlink) is only
+    honoured for the sparse source, where blocks just read their images; with the sparse source each
+    block also gets the sub-model of its cameras and of the points over its expanded bounds. The plan is
+    saved to scenes/<scene_name>/partition.json; block folders no longer in the plan are removed.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown partition source {source!r}; expected one of {', '.join(SOURCES)}")
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    images_dir = os.path.join(scene_base, "images")
+    model_dir = os.path.join(scene_base, "sparse", "0")
+    if source == "auto":
+        source = "sparse" if colmap_model.detect_model_ext(model_dir) else "gps"
+    if source == "sparse":
+        model = colmap_model.read_model(model_dir)
+        positions, names = colmap_model.camera_centers(model), list(model.image_names)
+    else:
+        positions, names = gps_positions(images_dir)
+        if link_mode in linking.SHARED_MODES:
+            link_mode = "auto"
+
+    plan = plan_partition(positions, names, max_images=max_images, overlap=overlap)
+    plan.update(source=source, scene=scene_name, max_images=max_images, overlap=overlap)
+    if source == "gps":
+        plan["reference"] = {n: p.tolist() for n, p in zip(names, positions)}
+    blocks_root = os.path.join(scene_base, BLOCKS_DIR)
+    ids = {b["id"] for b in plan["blocks"]}
+    if os.path.isdir(blocks_root):
+        for name in os.listdir(blocks_root):
+            if name not in ids:
+                shutil.rmtree(os.path.join(blocks_root, name), ignore_errors=True)
+
+    if source == "sparse":
+        points_xy = to_ground(model.points3D["xyz"], np.asarray(plan["origin"]), np.asarray(plan["axes"]))
+        name_index = {n: i for i, n in enumerate(model.image_names)}
+    for block in plan["blocks"]:
+        block["scene"] = block_scene(scene_name, block["id"])
+        block_base = os.path.join(scene_base, BLOCKS_DIR, block["id"])
+        _sync_images(images_dir, os.path.join(block_base, "images"), block["images"], link_mode)
+        if source == "sparse":
+            image_mask = np.zeros(len(model.images), dtype=bool)
+            image_mask[[name_index[n] for n in block["images"]]] = True
+            sub = colmap_model.subset_model(model, image_mask, in_cell(points_xy, *_bounds_array(block["bounds"])))
+            colmap_model.write_model(sub, os.path.join(block_base, "sparse", "0"))
+            block["points3D"] = int(len(sub.points3D))
+            # Stand in for the block's COLMAP stage so its training cache follows the sub-model.
+            cache = StageCache(block_base)
+            cache.record("colmap", {"partition": "sparse"}, cache.path_digest(os.path.join(block_base, "images")) or "", [os.path.join(block_base, "sparse")])
+        print(f"Block {block['id']}: {len(block['images'])} images ({block['core_images']} in core)")
+    save_partition(scene_base, plan)
+    return plan
+
+
+def save_partition(scene_base: str, plan: Dict[str, Any]) -> str:
+    path = os.path.join(scene_base, PARTITION_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=1)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_partition(scene_base: str) -> Dict[str, Any]:
+    with open(os.path.join(scene_base, PARTITION_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_partitioned(
+    scene_name: str,
+    source: str = "auto",
+    max_images: int = MAX_IMAGES,
+    overlap: float = OVERLAP,
+    iterations: int = 30000,
+    use_gpu: bool = True,
+    force: bool = False,
+    matcher: str = "auto",
+    slots: Optional[Dict[str, int]] = None,
+    dedup_radius: Optional[float] = None,
+    cleanup: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Partition scenes/<scene_name>, reconstruct and train every block, then merge them.
+
+    Blocks run as `src.batch.BatchRunner` jobs (slots as there, e.g. {"cpu": 2, "gpu": 1}), so one
+    block's COLMAP overlaps another's training and a rerun resumes from the batch state and stage caches.
+    Raises RuntimeError if any block fails. The merged point cloud is written to
+    scenes/<scene_name>/output/point_cloud/iteration_<iterations>/point_cloud.ply.
+    """
+    scene_base = os.path.abspath(os.path.join("scenes", scene_name))
+    plan = prepare_blocks(scene_name, source=source, max_images=max_images, overlap=overlap)
+    stages = ["cleanup", "training"] if plan["source"] == "sparse" else list(orchestrator.STAGES)
+    # The block layout is part of each job, so a new plan restarts the blocks instead of reusing their state.
+    jobs = [{"scene": b["scene"], "stages": stages, "images": b["images"], "bounds": b["bounds"]} for b in plan["blocks"]]
+    runner = batch.BatchRunner(
+        jobs,
+        state_file=os.path.join(scene_base, "logs", "partition_state.json"),
+        slots=slots,
+        params={"iterations": iterations, "use_gpu": use_gpu, "force": force, "matcher": matcher, "cleanup": cleanup},
+    )
+    results = runner.run(retry_failed=True)
+    failed = sorted(scene for scene, status in results.items() if status != "done")
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(jobs)} blocks failed: {', '.join(failed)}")
+
+    block_plys = []
+    for block in plan["blocks"]:
+        block_base = os.path.join(scene_base, BLOCKS_DIR, block["id"])
+        ply = gaussian_ply.find_point_clouds(os.path.join(block_base, "output")).get(iterations)
+        if ply is None:
+            raise FileNotFoundError(f"Block {block['id']} has no point cloud trained for {iterations} iterations")
+        block_plys.append(ply)
+        if plan["source"] == "gps":
+            reference = {n: np.asarray(p) for n, p in plan["reference"].items()}
+            block["transform"] = align_block(block_base, reference)
+            print(f"Block {block['id']}: aligned to GPS (scale {block['transform']['scale']:.4g}, rms {block['transform']['rms_error']:.3g} m)")
+    save_partition(scene_base, plan)
+    out_path = os.path.join(scene_base, "output", "point_cloud", f"iteration_{iterations}", "point_cloud.ply")
+    stats = merge_blocks(plan, block_plys, out_path, dedup_radius=dedup_radius)
+    with open(os.path.join(scene_base, "logs", "partition_merge.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2)
+    return {"blocks": results, "merge": stats}
@@ -0,0 +1,318 @@
+"""Incremental, resumable sync of scene artifacts (sparse model, logs, checkpoints, PLYs) to storage.
+
+`sync_dir` uploads only what changed since the last sync: every file's sha256 (memoised locally by
+size and mtime in .sync_state.json) is compared with the manifest stored next to the uploaded copy.
+Changed files are split into CHUNK_SIZE parts uploaded on a thread pool. Parts are staged under an
+upload id derived from the key and content, so an interrupted sync resumes by uploading only the
+missing parts. A file becomes visible only when `complete_upload` has verified the assembled digest.
+Logs and text models can be gzip-compressed on the way (deterministically, so unchanged text stays unchanged).
+
+Storage is pluggable: subclass `StorageBackend` and `register_backend` a URL scheme for it.
+`LocalBackend` (plain paths and file:// URLs) writes to a directory, e.g. a mounted Google Drive.
+`start_sync` runs a sync on a background thread so uploads overlap the next scene's training.
+"""
+from __future__ import annotations
+
+import abc
+import fnmatch
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from src.core.hashing import hash_file, hash_params
+from src.ingest import load_manifest, save_manifest
+
+SYNC_STATE = ".sync_state.json"
+REMOTE_MANIFEST = ".sync_manifest.json"
+CHUNK_SIZE = 8 << 20
+# Manifest writes during a sync are throttled to this interval (seconds); one is always written at the end.
+MANIFEST_INTERVAL = 5.0
+COMPRESS_PATTERNS = ("*.log", "*.txt", "*.json", "*.jsonl", "*.csv")
+# Inputs are already stored wherever they came from; sync what the pipeline produced.
+DEFAULT_EXCLUDE = ("images/*", "images_*/*", "*/images/*", "input/*", "shards/*", "*.part", "*.tmp", SYNC_STATE)
+
+
+class StorageBackend(abc.ABC):
+    """Destination of a sync. Keys are '/'-separated paths relative to the destination root.
+
+    An upload writes numbered parts under an upload id and is published by `complete_upload`,
+    which must verify the assembled bytes against the expected sha256 and raise ValueError otherwise.
+    """
+
+    @abc.abstractmethod
+    def read_manifest(self, prefix: str) -> Dict[str, Any]:
+        """The manifest stored under prefix ({} if none)."""
+
+    @abc.abstractmethod
+    def write_manifest(self, prefix: str, entries: Dict[str, Any]) -> None:
+        """Replace the manifest stored under prefix."""
+
+    @abc.abstractmethod
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, int]:
+        """Parts already staged for this upload: {index: size}."""
+
+    @abc.abstractmethod
+    def put_part(self, key: str, upload_id: str, index: int, data: bytes) -> None:
+        """Stage part `index` of an upload."""
+
+    @abc.abstractmethod
+    def complete_upload(self, key: str, upload_id: str, num_parts: int, sha256: str) -> None:
+        """Assemble the staged parts, verify their sha256 and publish them at key."""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key if it exists."""
+
+
+class LocalBackend(StorageBackend):
+    """Directory backend: parts in <root>/.uploads/<upload_id>/, published with an atomic rename."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def _parts_dir(self, upload_id: str) -> str:
+        return os.path.join(self.root, ".uploads", upload_id)
+
+    def read_manifest(self, prefix: str) -> Dict[str, Any]:
+        return load_manifest(self._path(_join(prefix, REMOTE_MANIFEST)))
+
+    def write_manifest(self, prefix: str, entries: Dict[str, Any]) -> None:
+        path = self._path(_join(prefix, REMOTE_MANIFEST))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_manifest(path, entries)
+
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, int]:
+        folder = self._parts_dir(upload_id)
+        if not os.path.isdir(folder):
+            return {}
+        return {int(name): os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder) if name.isdigit()}
+
+    def put_part(self, key: str, upload_id: str, index: int, data: bytes) -> None:
+        folder = self._parts_dir(upload_id)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{index:06d}")
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def complete_upload(self, key: str, upload_id: str, num_parts: int, sha256: str) -> None:
+        folder = self._parts_dir(upload_id)
+        dst = self._path(key)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        h = hashlib.sha256()
+        with open(dst + ".part", "wb") as out:
+            for index in range(num_parts):
+                with open(os.path.join(folder, f"{index:06d}"), "rb") as f:
+                    data = f.read()
+                h.update(data)
+                out.write(data)
+        shutil.rmtree(folder, ignore_errors=True)
+        if h.hexdigest() != sha256:
+            os.remove(dst + ".part")
+            raise ValueError(f"Upload of {key} does not match its source digest (file changed during sync?)")
+        os.replace(dst + ".part", dst)
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+BACKENDS: Dict[str, Callable[[str], StorageBackend]] = {"file": LocalBackend}
+
+
+def register_backend(scheme: str, factory: Callable[[str], StorageBackend]) -> None:
+    """Make `scheme://location` destinations open with factory(location)."""
+    BACKENDS[scheme] = factory
+
+
+def open_backend(dest: Union[str, StorageBackend]) -> StorageBackend:
+    """Backend for a destination: a StorageBackend, a scheme://location URL or a local directory path."""
+    if isinstance(dest, StorageBackend):
+        return dest
+    scheme, sep, location = dest.partition("://")
+    if not sep:
+        return LocalBackend(dest)
+    if scheme not in BACKENDS:
+        raise ValueError(f"No sync backend for {scheme!r}; registered: {', '.join(sorted(BACKENDS))}")
+    return BACKENDS[scheme](location)
+
+
+def _join(prefix: str, rel: str) -> str:
+    return f"{prefix.strip('/')}/{rel}" if prefix.strip("/") else rel
+
+
+def _list_files(src_dir: str, exclude: Sequence[str]) -> List[str]:
+    files = []
+    for root, dirs, names in os.walk(src_dir):
+        dirs.sort()
+        for name in sorted(names):
+            rel = os.path.relpath(os.path.join(root, name), src_dir).replace(os.sep, "/")
+            if not any(fnmatch.fnmatch(rel, pattern) for pattern in exclude):
+                files.append(rel)
+    return files
+
+
+def _local_digests(src_dir: str, files: List[str], workers: int) -> Dict[str, Dict[str, Any]]:
+    """{rel: {size, mtime_ns, sha256}}, hashing only files whose size or mtime changed since the last sync."""
+    state_path = os.path.join(src_dir, SYNC_STATE)
+    previous = load_manifest(state_path)
+
+    def digest(rel: str) -> Dict[str, Any]:
+        st = os.stat(os.path.join(src_dir, rel))
+        old = previous.get(rel)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            return old
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": hash_file(os.path.join(src_dir, rel))}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        entries = dict(zip(files, pool.map(digest, files)))
+    save_manifest(state_path, entries)
+    return entries
+
+
+def _gzip_copy(src: str, tmp_dir: str) -> str:
+    """Deterministic gzip of src (no name or mtime in the header) into tmp_dir."""
+    fd, path = tempfile.mkstemp(suffix=".gz", dir=tmp_dir)
+    with open(src, "rb") as fs, os.fdopen(fd, "wb") as raw, gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as gz:
+        shutil.copyfileobj(fs, gz, CHUNK_SIZE)
+    return path
+
+
+def _upload_part(backend: StorageBackend, key: str, upload_id: str, path: str, index: int, chunk_size: int) -> int:
+    with open(path, "rb") as f:
+        f.seek(index * chunk_size)
+        data = f.read(chunk_size)
+    backend.put_part(key, upload_id, index, data)
+    return len(data)
+
+
+def sync_dir(
+    src_dir: str,
+    dest: Union[str, StorageBackend],
+    prefix: str = "",
+    exclude: Sequence[str] = DEFAULT_EXCLUDE,
+    compress: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+    workers: int = 4,
+    delete: bool = False,
+    verbose: bool = True,
+) -> Dict[str, Any]:
+    """Upload the changed files of src_dir to dest under prefix.
+
+    Args:
+        dest: Backend, scheme://location URL or local directory (see `open_backend`)
+        exclude: fnmatch patterns on '/'-separated relative paths ('*' also matches '/')
+        compress: gzip files matching COMPRESS_PATTERNS; they are stored as <name>.gz
+        workers: Concurrent part uploads (also used for hashing)
+        delete: Remove files from dest that no longer exist in src_dir
+
+    A file that fails to upload is reported and retried on the next sync; its staged parts are kept.
+    Returns counts, failures, bytes and throughput.
+    """
+    start = time.perf_counter()
+    backend = open_backend(dest)
+    files = _list_files(src_dir, exclude)
+    local = _local_digests(src_dir, files, workers)
+    remote = backend.read_manifest(prefix)
+    changed = [rel for rel in files if remote.get(rel, {}).get("sha256") != local[rel]["sha256"]]
+
+    report: Dict[str, Any] = {"files": len(files), "uploaded": 0, "skipped": len(files) - len(changed), "deleted": 0, "failed": {}}
+    bytes_read = bytes_sent = resumed = 0
+    last_write = time.monotonic()
+    tmp_dir = tempfile.mkdtemp(prefix="sync-")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            uploads = []
+            for rel in changed:
+                source = os.path.join(src_dir, rel)
+                try:
+                    packed = compress and any(fnmatch.fnmatch(os.path.basename(rel), p) for p in COMPRESS_PATTERNS)
+                    path = _gzip_copy(source, tmp_dir) if packed else source
+                    stored_sha = hash_file(path) if packed else local[rel]["sha256"]
+                    size = os.path.getsize(path)
+                    key = _join(prefix, rel + (".gz" if packed else ""))
+                    upload_id = hash_params({"key": key, "sha256": stored_sha})[:32]
+                    num_parts = max(1, -(-size // chunk_size))
+                    staged = backend.list_parts(key, upload_id)
+                    futures = []
+                    for index in range(num_parts):
+                        if staged.get(index) == min(chunk_size, size - index * chunk_size):
+                            resumed += 1
+                            continue
+                        futures.append(pool.submit(_upload_part, backend, key, upload_id, path, index, chunk_size))
+                except OSError as e:
+                    report["failed"][rel] = str(e)
+                    continue
+                entry = {"sha256": local[rel]["sha256"], "size": local[rel]["size"], "key": key, "compressed": packed, "stored_size": size}
+                uploads.append((rel, key, upload_id, num_parts, stored_sha, entry, futures))
+                bytes_read += local[rel]["size"]
+
+            # Parts of every file are in flight at once; files are published in order as theirs finish.
+            for rel, key, upload_id, num_parts, stored_sha, entry, futures in uploads:
+                try:
+                    bytes_sent += sum(f.result() for f in futures)
+                    backend.complete_upload(key, upload_id, num_parts, stored_sha)
+                except (OSError, ValueError) as e:
+                    report["failed"][rel] = str(e)
+                    continue
+                old_key = remote.get(rel, {}).get("key")
+                if old_key and old_key != key:
+                    backend.delete(old_key)
+                remote[rel] = entry
+                report["uploaded"] += 1
+                if time.monotonic() - last_write > MANIFEST_INTERVAL:
+                    backend.write_manifest(prefix, remote)
+                    last_write = time.monotonic()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if delete:
+        for rel in sorted(set(remote) - set(files)):
+            backend.delete(remote.pop(rel)["key"])
+            report["deleted"] += 1
+    backend.write_manifest(prefix, remote)
+
+    elapsed = time.perf_counter() - start
+    report.update(
+        bytes_read=bytes_read,
+        bytes_sent=bytes_sent,
+        resumed_parts=resumed,
+        seconds=elapsed,
+        mb_per_s=bytes_sent / 1e6 / elapsed if elapsed > 0 else 0.0,
+    )
+    if verbose:
+        print(
+            f"Sync {src_dir} -> {prefix or '/'}: {report['uploaded']} uploaded, {report['skipped']} unchanged, "
+            f"{report['deleted']} deleted, {len(report['failed'])} failed ({bytes_sent / 1e6:.1f} MB sent, "
+            f"{resumed} parts resumed, {report['mb_per_s']:.1f} MB/s)"
+        )
+        for rel, error in sorted(report["failed"].items()):
+            print(f"  FAILED {rel}: {error}")
+    return report
+
+
+_background: Optional[ThreadPoolExecutor] = None
+_background_lock = threading.Lock()
+
+
+def start_sync(src_dir: str, dest: Union[str, StorageBackend], **sync_kwargs: Any) -> "Future[Dict[str, Any]]":
+    """Run `sync_dir` on a background thread and return its Future.
+
+    Background syncs run one at a time, in submission order, so several scenes queued while the
+    next one trains share the uplink instead of competing for it.
+    """
+    global _background
+    with _background_lock:
+        if _background is None:
+            _background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync")
+        return _background.submit(sync_dir, src_dir, dest, **sync_kwargs)
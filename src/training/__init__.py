@@ -1,36 +1,193 @@
 """Training wrappers for Gaussian Splatting.
 
 Keep this module lightweight so the high-level orchestration can import and call training functions.
+
+`run_training` asks train.py for periodic checkpoints (<model_path>/chkpnt<N>.pth) and, when a previous
+run was interrupted, resumes from the newest checkpoint that is intact. Progress output is streamed
+through `src.core.logstream` into <scene>/logs/training.log and a JSONL metrics file.
 """
 from __future__ import annotations
 
+import json
 import os
-import subprocess
+import re
+import shutil
 import sys
-from typing import Optional
+import time
+import zipfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core import logstream, paths
+from src.core.lazy import lazy_import
+
+gaussian_ply = lazy_import("src.convert.gaussian_ply")
+process = lazy_import("src.core.process")
+
+CHECKPOINT_EVERY = 5000
+RESUME_FILE = "resume.json"
+_CHECKPOINT = re.compile(r"^chkpnt(\d+)\.pth$")
+
+
+def _checkpoint_ok(path: str) -> bool:
+    """torch.save writes a zip archive; a save cut short by a disconnect has no readable central directory."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return bool(zf.namelist())
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def find_checkpoints(model_path: str) -> List[Tuple[int, str]]:
+    """[(iteration, path)] of every chkpnt<N>.pth in model_path, newest first."""
+    if not os.path.isdir(model_path):
+        return []
+    found = []
+    for name in os.listdir(model_path):
+        m = _CHECKPOINT.match(name)
+        if m:
+            found.append((int(m.group(1)), os.path.join(model_path, name)))
+    return sorted(found, reverse=True)
+
+
+def find_resume_checkpoint(model_path: str, iterations: int) -> Optional[Tuple[int, str]]:
+    """Newest intact checkpoint below the target iteration count, or None."""
+    for iteration, path in find_checkpoints(model_path):
+        if iteration >= iterations:
+            continue
+        if _checkpoint_ok(path):
+            return iteration, path
+        print(f"Ignoring unreadable checkpoint {path}")
+    return None
+
 
+def final_point_cloud(model_path: str, iterations: int) -> Optional[str]:
+    """The finished run's point_cloud.ply if it exists and is complete, else None."""
+    path = gaussian_ply.find_point_clouds(model_path).get(iterations)
+    if path is None:
+        return None
+    try:
+        dtype, count, offset, _ = gaussian_ply.read_header(path)
+    except ValueError:
+        return None
+    return path if os.path.getsize(path) >= offset + count * dtype.itemsize else None
 
-def run_training(scene_path: str, pipeline: str = "gaussian", iterations: int = 30000, wrapper_script: Optional[str] = None) -> None:
+
+def checkpoint_iterations(iterations: int, every: int, start: int = 0) -> List[int]:
+    """Checkpoint schedule after start: every `every` iterations, excluding the final one (saved as a PLY)."""
+    if every <= 0:
+        return []
+    return [i for i in range(every, iterations, every) if i > start]
+
+
+def _metrics_writer(path: str, offset: int, on_event: Optional[Callable[[Dict[str, Any]], None]]) -> Callable[[Dict[str, Any]], None]:
+    def write(event: Dict[str, Any]) -> None:
+        event = dict(event, time=time.time())
+        if event.get("kind") == "progress" and offset:
+            # train.py's tqdm bar counts from the resumed iteration, not from zero.
+            event["iteration"] += offset
+            event["total"] += offset
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+        if on_event:
+            on_event(event)
+
+    return write
+
+
+def run_training(
+    scene_path: str,
+    pipeline: str = "gaussian",
+    iterations: int = 30000,
+    wrapper_script: Optional[str] = None,
+    model_path: Optional[str] = None,
+    resume: bool = True,
+    checkpoint_every: int = CHECKPOINT_EVERY,
+    metrics_path: Optional[str] = None,
+    on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+    inputs_digest: Optional[str] = None,
+    timeout: Optional[float] = None,
+    images_dir: Optional[str] = None,
+) -> Dict[str, Any]:
     """Run the training pipeline using the external gaussian-splatting train.py script.
 
-    The script expects: -s <scene_path> --iterations <num>
+    The script expects: -s <scene_path> --iterations <num> [-m <model_path>] [--images <dir>]
+    model_path pins the output folder (train.py otherwise writes to ./output/<random id>).
+    images_dir makes train.py load the images from that folder instead of <scene_path>/images (e.g. a
+    local copy extracted from shards); the sparse model is still read from scene_path.
+
+    With a model_path, checkpoints are requested every checkpoint_every iterations. With resume=True
+    a finished run (final point cloud present) is not repeated and an interrupted one continues from
+    its newest intact checkpoint (point_cloud/iteration_* PLYs carry no optimizer state, so they only
+    mark completion); resume=False clears earlier checkpoints and point clouds and starts over.
+    inputs_digest identifies the training inputs (the orchestrator passes its stage-cache digest); it is
+    stored in <model_path>/resume.json and checkpoints made from different inputs are never resumed.
+    timeout (seconds) stops train.py's process group gracefully and raises subprocess.TimeoutExpired;
+    the checkpoints written so far are resumed on the next call.
+    Progress, evaluation and save events are appended to metrics_path (default
+    <scene>/logs/training_metrics.jsonl) as they happen. Raises CalledProcessError on failure.
+
+    Returns {"status": "ran" | "complete", "resumed_from": iteration or None, "metrics": path, "log": path}
+    plus "process" (the `ProcessResult` as a dict) when train.py ran.
     """
     # Use the external gaussian-splatting train.py script
-    # In Docker, it's at /home/appuser/gaussian-splatting
-    # Locally, it's at project_root/external/gaussian-splatting
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-    
-    # Try Docker location first
-    train_script = "/home/appuser/gaussian-splatting/train.py"
-    if not os.path.isfile(train_script):
-        # Fall back to local location
-        train_script = os.path.join(project_root, "external", "gaussian-splatting", "train.py")
-    
-    if not os.path.isfile(train_script):
-        raise FileNotFoundError(f"Training script not found. Tried:\n"
-                                f"  - /home/appuser/gaussian-splatting/train.py (Docker)\n"
-                                f"  - {os.path.join(project_root, 'external', 'gaussian-splatting', 'train.py')} (local)")
-    
+    # ($GAUSSIAN_SPLATTING_DIR, then /home/appuser/gaussian-splatting in Docker, then external/gaussian-splatting)
+    train_script = paths.find_gs_script("train.py", "Training script")
+    logs_dir = os.path.join(scene_path, "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+    log_path = os.path.join(logs_dir, "training.log")
+    metrics_path = metrics_path or os.path.join(logs_dir, "training_metrics.jsonl")
+    result: Dict[str, Any] = {"status": "ran", "resumed_from": None, "metrics": metrics_path, "log": log_path}
+
     cmd = [sys.executable, train_script, "-s", scene_path, "--iterations", str(iterations)]
+    if images_dir:
+        # train.py joins -s and --images, so an absolute folder is used as is.
+        cmd += ["--images", os.path.abspath(images_dir)]
+    start = 0
+    if model_path:
+        cmd += ["-m", model_path]
+        resume_file = os.path.join(model_path, RESUME_FILE)
+        if resume and inputs_digest is not None:
+            try:
+                with open(resume_file, "r", encoding="utf-8") as f:
+                    previous = json.load(f).get("inputs")
+            except (OSError, ValueError):
+                previous = None
+            if previous is not None and previous != inputs_digest:
+                print("Training inputs changed since the last run; starting over instead of resuming.")
+                resume = False
+        if resume:
+            done = final_point_cloud(model_path, iterations)
+            if done:
+                print(f"Training already complete ({done}); nothing to resume.")
+                result["status"] = "complete"
+                return result
+            found = find_resume_checkpoint(model_path, iterations)
+            if found:
+                start, checkpoint = found
+                result["resumed_from"] = start
+                cmd += ["--start_checkpoint", checkpoint]
+                print(f"Resuming training from iteration {start} ({checkpoint})")
+        else:
+            for _, path in find_checkpoints(model_path):
+                os.remove(path)
+            shutil.rmtree(os.path.join(model_path, "point_cloud"), ignore_errors=True)
+        os.makedirs(model_path, exist_ok=True)
+        with open(resume_file, "w", encoding="utf-8") as f:
+            json.dump({"inputs": inputs_digest, "iterations": iterations}, f)
+        schedule = checkpoint_iterations(iterations, checkpoint_every, start)
+        if schedule:
+            cmd += ["--checkpoint_iterations"] + [str(i) for i in schedule]
+
+    write = _metrics_writer(metrics_path, start, on_event)
+    write({"source": "training", "kind": "start", "iteration": start, "total": iterations, "resumed": start > 0})
+    processor = logstream.LogProcessor(parsers=[logstream.training_progress_parser], on_event=write)
     print(f"Running Gaussian Splatting training ({iterations} iterations):", " ".join(cmd))
-    subprocess.check_call(cmd)
+    run = process.run(cmd, logfile_path=log_path, processor=processor, timeout=timeout)
+    result["process"] = run.as_dict()
+    if not run.ok:
+        print(("Training timed out" if run.timed_out else "Training failed") + ". Last output:\n" + processor.tail_text(20))
+        print("See log:", log_path)
+        write({"source": "training", "kind": "failed", "returncode": run.returncode, "timed_out": run.timed_out})
+        run.check_returncode()
+    write({"source": "training", "kind": "finished", "iteration": iterations})
+    return result
@@ -0,0 +1,51 @@
+"""Synthetic data builders shared by the tests and the stub executables in tests/stubs."""
+import numpy as np
+
+from src.convert import colmap_model as cm
+from src.convert import gaussian_ply
+
+
+def make_model(num_images=3, num_points=50, seed=0):
+    """Small random sparse model: two cameras, tracks of two or more images, one unmatched 2D point."""
+    rng = np.random.default_rng(seed)
+    cameras = np.zeros(2, dtype=cm.CAMERA_DTYPE)
+    cameras[0] = (1, cm.CAMERA_MODEL_IDS["PINHOLE"], 640, 480, 4, (500.0, 500.0, 320.0, 240.0) + (0.0,) * 8)
+    cameras[1] = (2, cm.CAMERA_MODEL_IDS["OPENCV"], 800, 600, 8, tuple(rng.random(8)) + (0.0,) * 4)
+
+    lengths = rng.integers(2, num_images + 1, num_points)
+    track_offsets = cm._offsets(lengths)
+    tracks = np.zeros(track_offsets[-1], dtype=cm.TRACK_DTYPE)
+    points2D_per_image = [[] for _ in range(num_images)]
+    for p in range(num_points):
+        for k, img in enumerate(rng.choice(num_images, lengths[p], replace=False)):
+            tracks[track_offsets[p] + k] = (img + 1, len(points2D_per_image[img]))
+            points2D_per_image[img].append((rng.random() * 640, rng.random() * 480, p + 1))
+    points2D_per_image[-1].append((1.5, 2.5, -1))
+
+    images = np.zeros(num_images, dtype=cm.IMAGE_DTYPE)
+    blocks = []
+    for i in range(num_images):
+        images[i] = (i + 1, (1.0, 0.0, 0.0, 0.0), tuple(rng.normal(size=3)), 1 + i % 2)
+        block = np.zeros(len(points2D_per_image[i]), dtype=cm.POINT2D_DTYPE)
+        for j, (x, y, pid) in enumerate(points2D_per_image[i]):
+            block[j] = ((x, y), pid)
+        blocks.append(block)
+
+    points3D = np.zeros(num_points, dtype=cm.POINT3D_DTYPE)
+    points3D["point3D_id"] = np.arange(1, num_points + 1)
+    points3D["xyz"] = rng.normal(size=(num_points, 3))
+    points3D["rgb"] = rng.integers(0, 256, (num_points, 3))
+    points3D["error"] = rng.random(num_points)
+    return cm.SparseModel(
+        cameras, images, [f"img_{i:03d}.jpg" for i in range(num_images)], np.concatenate(blocks),
+        cm._offsets(np.array([len(b) for b in blocks])), points3D, tracks, track_offsets,
+    )
+
+
+def make_gaussians(n=1000, sh_degree=3, seed=0):
+    """Random Gaussians in the gaussian-splatting layout."""
+    rng = np.random.default_rng(seed)
+    g = np.zeros(n, dtype=gaussian_ply.gaussian_dtype(sh_degree))
+    for name in g.dtype.names:
+        g[name] = rng.normal(size=n).astype(np.float32)
+    return g
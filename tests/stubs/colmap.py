@@ -0,0 +1,51 @@
+"""Stub `colmap` CLI: records each invocation and writes the outputs the real subcommand would.
+
+STUB_COLMAP_LOG: append one JSON line per call ({"argv": [...]})
+STUB_COLMAP_FAIL: "<subcommand>" or "<subcommand>:gpu" -> exit 1 (with an OpenGL error when ":gpu" and GPU was requested);
+    "<subcommand>:after" -> write the outputs, then exit 1
+Any path argument containing "bad" makes the call fail.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tests.helpers import make_model  # noqa: E402
+from src.convert import colmap_model  # noqa: E402
+
+argv = sys.argv[1:]
+command = argv[0]
+opts = {argv[i].lstrip("-"): argv[i + 1] for i in range(1, len(argv) - 1) if argv[i].startswith("--") and not argv[i + 1].startswith("--")}
+log = os.environ.get("STUB_COLMAP_LOG")
+if log:
+    with open(log, "a") as f:
+        f.write(json.dumps({"argv": argv}) + "\n")
+
+gpu = opts.get("SiftExtraction.use_gpu", opts.get("SiftMatching.use_gpu")) == "1"
+fail = os.environ.get("STUB_COLMAP_FAIL", "")
+if fail:
+    stage, _, mode = fail.partition(":")
+    if stage == command and mode != "after" and (mode != "gpu" or gpu):
+        print("ERROR: could not create OpenGL context" if mode == "gpu" else "simulated failure")
+        sys.exit(1)
+if any("bad" in os.path.basename(v) for v in opts.values()):
+    print("Check failed: simulated COLMAP failure")
+    sys.exit(2)
+
+if command == "feature_extractor":
+    open(opts["database_path"], "ab").close()
+    print("Processed file [1/1]")
+elif command == "mapper":
+    colmap_model.write_model(make_model(), os.path.join(opts["output_path"], "0"))
+elif command == "image_undistorter":
+    out = opts["output_path"]
+    os.makedirs(os.path.join(out, "images"), exist_ok=True)
+    # Like COLMAP, overwrite the images in place with their undistorted versions.
+    for name in os.listdir(opts["image_path"]):
+        with open(os.path.join(opts["image_path"], name), "ab") as f:
+            f.write(b"undistorted")
+    colmap_model.write_model(make_model(), os.path.join(out, "sparse"))
+if fail == f"{command}:after":
+    print("simulated crash after writing outputs")
+    sys.exit(1)
@@ -0,0 +1,19 @@
+"""Stub gaussian-splatting convert.py: writes a tiny COLMAP model, fails for scenes named *bad*."""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tests.helpers import make_model  # noqa: E402
+from src.convert import colmap_model  # noqa: E402
+
+p = argparse.ArgumentParser()
+p.add_argument("--source_path", required=True)
+p.add_argument("--no_gpu", action="store_true")
+args = p.parse_args()
+if "bad" in os.path.basename(args.source_path):
+    print("Check failed: simulated COLMAP failure")
+    sys.exit(2)
+colmap_model.write_model(make_model(), os.path.join(args.source_path, "sparse", "0"))
+print("Processed file [1/1]")
@@ -0,0 +1,62 @@
+"""Stub gaussian-splatting train.py: prints train.py-style progress, writes checkpoints and a point cloud.
+
+STUB_TRAIN_LOG: append "<scene> <start> <end>" per run
+STUB_TRAIN_SECONDS: sleep this long before training
+STUB_TRAIN_FAIL_AT: exit 1 when this iteration is reached (simulates a disconnect)
+STUB_TRAIN_GAUSSIANS: number of Gaussians in the output point cloud
+"""
+import argparse
+import os
+import sys
+import time
+import zipfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.convert import gaussian_ply  # noqa: E402
+
+p = argparse.ArgumentParser()
+p.add_argument("-s", required=True)
+p.add_argument("-m", required=True)
+p.add_argument("--iterations", type=int, default=30000)
+p.add_argument("--checkpoint_iterations", nargs="+", type=int, default=[])
+p.add_argument("--start_checkpoint", default=None)
+args, _ = p.parse_known_args()
+start = time.time()
+time.sleep(float(os.environ.get("STUB_TRAIN_SECONDS", "0")))
+
+first = 0
+if args.start_checkpoint:
+    with zipfile.ZipFile(args.start_checkpoint) as zf:
+        first = int(zf.read("iteration"))
+fail_at = int(os.environ.get("STUB_TRAIN_FAIL_AT", "0"))
+total = args.iterations - first
+step = max(1, args.iterations // 10)
+for done in range(step, total + 1, step):
+    iteration = first + done
+    # Like train.py's tqdm bar, the counter starts at zero after a resume.
+    sys.stdout.write(f"Training progress: {done}/{total} [00:01<00:02, 100.00it/s, Loss=0.{iteration:07d}]\r")
+    sys.stdout.flush()
+    if fail_at and iteration >= fail_at:
+        print("\nCUDA error: simulated disconnect")
+        sys.exit(1)
+    for ckpt in args.checkpoint_iterations:
+        if iteration - step < ckpt <= iteration:
+            print(f"\n[ITER {ckpt}] Saving Checkpoint")
+            with zipfile.ZipFile(os.path.join(args.m, f"chkpnt{ckpt}.pth"), "w") as zf:
+                zf.writestr("iteration", str(ckpt))
+print(f"\n[ITER {args.iterations}] Evaluating test: L1 0.03 PSNR 27.50")
+print(f"[ITER {args.iterations}] Saving Gaussians")
+
+out = os.path.join(args.m, "point_cloud", f"iteration_{args.iterations}")
+os.makedirs(out, exist_ok=True)
+gaussians = np.zeros(int(os.environ.get("STUB_TRAIN_GAUSSIANS", "64")), dtype=gaussian_ply.gaussian_dtype(3))
+for name in gaussians.dtype.names:
+    gaussians[name] = np.random.default_rng(args.iterations).normal(size=len(gaussians))
+gaussian_ply.write_gaussians(os.path.join(out, "point_cloud.ply"), gaussians)
+log = os.environ.get("STUB_TRAIN_LOG")
+if log:
+    with open(log, "a") as f:
+        f.write(f"{os.path.basename(args.s)} {start} {time.time()}\n")
@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from src.batch import BatchRunner, discover_scenes
+
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs")
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GAUSSIAN_SPLATTING_DIR", STUBS)
+    monkeypatch.setenv("COLMAP_EXECUTABLE", os.path.join(STUBS, "colmap.py"))
+    monkeypatch.setenv("STUB_TRAIN_LOG", str(tmp_path / "train.log"))
+    monkeypatch.setenv("STUB_TRAIN_SECONDS", "0.2")
+    captures = tmp_path / "captures"
+    for name in ("alpha", "bad_scene", "gamma"):
+        (captures / name).mkdir(parents=True)
+        (captures / name / "0001.jpg").write_bytes(name.encode())
+    return tmp_path
+
+
+def test_batch_runs_scenes_with_failure_isolation_and_persistence(workspace):
+    jobs = discover_scenes(str(workspace / "captures"))
+    assert [j["scene"] for j in jobs] == ["alpha", "bad_scene", "gamma"]
+    state_file = str(workspace / "state.json")
+
+    results = BatchRunner(jobs, state_file=state_file, slots={"cpu": 2, "gpu": 1}, params={"iterations": 5}).run()
+    assert results == {"alpha": "done", "bad_scene": "failed", "gamma": "done"}
+
+    state = json.load(open(state_file))["jobs"]
+    assert state["bad_scene"]["stages"]["colmap"]["status"] == "failed"
+    assert "CalledProcessError" in state["bad_scene"]["stages"]["colmap"]["error"]
+    assert os.path.isfile(workspace / "scenes" / "gamma" / "output" / "point_cloud" / "iteration_5" / "point_cloud.ply")
+
+    # One GPU slot: training runs never overlap.
+    spans = sorted((float(a), float(b)) for _, a, b in (line.split() for line in open(workspace / "train.log")))
+    assert len(spans) == 2 and spans[0][1] <= spans[1][0]
+
+    # Restart: finished jobs only redo what the stage cache says is stale, failed ones rerun only with retry_failed.
+    again = BatchRunner(jobs, state_file=state_file, params={"iterations": 5}).run()
+    assert again == results
+    assert len(open(workspace / "train.log").read().splitlines()) == 2
+
+    # New params (or force) reset the jobs, so the finished scenes train again.
+    more = BatchRunner(jobs, state_file=state_file, params={"iterations": 7}).run()
+    assert more == results
+    assert len(open(workspace / "train.log").read().splitlines()) == 4
+    assert os.path.isfile(workspace / "scenes" / "gamma" / "output" / "point_cloud" / "iteration_7" / "point_cloud.ply")
+
+
+def test_interrupted_stage_is_resumed(workspace):
+    state_file = str(workspace / "state.json")
+    calls = []
+    runner = BatchRunner([{"scene": "x"}], state_file=state_file, stage_func=lambda job, stage: calls.append(stage) or "ran")
+    runner.state["x"]["stages"]["colmap"] = {"status": "done"}
+    runner.state["x"]["stages"]["cleanup"] = {"status": "done"}
+    runner.state["x"]["stages"]["training"] = {"status": "running"}
+    runner.state["x"]["status"] = "running"
+    runner._save()
+
+    resumed = BatchRunner([{"scene": "x"}], state_file=state_file, stage_func=lambda job, stage: calls.append(stage) or "ran")
+    assert resumed.run() == {"x": "done"}
+    assert calls == ["training"]
@@ -0,0 +1,47 @@
+import copy
+import json
+
+import pytest
+
+from benchmarks import __main__ as cli
+from benchmarks import suite
+
+
+@pytest.fixture(autouse=True)
+def env_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+def test_run_suite_writes_results_with_machine_metadata(tmp_path):
+    out = tmp_path / "results.json"
+    doc = suite.run_suite("tiny", names=["log_processing", "model_read", "ply_write"], repeat=2, out_path=str(out), verbose=False)
+    saved = json.loads(out.read_text())
+    assert saved["scale"] == "tiny" and set(saved["results"]) == {"log_processing", "model_read", "ply_write"}
+    assert {"python", "system", "torch", "cpu_count"} <= set(saved["machine"])
+    entry = doc["results"]["model_read"]
+    assert len(entry["seconds"]) == 2 and entry["median_s"] > 0 and entry["metrics"]["items"] == suite.SCALES["tiny"]["points"]
+    with pytest.raises(ValueError):
+        suite.run_suite("tiny", names=["nope"], verbose=False)
+
+
+def test_compare_flags_regressions_and_cli_exit_code(tmp_path, capsys):
+    baseline = {
+        "scale": "tiny",
+        "machine": {"cpu_count": 8, "machine": "x86_64"},
+        "results": {"a": {"median_s": 1.0}, "b": {"median_s": 1.0}, "c": {"median_s": 0.001}, "gone": {"median_s": 1.0}},
+    }
+    current = copy.deepcopy(baseline)
+    current["results"] = {"a": {"median_s": 1.3}, "b": {"median_s": 0.5}, "c": {"median_s": 0.003}, "new": {"median_s": 1.0}}
+    current["machine"]["cpu_count"] = 4
+    report = suite.compare(baseline, current, threshold=0.15)
+    status = {r["name"]: r["status"] for r in report["rows"]}
+    # c tripled but stays under the noise floor.
+    assert status == {"a": "regression", "b": "improvement", "c": "ok", "gone": "missing", "new": "new"}
+    assert report["regressions"] == ["a"] and any("cpu_count" in w for w in report["warnings"])
+
+    base_path, cur_path = tmp_path / "base.json", tmp_path / "cur.json"
+    base_path.write_text(json.dumps(baseline))
+    cur_path.write_text(json.dumps(current))
+    assert cli.main(["compare", str(base_path), str(cur_path)]) == 1
+    assert "1 regression(s)" in capsys.readouterr().out
+    assert cli.main(["compare", str(base_path), str(base_path)]) == 0
@@ -0,0 +1,127 @@
+import json
+import os
+import subprocess
+
+import pytest
+from PIL import Image
+
+from src import colmap
+from src.colmap import matching
+
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs")
+
+
+def _photo(path, lat=None, lon=None, when=None):
+    exif = Image.Exif()
+    if lat is not None:
+        exif[0x8825] = {1: "N", 2: (float(int(lat)), 0.0, (lat % 1) * 3600), 3: "E", 4: (float(int(lon)), 0.0, (lon % 1) * 3600)}
+    if when is not None:
+        exif[0x8769] = {36867: when}
+    Image.new("RGB", (8, 8)).save(path, exif=exif)
+
+
+@pytest.fixture
+def stub_colmap(tmp_path, monkeypatch):
+    log = tmp_path / "colmap_calls.jsonl"
+    monkeypatch.setenv("COLMAP_EXECUTABLE", os.path.join(STUBS, "colmap.py"))
+    monkeypatch.setenv("STUB_COLMAP_LOG", str(log))
+
+    def calls():
+        return [json.loads(line)["argv"] for line in open(log)] if log.exists() else []
+
+    return calls
+
+
+def _scene(tmp_path, n, **photo_kwargs):
+    images = tmp_path / "scene" / "images"
+    images.mkdir(parents=True)
+    for i in range(n):
+        kwargs = {k: v(i) for k, v in photo_kwargs.items()}
+        _photo(images / f"{i:04d}.jpg", **kwargs)
+    return images, tmp_path / "scene"
+
+
+def test_plan_picks_matcher_by_count_and_metadata(tmp_path):
+    images, _ = _scene(tmp_path, 6)
+    assert matching.plan_matching(str(images))["matcher"] == "exhaustive"
+    assert matching.plan_matching(str(images), exhaustive_max=3)["matcher"] == "sequential"
+    with pytest.raises(ValueError):
+        matching.plan_matching(str(images), matcher="custom")
+
+    gps_dir = tmp_path / "gps"
+    gps_dir.mkdir()
+    # Two clusters far apart: spatial kNN must never pair across them.
+    for i in range(8):
+        lat = 52.0 + (0.5 if i % 2 else 0.0) + i * 1e-5
+        _photo(gps_dir / f"{i:04d}.jpg", lat=lat, lon=13.0)
+    plan = matching.plan_matching(str(gps_dir), exhaustive_max=3, spatial_k=2)
+    assert plan["matcher"] == "custom"
+    cross = [(a, b) for a, b in plan["pairs"] if (int(a[:4]) % 2) != (int(b[:4]) % 2)]
+    # Only the filename-order links cross clusters.
+    assert all(int(b[:4]) - int(a[:4]) == 1 for a, b in cross)
+
+
+def test_knn_pairs_in_time():
+    import numpy as np
+
+    pairs = matching.knn_pairs(np.array([[0.0], [1.0], [2.0], [100.0], [101.0]]), k=1)
+    assert pairs == {(0, 1), (1, 2), (3, 4)}
+
+
+def test_run_colmap_builds_command_sequence(tmp_path, stub_colmap):
+    images, scene = _scene(tmp_path, 5, when=lambda i: f"2024:05:01 10:00:{i:02d}")
+    colmap.run_colmap(str(images), str(scene), matcher="custom")
+    subcommands = [argv[0] for argv in stub_colmap()]
+    assert subcommands == ["feature_extractor", "matches_importer", "mapper", "image_undistorter"]
+    match_list = scene / "distorted" / "match_list.txt"
+    assert "0000.jpg 0001.jpg" in match_list.read_text().splitlines()
+    assert sorted(os.listdir(scene / "sparse" / "0")) == ["cameras.bin", "images.bin", "points3D.bin"]
+
+
+def test_run_colmap_retries_on_cpu_after_opengl_error(tmp_path, stub_colmap, monkeypatch):
+    images, scene = _scene(tmp_path, 3)
+    monkeypatch.setenv("STUB_COLMAP_FAIL", "feature_extractor:gpu")
+    colmap.run_colmap(str(images), str(scene))
+    calls = stub_colmap()
+    assert calls[0][0] == "feature_extractor" and "1" == calls[0][calls[0].index("--SiftExtraction.use_gpu") + 1]
+    assert calls[1][0] == "feature_extractor" and "0" == calls[1][calls[1].index("--SiftExtraction.use_gpu") + 1]
+    assert calls[2][0] == "exhaustive_matcher"
+
+    # Later GPU-capable stages stay on the CPU instead of failing first.
+    assert calls[2][calls[2].index("--SiftMatching.use_gpu") + 1] == "0"
+    assert colmap.load_stage_markers(str(scene))["feature_extractor"]["gpu"] is False
+
+
+def test_run_colmap_resumes_at_failed_stage(tmp_path, stub_colmap, monkeypatch):
+    images, scene = _scene(tmp_path, 3)
+    monkeypatch.setenv("STUB_COLMAP_FAIL", "mapper")
+    with pytest.raises(subprocess.CalledProcessError):
+        colmap.run_colmap(str(images), str(scene))
+    markers = colmap.load_stage_markers(str(scene))
+    assert markers["matcher"]["status"] == "done" and markers["mapper"]["status"] == "failed"
+
+    monkeypatch.delenv("STUB_COLMAP_FAIL")
+    colmap.run_colmap(str(images), str(scene))
+    assert [argv[0] for argv in stub_colmap()] == ["feature_extractor", "exhaustive_matcher", "mapper", "mapper", "image_undistorter"]
+
+    # A finished run is skipped entirely; resume=False (force) reruns everything.
+    colmap.run_colmap(str(images), str(scene))
+    assert len(stub_colmap()) == 5
+    colmap.run_colmap(str(images), str(scene), resume=False)
+    assert len(stub_colmap()) == 9
+
+
+def test_run_colmap_resumes_after_undistorter_rewrote_images(tmp_path, stub_colmap, monkeypatch):
+    images, scene = _scene(tmp_path, 5, when=lambda i: f"2024:05:01 10:00:{i:02d}")
+    monkeypatch.setenv("STUB_COLMAP_FAIL", "image_undistorter:after")
+    with pytest.raises(subprocess.CalledProcessError):
+        colmap.run_colmap(str(images), str(scene))
+    plan = colmap.load_stage_markers(str(scene))["feature_extractor"]["plan"]
+
+    # The undistorted images have new sizes and no EXIF; only the undistorter reruns, with the same plan.
+    monkeypatch.delenv("STUB_COLMAP_FAIL")
+    colmap.run_colmap(str(images), str(scene))
+    assert [argv[0] for argv in stub_colmap()][4:] == ["image_undistorter"]
+    assert colmap.load_stage_markers(str(scene))["feature_extractor"]["plan"] == plan
+    colmap.run_colmap(str(images), str(scene))
+    assert len(stub_colmap()) == 5
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from src.convert import colmap_model as cm
+from tests.helpers import make_model
+
+
+@pytest.mark.parametrize("ext", [".bin", ".txt"])
+def test_model_round_trip(tmp_path, ext):
+    model = make_model()
+    cm.write_model(model, str(tmp_path), ext=ext)
+    assert cm.detect_model_ext(str(tmp_path)) == ext
+    back = cm.read_model(str(tmp_path))
+    for field in ("cameras", "images", "points2D", "points2D_offsets", "points3D", "tracks", "track_offsets"):
+        np.testing.assert_array_equal(getattr(back, field), getattr(model, field))
+    assert back.image_names == model.image_names
+
+
+def test_summary_and_validation(tmp_path):
+    model = make_model(num_images=4, num_points=20)
+    summary = cm.summarize_model(model)
+    assert summary["num_registered_images"] == 4
+    assert summary["num_points3D"] == 20
+    assert summary["num_observations"] == int(model.track_lengths.sum())
+    assert summary["mean_observations_per_image"] == pytest.approx(summary["num_observations"] / 4)
+    assert summary["mean_reprojection_error"] == pytest.approx(model.points3D["error"].mean())
+
+    cm.write_model(model, str(tmp_path))
+    assert cm.validate_model(str(tmp_path))["num_points3D"] == 20
+    with pytest.raises(RuntimeError):
+        cm.validate_model(str(tmp_path), min_registered=10)
+    with pytest.raises(FileNotFoundError):
+        cm.read_model(str(tmp_path / "missing"))
+
+
+def test_camera_centers_and_subset_model(tmp_path):
+    model = make_model(num_images=5, num_points=80, seed=2)
+    assert np.allclose(cm.camera_centers(model), -model.images["tvec"])  # identity rotations
+
+    image_mask = np.array([True, False, True, True, False])
+    point_mask = np.arange(80) % 2 == 0
+    sub = cm.subset_model(model, image_mask, point_mask)
+    kept_images = set(model.images["image_id"][image_mask].tolist())
+    assert sub.image_names == [model.image_names[i] for i in (0, 2, 3)]
+    assert set(sub.tracks["image_id"].tolist()) <= kept_images
+    assert (sub.track_lengths > 0).all() and set(sub.points3D["point3D_id"].tolist()) <= set(model.points3D["point3D_id"][point_mask].tolist())
+    matched = sub.points2D["point3D_id"][sub.points2D["point3D_id"] >= 0]
+    assert set(matched.tolist()) <= set(sub.points3D["point3D_id"].tolist())
+    cm.write_model(sub, str(tmp_path))
+    assert cm.summarize_model(cm.read_model(str(tmp_path)))["num_registered_images"] == 3
@@ -1,5 +1,11 @@
+import os
+import subprocess
+import sys
+
 from src.core import env
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 def test_full_env_report_contains_keys():
     report = env.full_env_report()
@@ -13,3 +19,45 @@ def test_torch_info_shape():
     assert isinstance(t, dict)
     # installed may be True or False depending on environment
     assert "installed" in t
+
+
+def test_cached_env_report_reuses_cache_until_key_changes(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(env, "probe_torch", lambda timeout: calls.append(timeout) or {"installed": False})
+    monkeypatch.setattr(env, "driver_version", lambda: "550.54")
+    cache = str(tmp_path / "env_report.json")
+
+    assert env.cached_env_report(cache_path=cache)["cached"] is False
+    assert env.cached_env_report(cache_path=cache)["cached"] is True
+    assert len(calls) == 1
+
+    monkeypatch.setattr(env, "driver_version", lambda: "560.01")
+    assert env.cached_env_report(cache_path=cache)["cached"] is False
+    assert env.cached_env_report(cache_path=cache, refresh=True)["cached"] is False
+    assert len(calls) == 3
+
+
+def test_failed_probe_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(env, "probe_torch", lambda timeout: {"installed": None, "probe_error": "timed out"})
+    cache = tmp_path / "env_report.json"
+    report = env.cached_env_report(cache_path=str(cache))
+    assert report["torch"]["probe_error"] == "timed out"
+    assert not cache.exists()
+
+
+def test_probe_torch_runs_out_of_process_with_timeout(tmp_path, monkeypatch):
+    info = env.probe_torch(timeout=60)
+    assert "installed" in info and "probe_error" not in info
+
+    info = env.probe_torch(python=str(tmp_path / "missing-python"))
+    assert info["installed"] is None and "could not start" in info["probe_error"]
+
+    monkeypatch.setattr(env, "PROBE", "import time; time.sleep(30)")
+    info = env.probe_torch(timeout=0.5)
+    assert info["installed"] is None and "timed out" in info["probe_error"]
+
+
+def test_importing_orchestrator_defers_heavy_modules():
+    code = "import sys, src.orchestrator, src.core.env; print(sorted(m for m in ('numpy', 'PIL', 'asyncio', 'torch') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True)
+    assert out.stdout.strip() == "[]"
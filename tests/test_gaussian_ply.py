@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.convert import gaussian_ply
+from tests.helpers import make_gaussians
+
+
+def test_round_trip_is_byte_exact(tmp_path):
+    g = make_gaussians(500)
+    first = gaussian_ply.write_gaussians(str(tmp_path / "a.ply"), g, chunk_size=64)
+    loaded = gaussian_ply.read_gaussians(first)
+    assert isinstance(loaded, np.memmap)
+    assert loaded.dtype.names == g.dtype.names and np.array_equal(loaded, g)
+    second = gaussian_ply.write_gaussians(str(tmp_path / "b.ply"), loaded, chunk_size=77)
+    assert open(first, "rb").read() == open(second, "rb").read()
+    assert gaussian_ply.sh_degree(loaded.dtype) == 3
+
+
+def test_foreign_header_and_chunked_iteration(tmp_path):
+    # Header as written by plyfile-based exporters: comments, mixed types, property order preserved.
+    path = tmp_path / "c.ply"
+    rows = np.array([(1.0, 2.0, 3.0, 7), (4.0, 5.0, 6.0, 9), (7.0, 8.0, 9.0, 11)], dtype=[("x", "<f4"), ("y", "<f4"), ("z", "<f4"), ("red", "u1")])
+    header = "ply\nformat binary_little_endian 1.0\ncomment made elsewhere\nelement vertex 3\nproperty float x\nproperty float y\nproperty float z\nproperty uchar red\nend_header\n"
+    path.write_bytes(header.encode() + rows.tobytes())
+    dtype, count, _, comments = gaussian_ply.read_header(str(path))
+    assert count == 3 and comments == ["made elsewhere"] and dtype.names == ("x", "y", "z", "red")
+    chunks = list(gaussian_ply.iter_gaussians(str(path), chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert np.array_equal(np.concatenate(chunks), rows)
+    assert gaussian_ply.field_block(chunks[0], "positions").tolist() == [[1, 2, 3], [4, 5, 6]]
+
+    path.write_bytes(header.encode() + rows.tobytes()[:-5])
+    with pytest.raises(ValueError):
+        gaussian_ply.read_gaussians(str(path))
+
+
+def test_field_blocks_and_in_place_writer(tmp_path):
+    g = make_gaussians(10, sh_degree=1)
+    assert gaussian_ply.field_block(g, "sh_rest").shape == (10, 9)
+    rot = gaussian_ply.field_block(g, "rotations")
+    assert np.shares_memory(rot, g) and np.array_equal(rot[:, 0], g["rot_0"])
+
+    out = gaussian_ply.create_gaussians(str(tmp_path / "d.ply"), g.dtype, len(g))
+    out[:5] = g[:5]
+    out[5:] = g[5:]
+    out.flush()
+    del out
+    assert np.array_equal(gaussian_ply.read_gaussians(str(tmp_path / "d.ply")), g)
+
+
+def test_latest_point_cloud(tmp_path):
+    for it in (7000, 30000):
+        gaussian_ply.write_gaussians(str(tmp_path / "point_cloud" / f"iteration_{it}" / "point_cloud.ply"), make_gaussians(3))
+    assert gaussian_ply.latest_point_cloud(str(tmp_path)).endswith(os.path.join("iteration_30000", "point_cloud.ply"))
+    assert sorted(gaussian_ply.find_point_clouds(str(tmp_path))) == [7000, 30000]
@@ -0,0 +1,68 @@
+import os
+
+from PIL import Image
+
+from src import ingest
+
+
+def _make(path, size=(64, 32), color=(255, 0, 0), orientation=None, fmt=None):
+    img = Image.new("RGB", size, color)
+    kwargs = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        kwargs["exif"] = exif
+    img.save(path, fmt, **kwargs)
+
+
+def test_ingest_converts_and_skips_unchanged(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    _make(src / "a.png")
+    _make(src / "b.jpg")
+    (src / "notes.txt").write_text("ignored")
+
+    report = ingest.ingest_images(str(src), str(dst), workers=0, verbose=False)
+    assert report["total"] == 2
+    assert sorted(os.listdir(dst)) == [".ingest_manifest.json", "a.jpg", "b.jpg"]
+
+    again = ingest.ingest_images(str(src), str(dst), workers=0, verbose=False)
+    assert again["counts"] == {"skipped": 2}
+
+    # Same name, new content -> re-converted; a touched but identical file would still be skipped.
+    _make(src / "a.png", color=(0, 255, 0))
+    third = ingest.ingest_images(str(src), str(dst), workers=0, verbose=False)
+    assert third["counts"] == {"converted": 1, "skipped": 1}
+
+
+def test_ingest_applies_exif_orientation_and_resize(tmp_path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    _make(src / "rot.jpg", size=(200, 100), orientation=6)
+
+    ingest.ingest_images(str(src), str(dst), max_size=50, workers=2, verbose=False)
+    with Image.open(dst / "rot.jpg") as out:
+        assert out.size == (25, 50)
+
+
+def test_output_names_are_unique():
+    mapping = ingest.output_names(["a.HEIC", "a.png", "b.jpeg"])
+    assert mapping == {"a.HEIC": "a.jpg", "a.png": "a_png.jpg", "b.jpeg": "b.jpg"}
+
+
+def test_ingest_in_place_reruns_are_stable(tmp_path):
+    _make(tmp_path / "a.png")
+    _make(tmp_path / "a.jpg", color=(0, 0, 255))
+    _make(tmp_path / "b.jpg")
+
+    first = ingest.ingest_images(str(tmp_path), str(tmp_path), workers=0, verbose=False)
+    assert first["counts"] == {"converted": 1, "copied": 2}
+    for _ in range(2):
+        again = ingest.ingest_images(str(tmp_path), str(tmp_path), workers=0, verbose=False)
+        assert again["counts"] == {"skipped": 3}
+    assert sorted(os.listdir(tmp_path)) == [".ingest_manifest.json", "a.jpg", "a.png", "a_png.jpg", "b.jpg"]
+
+    only_heif = ingest.ingest_images(str(tmp_path), str(tmp_path), workers=0, verbose=False, extensions=ingest.HEIF_EXTENSIONS)
+    assert only_heif["total"] == 0
+    # A filtered run leaves the other sources' manifest entries alone.
+    assert ingest.ingest_images(str(tmp_path), str(tmp_path), workers=0, verbose=False)["counts"] == {"skipped": 3}
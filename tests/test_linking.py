@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from src.core import linking
+
+
+@pytest.fixture
+def src_dir(tmp_path):
+    d = tmp_path / "src"
+    d.mkdir()
+    (d / "a.jpg").write_bytes(b"x" * 100)
+    (d / "b.jpg").write_bytes(b"y" * 50)
+    (d / "dup.jpg").write_bytes(b"x" * 100)
+    return d
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "copy"])
+def test_link_tree_modes_and_rerun(src_dir, tmp_path, mode):
+    dst = tmp_path / "dst"
+    report = linking.link_tree(str(src_dir), str(dst), mode=mode, dedupe=False)
+    assert report["placed"] == 3
+    assert (dst / "a.jpg").read_bytes() == b"x" * 100
+    assert report["bytes_moved"] == (250 if mode == "copy" else 0)
+    assert linking.link_tree(str(src_dir), str(dst), mode=mode)["skipped"] == 3
+
+
+def test_copy_dedupes_identical_files(src_dir, tmp_path):
+    dst = tmp_path / "dst"
+    report = linking.link_tree(str(src_dir), str(dst), mode="copy", workers=4)
+    assert report["deduped"] == 1
+    assert report["bytes_moved"] == 150
+    assert (dst / "dup.jpg").read_bytes() == b"x" * 100
+
+
+def test_auto_picks_a_working_mode(src_dir, tmp_path):
+    report = linking.link_tree(str(src_dir), str(tmp_path / "dst"))
+    assert report["mode"] in linking.AUTO_ORDER
+    assert not os.path.exists(tmp_path / "dst" / ".link_probe")
+    assert sorted(os.listdir(tmp_path / "dst")) == ["a.jpg", "b.jpg", "dup.jpg"]
+
+
+def test_auto_never_shares_data_with_the_source(src_dir, tmp_path):
+    dst = tmp_path / "dst"
+    linking.link_tree(str(src_dir), str(dst), mode="hardlink")
+    report = linking.link_tree(str(src_dir), str(dst))
+    assert report["mode"] not in linking.SHARED_MODES and report["skipped"] == 0
+    (dst / "a.jpg").write_bytes(b"undistorted")
+    assert (src_dir / "a.jpg").read_bytes() == b"x" * 100
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+
+from src import orchestrator
+from src.convert import gaussian_ply, lod
+from tests.helpers import make_gaussians
+
+
+def _cloud(path, n=5000):
+    g = make_gaussians(n, seed=3)
+    g["opacity"] = 2.0
+    for i in range(3):
+        g[f"scale_{i}"] = -5.0
+    gaussian_ply.write_gaussians(str(path), g)
+    return g
+
+
+def test_octree_ranges_partition_sorted_codes():
+    codes = np.sort(np.random.default_rng(0).integers(0, 1 << 30, 2000).astype(np.uint32))
+    nodes = lod.build_octree(codes, max_per_tile=100)
+    leaves = [n for n in nodes if n["leaf"]]
+    assert sum(n["end"] - n["start"] for n in leaves) == len(codes)
+    assert all(n["end"] - n["start"] <= 100 for n in leaves)
+    by_id = {n["id"]: n for n in nodes}
+    for n in nodes:
+        # Every code in a child shares the parent's prefix, i.e. the child cell lies inside the parent cell.
+        shift = 3 * (lod.MAX_DEPTH - n["depth"])
+        prefixes = codes[n["start"] : n["end"]] >> shift
+        assert len(set(prefixes.tolist())) == 1
+        assert [by_id[c]["depth"] for c in n["children"]] == [n["depth"] + 1] * len(n["children"])
+
+
+def test_build_tiles_index_and_ranged_reads(tmp_path):
+    src = tmp_path / "point_cloud.ply"
+    g = _cloud(src)
+    index = lod.build_tiles(str(src), str(tmp_path / "tiles"), max_per_tile=500, lod_size=200)
+    nodes = {n["id"]: n for n in index["nodes"]}
+    root = nodes["r"]
+    assert not root["leaf"] and root["count"] == 200 and root["source_count"] == len(g)
+    assert sum(n["count"] for n in nodes.values() if n["leaf"]) == len(g)
+    assert os.path.getsize(tmp_path / "tiles" / "tiles.bin") == sum(n["length"] for n in nodes.values())
+
+    leaf = next(n for n in nodes.values() if n["leaf"])
+    records = lod.read_node(str(tmp_path / "tiles"), index, leaf["id"])
+    assert len(records) == leaf["count"]
+    lo, hi = np.array(leaf["cell_bounds"][0]), np.array(leaf["cell_bounds"][1])
+    assert np.all((records["position"] >= lo - 1e-4) & (records["position"] <= hi + 1e-4))
+    # Coarse levels carry inflated scales to cover the Gaussians they stand in for.
+    coarse = lod.read_node(str(tmp_path / "tiles"), index, "r")
+    assert coarse["scale"].min() > np.exp(-5.0) * 1.5
+
+    ply_index = lod.build_tiles(str(src), str(tmp_path / "ply_tiles"), max_per_tile=500, record_format="ply")
+    first_leaf = next(n for n in ply_index["nodes"] if n["leaf"])
+    rows = lod.read_node(str(tmp_path / "ply_tiles"), ply_index, first_leaf["id"])
+    assert rows.dtype.names == g.dtype.names and first_leaf["length"] == len(rows) * g.dtype.itemsize
+
+
+def test_orchestrator_tile_stage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _cloud(os.path.join("scenes", "s", "output", "point_cloud", "iteration_7000", "point_cloud.ply"), n=300)
+    index = orchestrator.tile_scene("s", max_per_tile=100)
+    assert os.path.isfile(os.path.join("scenes", "s", "tiles", lod.INDEX_FILE)) and index["count"] == 300
+    assert orchestrator.tile_scene("s", max_per_tile=100) == {"skipped": True}
+    assert orchestrator.tile_scene("s", max_per_tile=50)["max_per_tile"] == 50
@@ -0,0 +1,38 @@
+import sys
+
+from src.core import logstream, process
+
+
+def test_processor_matches_across_chunks_and_bounds_tail():
+    proc = logstream.LogProcessor(patterns=["could not create OpenGL context"], tail_lines=3)
+    proc.feed(b"line 1\nline 2\nERROR: Could not create Open")
+    proc.feed(b"GL context\n" + b"noise\n" * 1000)
+    proc.close()
+    assert proc.matched == ["could not create OpenGL context"]
+    assert list(proc.tail) == ["noise"] * 3
+    assert proc.lines == 1003
+
+
+def test_colmap_and_training_parsers():
+    events = []
+    proc = logstream.LogProcessor(
+        parsers=[logstream.colmap_progress_parser, logstream.training_progress_parser], on_event=events.append
+    )
+    proc.feed(b"Processed file [12/200]\nMatching block [2/3, 1/3]\nRegistering image #5 (17)\n")
+    proc.feed(b"Training progress:  10%| | 3000/30000 [01:23<12:00, 36.00it/s, Loss=0.0512345]\r")
+    proc.feed(b"[ITER 7000] Evaluating test: L1 0.031 PSNR 25.10 \n")
+    proc.close()
+    assert events[0] == {"source": "colmap", "stage": "feature_extraction", "current": 12, "total": 200}
+    assert events[1]["current"] == 4 and events[1]["total"] == 9
+    assert events[2]["registered"] == 17
+    assert events[3]["iteration"] == 3000 and events[3]["loss"] == 0.0512345 and events[3]["eta_s"] == 720.0
+    assert events[4] == {"source": "training", "kind": "eval", "iteration": 7000, "split": "test", "l1": 0.031, "psnr": 25.1}
+
+
+def test_processor_fed_by_process_run_streams_to_file(tmp_path):
+    log = tmp_path / "run.log"
+    proc = logstream.LogProcessor(tail_lines=2)
+    result = process.run([sys.executable, "-c", "print('a'); print('b'); print('c'); raise SystemExit(3)"], logfile_path=str(log), processor=proc)
+    assert result.returncode == 3
+    assert proc.tail_text() == "b\nc"
+    assert log.read_text().splitlines()[-3:] == ["a", "b", "c"]
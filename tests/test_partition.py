@@ -0,0 +1,145 @@
+import json
+import os
+
+import numpy as np
+
+from src import partition
+from src.convert import colmap_model as cm
+from src.convert import gaussian_ply
+from tests.helpers import make_gaussians, make_model
+
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs")
+
+
+def test_plan_partition_tiles_cameras_with_overlap():
+    rng = np.random.default_rng(0)
+    flat = np.c_[rng.uniform(0, 400, 1200), rng.uniform(0, 300, 1200), rng.normal(0, 0.5, 1200)]
+    tilt = cm.qvec_to_rotmat(np.array([0.9, 0.3, 0.2, 0.1]))
+    positions = flat @ tilt.T + [10.0, -20.0, 5.0]
+    names = [f"img_{i:04d}.jpg" for i in range(len(positions))]
+    plan = partition.plan_partition(positions, names, max_images=200, overlap=0.2)
+
+    xy = partition.to_ground(positions, np.array(plan["origin"]), np.array(plan["axes"]))
+    owners = np.zeros(len(names), dtype=int)
+    for block in plan["blocks"]:
+        core = partition.in_cell(xy, *partition._bounds_array(block["core"]))
+        owners += core
+        assert block["core_images"] == core.sum() <= 200
+        assert {names[i] for i in np.flatnonzero(core)} <= set(block["images"])
+    assert (owners == 1).all()  # the core cells tile the plane
+    assert len(plan["blocks"]) >= 6
+    assert sum(len(b["images"]) for b in plan["blocks"]) > len(names)  # blocks overlap
+
+
+def _transform(positions, t):
+    return np.asarray(positions) @ np.asarray(t["rotation"]).T * t["scale"] + t["translation"]
+
+
+def test_merge_crops_aligns_and_deduplicates(tmp_path):
+    rng = np.random.default_rng(1)
+    cameras = np.c_[np.arange(101) + 0.5, rng.uniform(-5, 5, 101), np.zeros(101)]
+    plan = partition.plan_partition(cameras, [str(i) for i in range(101)], max_images=60)
+    assert len(plan["blocks"]) == 2
+    origin, axes = np.array(plan["origin"]), np.array(plan["axes"])
+
+    world = make_gaussians(3000, sh_degree=1, seed=4)
+    world["x"] = rng.uniform(0, 101, len(world))
+    world["x"][np.abs(world["x"] - 50.5) < 1.5] += 3.0  # keep the base set clear of the boundary band
+    world["rot_0"], world["rot_1"], world["rot_2"], world["rot_3"] = 1.0, 0.0, 0.0, 0.0
+    # A surface straddling the boundary that both blocks reconstructed; block A's copy is stronger.
+    cluster = make_gaussians(10, sh_degree=1, seed=5)
+    cluster["y"], cluster["z"] = 0.2, 0.2
+
+    transform = {"scale": 2.0, "rotation": cm.qvec_to_rotmat(np.array([np.cos(0.3), 0.0, 0.0, np.sin(0.3)])).tolist(), "translation": [1.0, 2.0, 3.0]}
+    fitted = partition.fit_similarity(cameras, _transform(cameras, transform))
+    np.testing.assert_allclose(fitted["rotation"], transform["rotation"], atol=1e-9)
+    assert abs(fitted["scale"] - 2.0) < 1e-9 and fitted["rms_error"] < 1e-9
+    inverse = partition.fit_similarity(_transform(cameras, transform), cameras)
+
+    plys = []
+    for b, block in enumerate(plan["blocks"]):
+        lo, hi = partition._bounds_array(block["bounds"])
+        xy = partition.to_ground(gaussian_ply.field_block(world, "positions"), origin, axes)
+        rows = world[partition.in_cell(xy, lo, hi)].copy()
+        side = np.array(cluster)
+        owns_a = partition.in_cell(partition.to_ground([[50.45, 0.2, 0.2]], origin, axes), *partition._bounds_array(block["core"]))[0]
+        side["x"] = 50.45 if owns_a else 50.55
+        side["opacity"] = 5.0 if owns_a else -5.0
+        rows = np.concatenate([rows, side])
+        if b == 1:
+            # Block 1 was reconstructed in its own frame: store it there and let the merge align it.
+            rows = partition.transform_gaussians(rows, inverse)
+            block["transform"] = transform
+        path = str(tmp_path / f"{block['id']}.ply")
+        gaussian_ply.write_gaussians(path, rows)
+        plys.append(path)
+
+    out = str(tmp_path / "merged.ply")
+    stats = partition.merge_blocks(plan, plys, out, dedup_radius=1.0)
+    merged = gaussian_ply.read_gaussians(out)
+    assert stats["duplicates_removed"] == 10
+    assert len(merged) == len(world) + 10
+    strong = merged[np.isclose(merged["x"], 50.45, atol=1e-3)]
+    assert len(strong) == 10 and (strong["opacity"] > 0).all()
+    base = merged[np.abs(merged["x"] - 50.5) > 1.0]
+    order = np.argsort(base["x"])
+    np.testing.assert_allclose(base["x"][order], np.sort(world["x"]), atol=1e-3)
+    np.testing.assert_allclose(np.sort(base["scale_0"]), np.sort(world["scale_0"]), atol=1e-4)
+    assert np.allclose(np.abs(base["rot_0"]), 1.0, atol=1e-5)
+
+
+def _sparse_scene(root, n=40):
+    # Cameras along a 40 m line, sparse points over the same stretch.
+    model = make_model(num_images=n, num_points=300, seed=6)
+    centers = np.c_[np.linspace(0, 40, n), np.random.default_rng(7).uniform(-2, 2, n), np.zeros(n)]
+    model.images["qvec"] = (1.0, 0.0, 0.0, 0.0)
+    model.images["tvec"] = -centers
+    model.points3D["xyz"] = np.c_[np.random.default_rng(8).uniform(0, 40, 300), np.zeros((300, 2))]
+    scene = root / "scenes" / "big"
+    cm.write_model(model, str(scene / "sparse" / "0"))
+    (scene / "images").mkdir(parents=True)
+    for name in model.image_names:
+        (scene / "images" / name).write_bytes(b"jpeg")
+    return model
+
+
+def test_run_partitioned_sparse_trains_blocks_and_merges(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GAUSSIAN_SPLATTING_DIR", STUBS)
+    monkeypatch.setenv("STUB_TRAIN_LOG", str(tmp_path / "train.log"))
+    _sparse_scene(tmp_path)
+
+    result = partition.run_partitioned("big", source="sparse", max_images=15, iterations=100, slots={"gpu": 2})
+    plan = json.loads((tmp_path / "scenes" / "big" / "partition.json").read_text())
+    assert plan["source"] == "sparse" and len(plan["blocks"]) >= 3
+    assert set(result["blocks"].values()) == {"done"}
+    for block in plan["blocks"]:
+        base = tmp_path / "scenes" / "big" / "blocks" / block["id"]
+        sub = cm.read_model(str(base / "sparse" / "0"))
+        assert sorted(sub.image_names) == sorted(block["images"]) == sorted(os.listdir(base / "images"))
+    merged = tmp_path / "scenes" / "big" / "output" / "point_cloud" / "iteration_100" / "point_cloud.ply"
+    assert len(gaussian_ply.read_gaussians(str(merged))) == result["merge"]["count"] > 0
+
+    # Blocks already trained are skipped on a rerun.
+    partition.run_partitioned("big", source="sparse", max_images=15, iterations=100)
+    assert len((tmp_path / "train.log").read_text().splitlines()) == len(plan["blocks"])
+
+    # A new plan and iteration count retrain every block; nothing is merged from the old 100-iteration clouds.
+    result = partition.run_partitioned("big", source="sparse", max_images=25, iterations=200, force=True)
+    replan = json.loads((tmp_path / "scenes" / "big" / "partition.json").read_text())
+    assert len((tmp_path / "train.log").read_text().splitlines()) == len(plan["blocks"]) + len(replan["blocks"])
+    merged = tmp_path / "scenes" / "big" / "output" / "point_cloud" / "iteration_200" / "point_cloud.ply"
+    assert len(gaussian_ply.read_gaussians(str(merged))) == result["merge"]["count"] > 0
+
+
+def test_gps_blocks_get_private_image_copies(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    model = _sparse_scene(tmp_path)
+    monkeypatch.setattr(partition, "gps_positions", lambda images_dir: (cm.camera_centers(model), list(model.image_names)))
+
+    plan = partition.prepare_blocks("big", source="gps", max_images=15, link_mode="hardlink")
+    block = plan["blocks"][0]
+    name = block["images"][0]
+    parent = tmp_path / "scenes" / "big" / "images" / name
+    # Each block's COLMAP undistorts its images in place; that must not reach the parent or other blocks.
+    assert not os.path.samefile(parent, tmp_path / "scenes" / "big" / "blocks" / block["id"] / "images" / name)
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from src.core import logstream, process
+
+posix_only = pytest.mark.skipif(sys.platform == "win32", reason="process-group signals are POSIX-specific")
+
+
+def _py(code):
+    return [sys.executable, "-c", code]
+
+
+def test_streams_consumed_concurrently_into_log_and_processor(tmp_path):
+    log = tmp_path / "run.log"
+    proc = logstream.LogProcessor(patterns=["boom"])
+    # Interleave partial lines on both streams: lines must not be mixed across streams.
+    code = "import sys\nfor i in range(3):\n    sys.stdout.write('out'); sys.stdout.flush(); sys.stderr.write('err boom\\n'); sys.stderr.flush(); sys.stdout.write(f' {i}\\n'); sys.stdout.flush()\n"
+    result = process.run(_py(code), logfile_path=str(log), processor=proc)
+    assert result.ok and result.returncode == 0
+    assert result.stdout_bytes == len("out 0\n") * 3 and result.stderr_bytes == len("err boom\n") * 3
+    assert proc.matched == ["boom"]
+    assert sorted(proc.tail) == ["err boom"] * 3 + ["out 0", "out 1", "out 2"]
+    assert log.read_text().startswith("\n--- Running:")
+
+
+@posix_only
+def test_timeout_escalates_and_kills_process_group(tmp_path):
+    pid_file = tmp_path / "grandchild.pid"
+    # The child ignores SIGINT and starts a grandchild in the same process group.
+    code = (
+        "import signal, subprocess, sys, time\n"
+        "signal.signal(signal.SIGINT, signal.SIG_IGN)\n"
+        f"p = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+        f"open({str(pid_file)!r}, 'w').write(str(p.pid))\n"
+        "time.sleep(60)\n"
+    )
+    start = time.perf_counter()
+    result = process.run(_py(code), timeout=1.0, grace=0.3)
+    assert time.perf_counter() - start < 10
+    assert result.timed_out and not result.ok
+    assert result.signals[:2] == ["SIGINT", "SIGTERM"]
+    with pytest.raises(Exception):
+        result.check_returncode()
+    grandchild = int(pid_file.read_text())
+    for _ in range(50):
+        try:
+            os.kill(grandchild, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail("grandchild survived the process-group kill")
+
+
+def test_commands_share_one_event_loop():
+    async def main():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(process.run_async(_py("import time; time.sleep(0.5)")) for _ in range(3)))
+        return time.perf_counter() - start, results
+
+    elapsed, results = asyncio.run(main())
+    assert all(r.ok for r in results)
+    assert elapsed < 1.4
+
+
+@posix_only
+def test_cancellation_stops_the_process():
+    async def main():
+        task = asyncio.ensure_future(process.run_async(_py("import time; time.sleep(60)"), grace=0.5))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    assert time.perf_counter() - start < 5
+
+
+def test_blocking_run_inside_a_running_loop():
+    async def notebook_cell():
+        return process.run(_py("print('hi')"))
+
+    assert asyncio.run(notebook_cell()).returncode == 0
@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+
+from src.core import profiler
+
+
+def test_spans_capture_child_processes_and_export_trace(tmp_path):
+    prof = profiler.Profiler("scene", interval=0.05)
+    assert profiler.active() is None
+    with prof.span("colmap") as rec:
+        assert profiler.active() is prof
+        with profiler.span("busy_child"):
+            # Burn CPU in a child that exits before the span closes; its CPU must still be counted.
+            subprocess.check_call([sys.executable, "-c", "import time\nt=time.time()\nwhile time.time()-t<0.3: pass"])
+        rec["args"]["result"] = "ran"
+    assert profiler.active() is None
+
+    names = [s["name"] for s in prof.summary()]
+    assert names == ["busy_child", "colmap"]
+    child, stage = prof.summary()
+    assert child["category"] == "subprocess" and stage["result"] == "ran"
+    assert stage["wall_s"] >= child["wall_s"] >= 0.3
+    assert stage["peak_rss_mb"] > 0
+    if profiler.psutil is not None:
+        assert child["cpu_s"] >= 0.1
+
+    path = prof.save_to_scene(str(tmp_path), label="test")
+    trace = json.load(open(path))
+    phases = {e["ph"] for e in trace["traceEvents"]}
+    assert {"M", "X", "C"} <= phases
+    assert path.startswith(str(tmp_path / "logs" / "trace-"))
+
+
+def test_span_records_errors():
+    prof = profiler.Profiler()
+    try:
+        with prof.span("training"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert prof.summary()[0]["error"] == "RuntimeError: boom"
+
+
+def test_module_span_is_noop_without_profiler():
+    with profiler.span("anything") as rec:
+        assert rec is None
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.convert import pyramid
+
+
+def _scene(tmp_path, n=3):
+    images = tmp_path / "images"
+    images.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(n):
+        Image.fromarray(rng.integers(0, 256, (90, 161, 3), dtype=np.uint8)).save(images / f"{i:03d}.jpg", quality=95)
+    Image.fromarray(rng.integers(0, 256, (64, 64, 3), dtype=np.uint8)).save(images / "mask.png")
+    return images
+
+
+def test_pyramid_levels_sizes_and_quality(tmp_path):
+    images = _scene(tmp_path)
+    report = pyramid.build_pyramid(str(tmp_path), workers=0, verbose=False)
+    assert report["counts"] == {"built": 4}
+    for f in pyramid.LEVELS:
+        names = sorted(os.listdir(tmp_path / f"images_{f}"))
+        assert names == ["000.jpg", "001.jpg", "002.jpg", "mask.png"]
+        with Image.open(tmp_path / f"images_{f}" / "000.jpg") as img:
+            assert img.size == pyramid.level_size((161, 90), f)
+    # Area-style reduction: a level-2 pixel is close to the mean of its 2x2 source block.
+    full = np.asarray(Image.open(images / "mask.png"), dtype=np.float64)
+    half = np.asarray(Image.open(tmp_path / "images_2" / "mask.png"), dtype=np.float64)
+    box = full.reshape(32, 2, 32, 2, 3).mean(axis=(1, 3))
+    assert np.abs(half - box).mean() < 20
+
+
+def test_pyramid_skips_unchanged_and_rebuilds_stale(tmp_path):
+    images = _scene(tmp_path)
+    pyramid.build_pyramid(str(tmp_path), workers=2, verbose=False)
+    assert pyramid.build_pyramid(str(tmp_path), workers=0, verbose=False)["counts"] == {"skipped": 4}
+
+    # Touched but identical: hashed and skipped. Edited: rebuilt. Missing level: only that level rewritten.
+    os.utime(images / "000.jpg", ns=(1, 1))
+    Image.new("RGB", (161, 90), (10, 20, 30)).save(images / "001.jpg")
+    os.remove(tmp_path / "images_8" / "002.jpg")
+    os.remove(images / "mask.png")
+    report = pyramid.build_pyramid(str(tmp_path), workers=0, verbose=False)
+    by_name = {os.path.basename(r["source"]): r for r in report["results"]}
+    assert by_name["000.jpg"]["status"] == "skipped"
+    assert by_name["001.jpg"]["written"] == [2, 4, 8]
+    assert by_name["002.jpg"]["written"] == [8]
+    assert not (tmp_path / "images_4" / "mask.png").exists()
@@ -0,0 +1,65 @@
+import json
+import os
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from src import orchestrator
+from src.ingest import selection
+
+
+def _texture(seed, size=256):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (size // 8, size // 8), dtype=np.uint8)
+    return Image.fromarray(base).resize((size, size), Image.NEAREST).convert("RGB")
+
+
+def test_scores_rank_blur_and_hash_duplicates(tmp_path):
+    sharp = _texture(1)
+    sharp.save(tmp_path / "a.jpg", quality=95)
+    sharp.save(tmp_path / "b.jpg", quality=80)  # near duplicate of a
+    sharp.filter(ImageFilter.GaussianBlur(6)).save(tmp_path / "c.jpg")
+    _texture(2).save(tmp_path / "d.jpg")
+    paths = [str(tmp_path / n) for n in ("a.jpg", "b.jpg", "c.jpg", "d.jpg")]
+
+    scores = selection.score_images(paths, workers=0)
+    assert scores["sharpness"][2] < 0.2 * scores["sharpness"][0]
+    d = selection.hamming(scores["hash"], scores["hash"])
+    assert d[0, 1] <= 6 < d[0, 3]
+
+    keep, removed = selection.select_images(scores["sharpness"], scores["hash"])
+    assert keep.tolist()[2] is False
+    assert {r["reason"] for r in removed} == {"blur", "duplicate"}
+    assert keep.sum() == 2
+
+
+def test_target_count_keeps_sharpest_per_bucket():
+    sharpness = np.array([1.0, 5.0, 2.0, 9.0, 3.0, 4.0])
+    hashes = np.array([0x0, 0xFFFF, 0xFFFF0000, 0xFFFF00000000, 0xFFFF000000000000, 0xFF00FF00FF00FF00], dtype=np.uint64)
+    keep, removed = selection.select_images(sharpness, hashes, blur_ratio=0.0, target_count=2)
+    assert np.flatnonzero(keep).tolist() == [1, 3]
+    assert all(r["reason"] == "target_count" for r in removed)
+
+
+def test_select_scene_images_moves_rejects_and_is_idempotent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    images = tmp_path / "scenes" / "s" / "images"
+    images.mkdir(parents=True)
+    for i in range(4):
+        _texture(i).save(images / f"{i}.jpg")
+    _texture(0).filter(ImageFilter.GaussianBlur(6)).save(images / "blurry.jpg")
+
+    report = orchestrator.select_scene_images("s", workers=0)
+    assert report["kept"] == 4
+    assert os.listdir(tmp_path / "scenes" / "s" / "images_rejected") == ["blurry.jpg"]
+    saved = json.load(open(tmp_path / "scenes" / "s" / "logs" / "selection_report.json"))
+    assert saved["removed_images"][0]["name"] == "blurry.jpg"
+    assert orchestrator.select_scene_images("s", workers=0) == {"skipped": True}
+
+    # COLMAP rewriting the kept images, or another worker count, does not trigger a new selection.
+    (images / "0.jpg").write_bytes((images / "1.jpg").read_bytes())
+    assert orchestrator.select_scene_images("s", workers=2) == {"skipped": True}
+    # A forced rerun starts again from the full set instead of thinning the reduced one.
+    _texture(0).save(images / "0.jpg")
+    report = orchestrator.select_scene_images("s", workers=0, force=True)
+    assert (report["total"], report["kept"]) == (5, 4)
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.convert import shards
+from tests.helpers import make_model
+
+
+def _scene(tmp_path, n=5):
+    images = tmp_path / "images"
+    images.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(n):
+        Image.fromarray(rng.integers(0, 256, (40, 60 + i, 3), dtype=np.uint8)).save(images / f"{i:03d}.jpg", quality=90)
+    Image.fromarray(rng.integers(0, 256, (32, 32, 4), dtype=np.uint8)).save(images / "mask.png")
+    return images
+
+
+def test_raw_shards_roundtrip_split_and_aligned(tmp_path):
+    images = _scene(tmp_path)
+    index = shards.pack_images(str(tmp_path), mode="raw", shard_bytes=20000, workers=2)
+    assert len(index["shards"]) > 1
+    assert all(e["offset"] % shards.ALIGN == 0 for e in index["images"])
+    with shards.ShardReader(str(tmp_path / "shards")) as reader:
+        assert reader.names == ["000.jpg", "001.jpg", "002.jpg", "003.jpg", "004.jpg", "mask.png"]
+        for name, pixels in reader:
+            with Image.open(images / name) as img:
+                assert np.array_equal(pixels, np.asarray(img).reshape(pixels.shape))
+        assert reader["mask.png"].shape == (32, 32, 4)
+
+    # Extraction keeps the names the sparse model refers to, and mirrors the shards.
+    out = tmp_path / "extracted"
+    out.mkdir()
+    (out / "stale.jpg").write_bytes(b"old")
+    assert shards.extract_images(str(tmp_path / "shards"), str(out)) == 6
+    assert sorted(os.listdir(out)) == sorted(os.listdir(images))
+    with Image.open(out / "mask.png") as img, Image.open(images / "mask.png") as orig:
+        assert np.array_equal(np.asarray(img), np.asarray(orig))
+
+    # Repacking at half resolution without a pyramid resizes in place of images_2.
+    index = shards.pack_images(str(tmp_path), mode="raw", resolution=2, workers=0)
+    assert index["source"] == "images"
+    assert index["images"][0]["shape"] == [20, 30, 3]
+    assert sorted(f for f in os.listdir(tmp_path / "shards") if f.startswith("shard-")) == ["shard-00000.bin"]
+
+
+def test_encoded_shards_copy_and_extract(tmp_path):
+    images = _scene(tmp_path)
+    shards.pack_images(str(tmp_path), mode="encoded")
+    local = tmp_path / "local"
+    assert shards.copy_shards(str(tmp_path / "shards"), str(local))["copied"] == 1
+    assert shards.copy_shards(str(tmp_path / "shards"), str(local))["skipped"] == 1
+
+    with shards.ShardReader(str(local)) as reader:
+        assert bytes(reader.raw_bytes("002.jpg")) == (images / "002.jpg").read_bytes()
+        with Image.open(images / "002.jpg") as img:
+            assert np.array_equal(reader["002.jpg"], np.asarray(img))
+
+    out = tmp_path / "extracted"
+    assert shards.extract_images(str(local), str(out)) == 6
+    assert sorted(os.listdir(out)) == sorted(os.listdir(images))
+    assert (out / "mask.png").read_bytes() == (images / "mask.png").read_bytes()
+
+    with pytest.raises(ValueError):
+        shards.pack_images(str(tmp_path), mode="npy")
+
+
+def test_pipeline_trains_from_local_extracted_shards(tmp_path, monkeypatch):
+    from src import orchestrator
+    from src.convert import colmap_model
+
+    monkeypatch.chdir(tmp_path)
+    scene = tmp_path / "scenes" / "s"
+    scene.mkdir(parents=True)
+    _scene(scene)
+    seen = {}
+
+    def fake_colmap(images_dir, scene_base, **kwargs):
+        colmap_model.write_model(make_model(), os.path.join(scene_base, "sparse", "0"))
+
+    def fake_training(scene_base, model_path=None, images_dir=None, **kwargs):
+        seen["images"] = sorted(os.listdir(images_dir))
+        os.makedirs(os.path.join(model_path, "point_cloud", "iteration_7"), exist_ok=True)
+        open(os.path.join(model_path, "point_cloud", "iteration_7", "point_cloud.ply"), "w").close()
+
+    monkeypatch.setattr(orchestrator.colmap_mod, "run_colmap", fake_colmap)
+    monkeypatch.setattr(orchestrator.training_mod, "run_training", fake_training)
+    local = tmp_path / "local"
+    status = orchestrator.run_full_pipeline("s", iterations=7, shard_mode="encoded", shard_local_dir=str(local), profile=False)
+    assert status["shards"] == "ran" and status["training"] == "ran"
+    assert seen["images"] == sorted(os.listdir(scene / "images"))
+    assert (local / "shards" / shards.INDEX_FILE).is_file()
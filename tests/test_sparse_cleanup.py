@@ -0,0 +1,39 @@
+import numpy as np
+
+from src.convert import colmap_model, sparse_cleanup
+from tests.helpers import make_model
+
+
+def test_knn_mean_distance_matches_brute_force():
+    xyz = np.random.default_rng(0).normal(size=(600, 3))
+    xyz[:3] += 30  # far outliers need the coarser retries
+    dist = np.sort(np.linalg.norm(xyz[:, None] - xyz[None], axis=2), axis=1)[:, 1:9]
+    for cell in (0.05, 0.3, 100.0):
+        # Exact up to MAX_GROWTH first cells; neighbours beyond count at that radius.
+        expected = np.minimum(dist, cell * sparse_cleanup.MAX_GROWTH).mean(axis=1)
+        np.testing.assert_allclose(sparse_cleanup.knn_mean_distance(xyz, 8, cell=cell, chunk=5000), expected, rtol=1e-5)
+    default = sparse_cleanup.knn_mean_distance(xyz, 8)
+    assert default[:3].min() > default[3:].max()
+
+
+def test_clean_model_removes_outliers_and_keeps_model_consistent(tmp_path):
+    model = make_model(num_images=3, num_points=400)
+    rng = np.random.default_rng(1)
+    model.points3D["xyz"] = rng.normal(0, 0.1, (400, 3))
+    model.points3D["xyz"][:5] = rng.normal(0, 1, (5, 3)) + 20  # floaters
+    model.points3D["error"][5] = 9.0
+    colmap_model.write_model(model, str(tmp_path / "raw"))
+
+    report = sparse_cleanup.clean_model(str(tmp_path / "raw"), str(tmp_path / "clean"), min_track_length=0, voxel_size=None)
+    cleaned = colmap_model.read_model(str(tmp_path / "clean"))
+    kept = set(cleaned.points3D["point3D_id"].tolist())
+    assert not kept & {1, 2, 3, 4, 5, 6}
+    assert report["removed"]["reprojection_error"] == 1 and report["removed"]["statistical_outlier"] >= 5
+    assert report["points_after"] == len(cleaned.points3D) and len(kept) > 350
+    matched = cleaned.points2D["point3D_id"][cleaned.points2D["point3D_id"] >= 0]
+    assert set(matched.tolist()) == kept
+
+    keep, report = sparse_cleanup.clean_points(cleaned, nb_neighbors=0, min_track_length=0, max_error=None, voxel_size=0.5)
+    assert report["removed"]["voxel_downsample"] == len(cleaned.points3D) - keep.sum()
+    voxels = np.floor(cleaned.points3D["xyz"][keep] / 0.5)
+    assert len(np.unique(voxels, axis=0)) == keep.sum()
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+from src import orchestrator
+from src.convert import gaussian_ply, splat_export
+from tests.helpers import make_gaussians
+
+
+def _cloud(path, n=1000, seed=0):
+    g = make_gaussians(n, seed=seed)
+    g["opacity"][:100] = -10.0  # sigmoid ~ 4.5e-5: pruned by the default min_opacity
+    g["x"][100:110] = 50.0
+    for i in range(3):
+        g[f"scale_{i}"] = np.float32(-4.0) + g[f"scale_{i}"] * np.float32(0.5)
+    gaussian_ply.write_gaussians(str(path), g)
+    return g
+
+
+def test_prune_and_export_formats(tmp_path):
+    src = tmp_path / "point_cloud.ply"
+    _cloud(src)
+    report = splat_export.export_splats(
+        str(src), str(tmp_path / "out"), formats=splat_export.FORMATS, bbox=((-10, -10, -10), (10, 10, 10)), sh_degree=1, block_size=256
+    )
+    assert report["pruned"] == {"opacity": 100, "scale": 0, "bbox": 10}
+    kept = report["kept"]
+    assert kept == 890
+
+    outputs = report["outputs"]
+    assert outputs["splat"]["bytes"] == kept * 32
+    assert outputs["splat"]["errors"]["positions"]["max_abs"] == 0.0
+    assert outputs["splat"]["errors"]["colors"]["rmse"] < 0.1
+
+    compressed = outputs["compressed_ply"]
+    assert compressed["ratio"] > 8
+    assert compressed["errors"]["rotations"]["max_abs"] < 0.01
+    assert compressed["errors"]["scales"]["max_abs"] < 0.01
+    header = open(compressed["path"], "rb").read(2000).split(b"end_header")[0].decode()
+    assert "element chunk 4" in header and f"element vertex {kept}" in header and "property uchar f_rest_8" in header
+
+    half = gaussian_ply.read_gaussians(outputs["half_ply"]["path"])
+    assert half.dtype["x"] == np.float16 and len(half) == kept
+    assert outputs["half_ply"]["path"].endswith(".half.ply")
+    plain = gaussian_ply.read_gaussians(outputs["ply"]["path"])
+    assert gaussian_ply.sh_degree(plain.dtype) == 1
+    assert np.allclose(half["opacity"].astype(np.float32), plain["opacity"], atol=1e-2)
+    assert all(v["max_abs"] == 0.0 for v in outputs["ply"]["errors"].values())
+
+
+def test_truncate_sh_keeps_leading_bands_per_channel():
+    g = make_gaussians(4, sh_degree=2)  # 8 coefficients per colour channel
+    low = splat_export.truncate_sh(g, 1)  # 3 per channel
+    for c in range(3):
+        for k in range(3):
+            assert np.array_equal(low[f"f_rest_{c * 3 + k}"], g[f"f_rest_{c * 8 + k}"])
+    assert splat_export.truncate_sh(g, 3) is g
+
+
+def test_orchestrator_export_stage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _cloud(os.path.join("scenes", "s", "output", "point_cloud", "iteration_30000", "point_cloud.ply"))
+    report = orchestrator.export_scene("s", formats=["splat"])
+    assert os.path.isfile(os.path.join("scenes", "s", "export", "s.splat"))
+    assert os.path.isfile(os.path.join("scenes", "s", "logs", "export_report.json"))
+    assert report["kept"] == 900
+    assert orchestrator.export_scene("s", formats=["splat"]) == {"skipped": True}
+    assert orchestrator.export_scene("s", formats=["splat"], min_opacity=0.0)["kept"] == 1000
+    with pytest.raises(ValueError):
+        orchestrator.export_scene("s", formats=["jpeg"])
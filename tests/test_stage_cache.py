@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from src import orchestrator
+from src.convert import colmap_model
+from src.core.stage_cache import StageCache
+from tests.helpers import make_model
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def test_stage_fresh_until_inputs_params_or_outputs_change(tmp_path):
+    scene = tmp_path / "scene"
+    _write(str(scene / "images" / "a.jpg"), "a")
+    _write(str(scene / "sparse" / "0" / "points3D.bin"), "p")
+    cache = StageCache(str(scene))
+    inputs = cache.path_digest(str(scene / "images"))
+    cache.record("colmap", {"use_gpu": True}, inputs, [str(scene / "sparse")])
+
+    reloaded = StageCache(str(scene))
+    assert reloaded.is_fresh("colmap", {"use_gpu": True}, inputs)
+    assert not reloaded.is_fresh("colmap", {"use_gpu": False}, inputs)
+
+    _write(str(scene / "images" / "b.jpg"), "b")
+    assert not reloaded.is_fresh("colmap", {"use_gpu": True}, reloaded.path_digest(str(scene / "images")))
+
+    _write(str(scene / "sparse" / "0" / "points3D.bin"), "changed")
+    assert not reloaded.is_fresh("colmap", {"use_gpu": True}, inputs)
+
+
+@pytest.fixture
+def fake_pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _write(os.path.join("scenes", "s", "images", "a.jpg"), "a")
+    calls = []
+
+    def fake_colmap(images_dir, scene_base, **kwargs):
+        calls.append("colmap")
+        colmap_model.write_model(make_model(), os.path.join(scene_base, "sparse", "0"))
+
+    def fake_training(scene_base, model_path=None, **kwargs):
+        calls.append("training")
+        _write(os.path.join(model_path, "point_cloud", "iteration_7", "point_cloud.ply"), "ply")
+
+    monkeypatch.setattr(orchestrator.colmap_mod, "run_colmap", fake_colmap)
+    monkeypatch.setattr(orchestrator.training_mod, "run_training", fake_training)
+    return calls
+
+
+def test_run_full_pipeline_skips_up_to_date_stages(fake_pipeline):
+    assert orchestrator.run_full_pipeline("s", iterations=7) == {"colmap": "ran", "cleanup": "ran", "training": "ran"}
+    assert orchestrator.run_full_pipeline("s", iterations=7) == {"colmap": "skipped", "cleanup": "skipped", "training": "skipped"}
+    # Only the downstream stage depends on iterations.
+    assert orchestrator.run_full_pipeline("s", iterations=8) == {"colmap": "skipped", "cleanup": "skipped", "training": "ran"}
+    assert orchestrator.run_full_pipeline("s", iterations=8, from_stage="training") == {"colmap": "skipped", "cleanup": "skipped", "training": "ran"}
+    assert orchestrator.run_full_pipeline("s", iterations=8, force=True) == {"colmap": "ran", "cleanup": "ran", "training": "ran"}
+    assert fake_pipeline == ["colmap", "training", "training", "training", "colmap", "training"]
+
+
+def test_sparse_cleanup_refilters_from_raw_model(fake_pipeline):
+    orchestrator.run_full_pipeline("s", iterations=7, profile=False)
+    raw = colmap_model.read_model(os.path.join("scenes", "s", "sparse_raw", "0"))
+    cleaned = colmap_model.read_model(os.path.join("scenes", "s", "sparse", "0"))
+    assert len(raw.points3D) == 50 and 0 < len(cleaned.points3D) <= (raw.track_lengths >= 3).sum()
+    assert cleaned.track_lengths.min() >= 3
+
+    # New filter settings start again from the COLMAP output and do not rerun COLMAP.
+    disabled = {"nb_neighbors": 0, "min_track_length": 0, "max_error": None}
+    status = orchestrator.run_full_pipeline("s", iterations=7, profile=False, cleanup=disabled)
+    assert status == {"colmap": "skipped", "cleanup": "ran", "training": "ran"}
+    assert len(colmap_model.read_model(os.path.join("scenes", "s", "sparse", "0")).points3D) == 50
+    assert fake_pipeline == ["colmap", "training", "training"]
+
+
+def test_rerun_from_source_dir_keeps_undistorted_images(fake_pipeline, monkeypatch):
+    _write(os.path.join("photos", "a.jpg"), "a")
+    _write(os.path.join("photos", "b.jpg"), "b")
+    run_colmap = orchestrator.colmap_mod.run_colmap
+
+    def undistorting_colmap(images_dir, scene_base, **kwargs):
+        run_colmap(images_dir, scene_base, **kwargs)
+        for name in os.listdir(images_dir):
+            _write(os.path.join(images_dir, name), "undistorted")
+
+    monkeypatch.setattr(orchestrator.colmap_mod, "run_colmap", undistorting_colmap)
+    orchestrator.run_full_pipeline("s", src_images_dir="photos", iterations=7, profile=False)
+    status = orchestrator.run_full_pipeline("s", src_images_dir="photos", iterations=7, profile=False)
+    assert status == {"colmap": "skipped", "cleanup": "skipped", "training": "skipped"}
+    assert open(os.path.join("scenes", "s", "images", "b.jpg")).read() == "undistorted"
+
+    # A changed source is placed again and reconstructed from the originals.
+    _write(os.path.join("photos", "c.jpg"), "c")
+    status = orchestrator.run_full_pipeline("s", src_images_dir="photos", iterations=7, profile=False)
+    assert status["colmap"] == "ran" and sorted(os.listdir(os.path.join("scenes", "s", "images"))) == ["a.jpg", "b.jpg", "c.jpg"]
@@ -0,0 +1,101 @@
+import gzip
+import os
+
+import pytest
+
+from src import sync
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _scene(root):
+    _write(os.path.join(root, "images", "a.jpg"), b"jpeg")
+    _write(os.path.join(root, "sparse", "0", "points3D.bin"), os.urandom(5000))
+    _write(os.path.join(root, "sparse", "0", "cameras.txt"), b"1 PINHOLE 640 480 500 500 320 240\n" * 50)
+    _write(os.path.join(root, "logs", "train.log"), b"Training progress\n" * 200)
+    _write(os.path.join(root, "output", "point_cloud", "iteration_7", "point_cloud.ply"), os.urandom(20000))
+
+
+def test_sync_uploads_only_changes_and_compresses_text(tmp_path):
+    scene, remote = str(tmp_path / "scene"), str(tmp_path / "remote")
+    _scene(scene)
+    report = sync.sync_dir(scene, remote, prefix="s", chunk_size=4096)
+    assert (report["files"], report["uploaded"], report["failed"]) == (4, 4, {})
+    assert not os.path.exists(os.path.join(remote, "s", "images"))
+    ply = os.path.join("output", "point_cloud", "iteration_7", "point_cloud.ply")
+    with open(os.path.join(scene, ply), "rb") as a, open(os.path.join(remote, "s", ply), "rb") as b:
+        assert a.read() == b.read()
+    with gzip.open(os.path.join(remote, "s", "logs", "train.log.gz")) as f:
+        assert f.read() == b"Training progress\n" * 200
+    assert report["bytes_sent"] < report["bytes_read"]
+
+    assert sync.sync_dir(scene, remote, prefix="s")["uploaded"] == 0
+    _write(os.path.join(scene, "logs", "train.log"), b"more\n")
+    os.remove(os.path.join(scene, ply))
+    report = sync.sync_dir(scene, remote, prefix="s", delete=True, compress=False)
+    assert (report["uploaded"], report["skipped"], report["deleted"]) == (1, 2, 1)
+    # Stored uncompressed now: the old .gz copy is replaced, the deleted PLY is gone.
+    assert open(os.path.join(remote, "s", "logs", "train.log"), "rb").read() == b"more\n"
+    assert not os.path.exists(os.path.join(remote, "s", "logs", "train.log.gz"))
+    assert not os.path.exists(os.path.join(remote, "s", ply))
+
+
+class FlakyBackend(sync.LocalBackend):
+    def __init__(self, root, fail_after):
+        super().__init__(root)
+        self.puts = 0
+        self.fail_after = fail_after
+
+    def put_part(self, key, upload_id, index, data):
+        self.puts += 1
+        if self.puts > self.fail_after:
+            raise OSError("connection reset")
+        super().put_part(key, upload_id, index, data)
+
+
+def test_interrupted_upload_resumes_from_staged_parts(tmp_path):
+    scene, remote = str(tmp_path / "scene"), str(tmp_path / "remote")
+    _write(os.path.join(scene, "output", "ckpt.pth"), os.urandom(10 * 1024))
+    report = sync.sync_dir(scene, FlakyBackend(remote, fail_after=6), chunk_size=1024, workers=1)
+    assert list(report["failed"]) == ["output/ckpt.pth"] and report["uploaded"] == 0
+    assert not os.path.exists(os.path.join(remote, "output", "ckpt.pth"))
+
+    report = sync.sync_dir(scene, "file://" + remote, chunk_size=1024)
+    assert (report["uploaded"], report["resumed_parts"], report["bytes_sent"]) == (1, 6, 4 * 1024)
+    with open(os.path.join(scene, "output", "ckpt.pth"), "rb") as a, open(os.path.join(remote, "output", "ckpt.pth"), "rb") as b:
+        assert a.read() == b.read()
+    assert os.listdir(os.path.join(remote, ".uploads")) == []
+
+
+def test_background_sync_and_batch_stage(tmp_path, monkeypatch):
+    from src import orchestrator
+    from src.batch import BatchRunner
+
+    monkeypatch.chdir(tmp_path)
+    _scene(os.path.join("scenes", "s"))
+    future = orchestrator.sync_scene("s", str(tmp_path / "remote"), background=True)
+    assert future.result()["uploaded"] == 4
+
+    calls = []
+    runner = BatchRunner(
+        [{"scene": "s"}],
+        state_file=str(tmp_path / "state.json"),
+        stage_func=lambda job, stage: calls.append(stage) or (BatchRunner._run_stage(runner, job, stage) if stage == "sync" else "ran"),
+        sync_dest=str(tmp_path / "remote"),
+    )
+    assert runner.run() == {"s": "done"}
+    assert calls == list(orchestrator.STAGES) + ["sync"]
+    assert runner.state["s"]["stages"]["sync"]["status"] == "done"
+
+
+def test_incomplete_backend_fails_at_construction():
+    class NoDelete(sync.StorageBackend):
+        def read_manifest(self, prefix):
+            return {}
+
+    with pytest.raises(TypeError):
+        NoDelete()
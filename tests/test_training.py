@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+
+import pytest
+
+from src import training
+
+STUBS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs")
+
+
+@pytest.fixture
+def scene(tmp_path, monkeypatch):
+    monkeypatch.setenv("GAUSSIAN_SPLATTING_DIR", STUBS)
+    (tmp_path / "scene").mkdir()
+    return str(tmp_path / "scene")
+
+
+def _metrics(path):
+    return [json.loads(line) for line in open(path)]
+
+
+def test_resume_from_newest_intact_checkpoint(scene, monkeypatch):
+    model = os.path.join(scene, "output")
+    monkeypatch.setenv("STUB_TRAIN_FAIL_AT", "700")
+    with pytest.raises(subprocess.CalledProcessError):
+        training.run_training(scene, iterations=1000, model_path=model, checkpoint_every=300)
+    assert [i for i, _ in training.find_checkpoints(model)] == [600, 300]
+
+    # A checkpoint cut short mid-save is skipped in favour of the previous one.
+    with open(os.path.join(model, "chkpnt600.pth"), "r+b") as f:
+        f.truncate(10)
+    monkeypatch.delenv("STUB_TRAIN_FAIL_AT")
+    result = training.run_training(scene, iterations=1000, model_path=model, checkpoint_every=300)
+    assert result["resumed_from"] == 300
+    events = _metrics(result["metrics"])
+    progress = [e for e in events if e["kind"] == "progress"]
+    # Progress after the resume is reported in absolute iterations.
+    assert progress[-1]["iteration"] == 1000 and progress[-1]["total"] == 1000
+    assert progress[-1]["loss"] == pytest.approx(0.0001)
+    assert any(e["kind"] == "eval" and e["psnr"] == 27.5 for e in events)
+    assert events[-1]["kind"] == "finished"
+
+    assert training.run_training(scene, iterations=1000, model_path=model)["status"] == "complete"
+
+
+def test_changed_inputs_or_resume_false_start_over(scene, monkeypatch):
+    model = os.path.join(scene, "output")
+    monkeypatch.setenv("STUB_TRAIN_FAIL_AT", "700")
+    with pytest.raises(subprocess.CalledProcessError):
+        training.run_training(scene, iterations=1000, model_path=model, checkpoint_every=300, inputs_digest="a")
+    monkeypatch.delenv("STUB_TRAIN_FAIL_AT")
+    assert training.run_training(scene, iterations=1000, model_path=model, inputs_digest="b")["resumed_from"] is None
+
+    # resume=False wipes earlier results, so the next run cannot pick them up.
+    training.run_training(scene, iterations=1000, model_path=model, resume=False, checkpoint_every=0)
+    assert training.find_checkpoints(model) == []
+    assert training.checkpoint_iterations(30000, 5000, start=10000) == [15000, 20000, 25000]